@@ -0,0 +1,82 @@
+#!/usr/local/bin/python
+
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import print_function
+from simulator.simulator import Simulator
+from simulator.crn import ABRunner
+from simulator.crn import Variant
+
+# Compares Node timeout settings, and the draft's RESETACK then RESET against the combined
+# message of Node.COMBINED_RESETACK, with common random numbers (simulator/crn.py): both
+# variants of a pair run on the same channel delays, losses and reboot times.  The
+# report shows the paired 95% interval next to the one of two independent sweeps.
+
+Simulator.VERBOSE = False
+
+trial_count = 500
+comparisons = [(Variant("TIMEOUT_MAX 4.0", timeout_max=4.0), Variant("TIMEOUT_MAX 1.0", timeout_max=1.0)),
+               (Variant("TIMEOUT_MIN 0.05", timeout_min=0.05), Variant("TIMEOUT_MIN 0.1", timeout_min=0.1)),
+               (Variant("TIMEOUT_JITTER 0.005", timeout_jitter=0.005), Variant("TIMEOUT_JITTER 0.05", timeout_jitter=0.05)),
+               (Variant("draft", combined_resetack=False), Variant("combined RESETACK", combined_resetack=True))]
+
+for loss_rate in (0.60, 0.90):
+    for a, b in comparisons:
+        for antithetic in (False, True):
+            runner = ABRunner(a, b, loss_rate=loss_rate, reboot_at=(10.0, 10.1), antithetic=antithetic)
+            time, messages = runner.run(range(trial_count))
+            print("loss {} {} vs {}{}:".format(loss_rate, a.name, b.name, " antithetic" if antithetic else ""))
+            print("    convergence time {}".format(time))
+            print("    messages         {}".format(messages))
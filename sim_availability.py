@@ -0,0 +1,135 @@
+#!/usr/local/bin/python
+
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import print_function
+import random
+import os
+import time
+from simulator.simulator import Simulator
+from simulator.node import Node
+from simulator.delay import ExponentialDelay
+from simulator.delay import UniformDelay
+from simulator.delay import WeibullDelay
+from simulator.channel import Channel
+from simulator.monitor import Monitors
+from simulator.monitor import UnexpectedEventMonitor
+from simulator.monitor import AgreementMonitor
+from simulator.failure import Availability
+from simulator.failure import RebootProcess
+from simulator.failure import Segment
+
+# Availability of a link whose nodes fail and reboot at random: each node has its own
+# time to failure and repair, and both share a segment (e.g. a switch) whose failures
+# take down each node with probability coupling.  Reports the fraction of time in
+# (OK, OK) per node and for the link, with batch-means confidence intervals.
+
+Simulator.EXTRA_VERBOSE = False
+Simulator.VERBOSE = False
+Channel.VERBOSE = False
+Node.VERBOSE = False
+Node.EXTRA_VERBOSE = Node.VERBOSE
+
+loss_rate = 0.60
+min_delay = 0.000001  # 1 micro-second minimum delay
+mean_dealy = 0.000020  # 20 micro-second delay
+
+horizon = 30 * 24 * 3600.0
+batch_length = 24 * 3600.0
+
+mtbf = 3600.0
+repair = (1.0, 5.0)
+segment_mtbf = 6 * 3600.0
+
+
+def run(name, time_to_failure, coupling):
+    random.seed(os.urandom(4))
+    sim = Simulator()
+    delay_generator = ExponentialDelay(min_delay, mean_dealy)
+
+    alice = Node(sim, "ALICE", Channel(sim, delay_generator, loss_rate))
+    bob = Node(sim, "BOB  ", Channel(sim, delay_generator, loss_rate))
+    alice.set_peer(bob)
+    bob.set_peer(alice)
+    alice.start_synchronized(bob)
+
+    availability = Availability(sim, [alice, bob], batch_length)
+    Monitors(sim, [alice, bob], [UnexpectedEventMonitor(), AgreementMonitor(), availability])
+
+    processes = [RebootProcess(sim, node, time_to_failure, UniformDelay(*repair), availability)
+                 for node in (alice, bob)]
+    for process in processes:
+        process.start()
+    if coupling > 0.0:
+        Segment(sim, processes, ExponentialDelay(0.0, segment_mtbf), coupling).start()
+
+    start = time.time()
+    sim.run_until(horizon)
+    elapsed = time.time() - start
+
+    print("{}: {} events in {:.3f} seconds, failures {}".format(
+        name, sim.event_count, elapsed, ", ".join("{} {}".format(p.node.name, p.failures) for p in processes)))
+    for label, key in ((alice.name, alice.name), (bob.name, bob.name), ("link ", None)):
+        outages = availability.outages(key)
+        print("    {} availability {:.6f} +/- {:.6f} outages {} mean {:.3f} max {:.3f}".format(
+            label, availability.fraction(key), availability.half_width(key),
+            outages.count, outages.mean, outages.maximum))
+
+
+mean_repair = sum(repair) / 2.0
+print("repair only: node availability {:.6f}".format(mtbf / (mtbf + mean_repair)))
+run("exponential, independent", ExponentialDelay(0.0, mtbf), 0.0)
+run("exponential, segment coupling 0.5", ExponentialDelay(0.0, mtbf), 0.5)
+run("weibull shape 2, segment coupling 1.0", WeibullDelay(mtbf / WeibullDelay(1.0, 2.0).mean, 2.0), 1.0)
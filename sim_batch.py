@@ -0,0 +1,154 @@
+#!/usr/local/bin/python
+
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import print_function
+import random
+import os
+import sys
+import time
+import numpy
+from simulator.simulator import Simulator
+from simulator.node import Node
+from simulator.delay import ExponentialDelay
+from simulator.channel import Channel
+from simulator.batch import BatchSimulator
+from simulator.compat import legacy_seed
+from simulator.compat import seed_hex
+
+# Runs the sim_reboot.py study with the vectorized BatchSimulator, after cross-checking it
+# against the object engine on shared seeds.
+
+Simulator.EXTRA_VERBOSE = False
+Simulator.VERBOSE = False
+Channel.VERBOSE = False
+Node.VERBOSE = False
+Node.EXTRA_VERBOSE = Node.VERBOSE
+
+repeat_count = 5000
+check_count = 200
+event_count = 2000
+loss_rate = 0.60
+min_delay = 0.000001  # 1 micro-second minimum delay
+mean_dealy = 0.000020  # 20 micro-second delay
+
+# (alice_reboot_at, bob_reboot_at) of each sim_reboot.py study
+studies = [("Alice Failures", 10.0, 0.0),
+           ("Bob Failures", 0.0, 10.0),
+           ("Alice and Bob Failures", 10.0, 10.1)]
+
+
+def run_object_trial(seed, alice_reboot_at, bob_reboot_at):
+    """Same as sim_reboot.run_trial() without the printing, returns the two nodes and the event count"""
+    random.seed(legacy_seed(seed))
+    sim = Simulator()
+    delay_generator = ExponentialDelay(min_delay, mean_dealy)
+
+    alice = Node(sim, "ALICE", Channel(sim, delay_generator, loss_rate))
+    bob = Node(sim, "BOB  ", Channel(sim, delay_generator, loss_rate))
+    alice.set_peer(bob)
+    bob.set_peer(alice)
+
+    if alice_reboot_at > 0:
+        alice.reboot_after(alice_reboot_at, 2.0)
+    if bob_reboot_at > 0:
+        bob.reboot_after(bob_reboot_at, 2.0)
+
+    sim.run_count(event_count)
+    return alice, bob, sim._event_count
+
+
+def run_batch(seeds, alice_reboot_at, bob_reboot_at):
+    batch = BatchSimulator(seeds, ExponentialDelay(min_delay, mean_dealy), loss_rate)
+    batch.reboot_after(0, alice_reboot_at, 2.0)
+    batch.reboot_after(1, bob_reboot_at, 2.0)
+    batch.run_count(event_count)
+    return batch
+
+
+def cross_check(alice_reboot_at, bob_reboot_at):
+    seeds = [os.urandom(4) for i in range(check_count)]
+    batch = run_batch(seeds, alice_reboot_at, bob_reboot_at)
+    stats = batch.stats()
+
+    mismatches = 0
+    for i, seed in enumerate(seeds):
+        nodes = run_object_trial(seed, alice_reboot_at, bob_reboot_at)[:2]
+        expected = [(n._state.STATE, n._state.N_LOCAL, n._state.N_REMOTE, n._state.cnt_reset_sent,
+                     n._state.cnt_resetack_sent, n._state.cnt_resetack_recv, n._state.cnt_reboots) for n in nodes]
+        actual = [(batch.state[i, j], batch.n_local[i, j], batch.n_remote[i, j], stats['reset_sent'][i, j],
+                   stats['resetack_sent'][i, j], stats['resetack_recv'][i, j], stats['reboots'][i, j]) for j in (0, 1)]
+        if expected != actual:
+            mismatches += 1
+            print("MISMATCH random.seed() = 0x{} object {} batch {}".format(seed_hex(seed), expected, actual))
+
+    print("cross-check {} trials, {} mismatches".format(check_count, mismatches))
+    if mismatches > 0: raise RuntimeError("BatchSimulator does not match the object engine")
+
+
+for name, alice_reboot_at, bob_reboot_at in studies:
+    print("+++ {}".format(name))
+    cross_check(alice_reboot_at, bob_reboot_at)
+
+    start = time.time()
+    batch = run_batch([os.urandom(4) for i in range(repeat_count)], alice_reboot_at, bob_reboot_at)
+    elapsed = time.time() - start
+
+    failed = numpy.nonzero(~batch.data_ready.all(axis=1))[0]
+    print("{} trials in {:.3f} seconds, mean {:.1f} events per trial, {} failures".format(
+        batch.count, elapsed, batch.event_count.mean(), len(failed)))
+    for i in failed:
+        print("FAILED random.seed() = 0x{}".format(seed_hex(batch.seeds[i])))
+    sys.stdout.flush()
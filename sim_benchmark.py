@@ -0,0 +1,128 @@
+#!/usr/local/bin/python
+
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import print_function
+import os
+import sys
+import multiprocessing
+from simulator import benchmark
+
+# Benchmarks the simulator core on fixed-seed scenarios (simulator/benchmark.py), each in
+# its own process.
+#
+# Usage:
+#   python sim_benchmark.py run [baseline.json] [scenario ...]        print and save results
+#   python sim_benchmark.py compare baseline.json [threshold] [scenario ...]
+#                                                                     exit 1 on regressions
+
+repeat = 3
+threshold = 0.10    # a metric regresses when it is this fraction worse than the baseline
+
+
+def run_quietly(name):
+    # the Simulator prints a line per run
+    sys.stdout = open(os.devnull, "w")
+    return benchmark.run_scenario(benchmark.scenario(name), repeat)
+
+
+def run(names):
+    results = {}
+    print("{:<16} {:>8} {:>10} {:>14} {:>10} {:>12} {:>14} {:>9}".format(
+        "scenario", "trials", "events", "events/sec", "setup (us)", "peak RSS (kB)", "traced (kB)", "heap max"))
+    for name in names:
+        pool = multiprocessing.Pool(1)
+        result = pool.apply(run_quietly, (name,))
+        pool.close()
+        pool.join()
+
+        results[name] = result
+        print("{:<16} {:>8} {:>10} {:>14.0f} {:>10.1f} {:>12} {:>14} {:>9}".format(
+            name, result["trials"], result["events"], result["events_per_sec"], result["setup_us"],
+            result["peak_rss_kb"], result["traced_peak_kb"], result["heap_max"]))
+        sys.stdout.flush()
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("run", "compare") or (sys.argv[1] == "compare" and len(sys.argv) < 3):
+        print("Usage: {} run [baseline.json] [scenario ...] | compare baseline.json [threshold] [scenario ...]".format(
+            sys.argv[0]))
+        exit(1)
+
+    args = sys.argv[2:]
+    path = args.pop(0) if len(args) > 0 and args[0].endswith(".json") else None
+    if sys.argv[1] == "compare" and len(args) > 0:
+        try:
+            threshold = float(args[0])
+            args.pop(0)
+        except ValueError:
+            pass
+    names = args if len(args) > 0 else [s.name for s in benchmark.SCENARIOS]
+
+    if sys.argv[1] == "run":
+        results = run(names)
+        if path is not None:
+            benchmark.save(path, results)
+            print("baseline written to {}".format(path))
+    else:
+        baseline = benchmark.load(path)
+        results = run(names)
+        regressions = benchmark.compare(baseline, results, threshold)
+        for name, metric, before, after in regressions:
+            print("REGRESSION {} {}: {} -> {}".format(name, metric, before, after))
+        if len(regressions) > 0:
+            exit(1)
+        print("no regressions beyond {:.0%}".format(threshold))
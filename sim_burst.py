@@ -0,0 +1,110 @@
+#!/usr/local/bin/python
+
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import print_function
+import random
+import os
+import numpy
+from simulator.simulator import Simulator
+from simulator.node import Node
+from simulator.node import TimedNode
+from simulator.delay import ExponentialDelay
+from simulator.channel import Channel
+from simulator.loss import GilbertElliottLoss
+
+# Initialization trials over a link with Gilbert-Elliott burst loss, for a range of
+# Node.TIMEOUT_MAX values.  Both directions share one loss model, so an outage hits the
+# whole link.
+
+Simulator.EXTRA_VERBOSE = False
+Simulator.VERBOSE = False
+Channel.VERBOSE = False
+Node.VERBOSE = False
+Node.EXTRA_VERBOSE = Node.VERBOSE
+
+repeat_count = 1000
+min_delay = 0.000001  # 1 micro-second minimum delay
+mean_dealy = 0.000020  # 20 micro-second delay
+
+mean_good = 2.0    # mean time between outages (seconds)
+mean_bad = 0.5     # mean outage duration (seconds)
+loss_good = 0.01
+loss_bad = 1.0
+
+timeout_max_values = [0.4, 1.0, 2.0, 4.0, 8.0]
+
+for timeout_max in timeout_max_values:
+    Node.TIMEOUT_MAX = timeout_max
+    latency = numpy.empty(repeat_count)
+    resets = numpy.empty(repeat_count)
+
+    for t in range(repeat_count):
+        random.seed(os.urandom(4))
+        sim = Simulator()
+        delay_generator = ExponentialDelay(min_delay, mean_dealy)
+        loss = GilbertElliottLoss(mean_good, mean_bad, loss_good, loss_bad)
+
+        alice = TimedNode(sim, "ALICE", Channel(sim, delay_generator, loss))
+        bob = TimedNode(sim, "BOB  ", Channel(sim, delay_generator, loss))
+        alice.set_peer(bob)
+        bob.set_peer(alice)
+        sim.run_count(10000)
+
+        latency[t] = max(alice.ready_time, bob.ready_time) - max(alice.start_time, bob.start_time)
+        resets[t] = alice._state.cnt_reset_sent + bob._state.cnt_reset_sent
+
+    print("TIMEOUT_MAX {:>4.1f} latency mean {:.6f} p90 {:.6f} p99 {:.6f} resets sent {:.2f}".format(
+        timeout_max, latency.mean(), numpy.percentile(latency, 90), numpy.percentile(latency, 99), resets.mean()))
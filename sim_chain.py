@@ -0,0 +1,104 @@
+#!/usr/local/bin/python
+
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import print_function
+import time
+from simulator.simulator import Simulator
+from simulator.node import Node
+from simulator.channel import Channel
+from simulator.chain import Chain
+
+# End-to-end delivery over chains of links, each with its own reset protocol and
+# begin-end fragmentation (simulator/chain.py).  The forwarding node in the middle of
+# the chain reboots, and the sink measures latency, delivered packets and the time until
+# a packet sent after the reboot gets through.
+
+Simulator.EXTRA_VERBOSE = False
+Simulator.VERBOSE = False
+Channel.VERBOSE = False
+Node.VERBOSE = False
+Node.EXTRA_VERBOSE = Node.VERBOSE
+
+chain_hops = [1, 2, 4, 8, 16]
+loss_rate = 0.01
+min_delay = 0.000001  # 1 micro-second minimum delay
+mean_dealy = 0.000020  # 20 micro-second delay
+mtu = 1500
+
+rate = 1000.0  # packets per second
+packet_length = 4000
+reboot_at = 5.0
+reboot_delay = 2.0
+horizon = 15.0
+seed = 1
+
+print("{:>5} {:>8} {:>8} {:>9} {:>12} {:>12} {:>10} {:>10} {:>8}".format(
+    "hops", "sent", "deliver", "ratio", "latency", "latency max", "recovery", "reassembly", "wall"))
+for hops in chain_hops:
+    sim = Simulator()
+    chain = Chain(sim, hops, seed, loss_rate, min_delay, mean_dealy, mtu)
+    chain.start(rate, packet_length)
+    if hops > 1:
+        chain.reboot_at(reboot_at, hops // 2, reboot_delay)
+
+    start = time.time()
+    sim.run_until(horizon)
+    elapsed = time.time() - start
+
+    r = chain.results()
+    print("{:>5} {:>8} {:>8} {:>9.4f} {:>12.6f} {:>12.6f} {:>10} {:>10} {:>8.2f}".format(
+        hops, r["sent"], r["delivered"], r["delivery_ratio"], r["latency_mean"], r["latency_max"],
+        "-" if r["recovery_time"] is None else "{:.4f}".format(r["recovery_time"]), r["reassembly_drops"], elapsed))
@@ -0,0 +1,93 @@
+#!/usr/local/bin/python
+
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import print_function
+import sys
+from simulator.simulator import Simulator
+from simulator.node import Node
+from simulator.channel import Channel
+from simulator.delay import ExponentialDelay
+from simulator import emulation
+
+# Runs hundreds of node pairs in real time on an asyncio event loop, exchanging frames
+# over loopback UDP with added delay and loss (simulator/emulation.py), then the same
+# number of pairs in the simulator, and compares handshake latency and message rates.
+
+Simulator.EXTRA_VERBOSE = False
+Simulator.VERBOSE = False
+Channel.VERBOSE = False
+Node.VERBOSE = False
+Node.EXTRA_VERBOSE = Node.VERBOSE
+
+pair_count = 200
+horizon = 15.0
+loss_rate = 0.60
+min_delay = 0.000001  # 1 micro-second minimum delay
+mean_dealy = 0.000020  # 20 micro-second delay
+seed = 1
+
+if emulation.asyncio is None:
+    print("The emulation needs asyncio (Python 3)")
+    sys.exit(1)
+
+rows = emulation.compare(pair_count, horizon, ExponentialDelay(min_delay, mean_dealy), loss_rate, seed)
+print("{} pairs for {} seconds, loss {:.2f}".format(pair_count, horizon, loss_rate))
+print("    {:>10} {:>9} {:>10} {:>10} {:>10} {:>9} {:>9} {:>12}".format(
+    "", "converged", "latency", "median", "p95", "messages", "msgs/sec", "events/wall s"))
+for row in rows:
+    print("    {:>10} {:>9} {:>10.6f} {:>10.6f} {:>10.6f} {:>9} {:>9.1f} {:>12.0f}".format(
+        row["name"], row["converged"], row["latency_mean"], row["latency_p50"], row["latency_p95"],
+        row["messages"], row["message_rate"], row["events_per_wall_sec"]))
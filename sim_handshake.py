@@ -0,0 +1,106 @@
+#!/usr/local/bin/python
+
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import print_function
+import random
+import os
+import time
+import numpy
+from simulator.simulator import Simulator
+from simulator.node import Node
+from simulator.delay import ExponentialDelay
+from simulator.channel import Channel
+from simulator.handshake import HandshakeModel
+from simulator import handshake
+
+# Screens the initialization handshake latency over a grid of loss rates and channel delays
+# with the HandshakeModel, then validates the model against the event-driven simulator.
+
+Simulator.EXTRA_VERBOSE = False
+Simulator.VERBOSE = False
+Channel.VERBOSE = False
+Node.VERBOSE = False
+Node.EXTRA_VERBOSE = Node.VERBOSE
+
+sample_count = 10000
+validate_count = 1000
+min_delay = 0.000001  # 1 micro-second minimum delay
+
+loss_rates = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+mean_delays = [0.000020, 0.001, 0.010]
+
+# (loss_rate, mean_delay) pairs to run through the event-driven simulator
+validate_points = [(0.60, 0.000020), (0.30, 0.001), (0.90, 0.000020)]
+
+print("{:>6} {:>10} {:>12} {:>12} {:>12} {:>10}".format("loss", "mean", "latency", "p90", "p99", "ms"))
+for loss_rate in loss_rates:
+    for mean_delay in mean_delays:
+        model = HandshakeModel(loss_rate, ExponentialDelay(min_delay, mean_delay))
+        start = time.time()
+        latency = model.sample(sample_count, seed=1)
+        elapsed = time.time() - start
+        print("{:>6.2f} {:>10.6f} {:>12.6f} {:>12.6f} {:>12.6f} {:>10.1f}".format(
+            loss_rate, mean_delay, latency.mean(), numpy.percentile(latency, 90),
+            numpy.percentile(latency, 99), 1000 * elapsed))
+
+for loss_rate, mean_delay in validate_points:
+    random.seed(os.urandom(4))
+    model = HandshakeModel(loss_rate, ExponentialDelay(min_delay, mean_delay))
+    result = handshake.validate(model, validate_count, seed=2)
+    print("validate {} KS distance {:.4f}".format(model, result['ks']))
+    for name in ('model', 'simulator'):
+        print("    {:>10} mean {:.6f} p50 {:.6f} p90 {:.6f} p99 {:.6f}".format(
+            name, result[name + '_mean'], result[name + '_p50'], result[name + '_p90'], result[name + '_p99']))
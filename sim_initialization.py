@@ -54,55 +54,48 @@
 # intellectual property used by its contributions to this software. You may
 # contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
 
-import random
+from __future__ import print_function
 import os
-import binascii
 from simulator.simulator import Simulator
 from simulator.node import Node
 from simulator.delay import ExponentialDelay
 from simulator.channel import Channel
+from simulator.fixture import PairFixture
+from simulator.compat import seed_hex
 
 repeat_count = 1000
 
-for trial in range(0, repeat_count):
-    # Set one manually...
-    #seed = "\x61\xcb\x82\x90"
-
-    seed = os.urandom(4)
-    print "random.seed() = 0x{}".format(binascii.hexlify(seed))
-    random.seed(seed)
-
-    # Set message printing level
-    Simulator.EXTRA_VERBOSE = False
-    Simulator.VERBOSE = False
-    Channel.VERBOSE = False
-    Node.EXTRA_VERBOSE = False
-    Node.EXTRA_VERBOSE = False
+# Set message printing level
+Simulator.EXTRA_VERBOSE = False
+Simulator.VERBOSE = False
+Channel.VERBOSE = False
+Node.VERBOSE = False
+Node.EXTRA_VERBOSE = False
 
-    sim = Simulator()
-    loss_rate = 0.60       # loss rate (0.0 to 1.0)
-    min_delay = 0.000001   # 1 micro-second minimum delay
-    mean_dealy = 0.000020  # 20 micro-second delay
+loss_rate = 0.60       # loss rate (0.0 to 1.0)
+min_delay = 0.000001   # 1 micro-second minimum delay
+mean_dealy = 0.000020  # 20 micro-second delay
 
-    delay_generator = ExponentialDelay(min_delay, mean_dealy)
+# One simulator, two channels and two nodes, reset in place for every trial
+fixture = PairFixture(ExponentialDelay(min_delay, mean_dealy), loss_rate)
 
-    alice_output = Channel(sim, delay_generator, loss_rate)
-    alice = Node(sim, "ALICE", True, alice_output)
-
-    bob_output = Channel(sim, delay_generator, loss_rate)
-    bob = Node(sim, "BOB  ", False, bob_output)
+for trial in range(0, repeat_count):
+    # Set one manually...
+    #seed = b"\x61\xcb\x82\x90"
 
-    alice.set_peer(bob)
-    bob.set_peer(alice)
+    seed = os.urandom(4)
+    print("random.seed() = 0x{}".format(seed_hex(seed)))
+    fixture.reset(seed)
+    alice, bob = fixture.alice, fixture.bob
 
-    sim.run_count(1000)
+    fixture.sim.run_count(1000)
 
     alice.print_stats()
     bob.print_stats()
 
-    print "trail {:6} Alice is {}, Bob is {}".format(
+    print("trail {:6} Alice is {}, Bob is {}".format(
         trial + 1,
         "OK" if alice.data_ready else "NOT OK",
         "OK" if bob.data_ready else "NOT OK",
-    )
+    ))
     if not alice.data_ready or not bob.data_ready: raise RuntimeError("Terminated in failure mode")
\ No newline at end of file
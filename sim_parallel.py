@@ -0,0 +1,92 @@
+#!/usr/local/bin/python
+
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import print_function
+import time
+from simulator.parallel import PairSpec
+from simulator.parallel import PartitionedSimulation
+from simulator.parallel import assign_pairs
+from simulator.parallel import run_sequential
+
+# Runs a topology of node pairs with the partitioned engine (simulator/parallel.py) and
+# checks that it matches the sequential engine exactly.  Keeping each pair in one
+# partition needs no synchronization; splitting the pairs sends every message across
+# partitions, and the 1 micro-second lookahead makes the partitions advance in small steps.
+
+pair_count = 400
+partitions = 4
+end_time = 60.0
+seed = 1
+
+pairs = [PairSpec("p{}".format(i), reboot_at=[(10.0, 0.0), (0.0, 10.0), (10.0, 10.1)][i % 3])
+         for i in range(pair_count)]
+
+start = time.time()
+reference, reference_events = run_sequential(pairs, seed, end_time)
+print("sequential: {} events in {:.3f} seconds".format(reference_events, time.time() - start))
+
+for split in (False, True):
+    start = time.time()
+    simulation = PartitionedSimulation(pairs, seed, assign_pairs(pairs, partitions, split))
+    simulation.run_until(end_time)
+    results, events = simulation.results()
+    elapsed = time.time() - start
+
+    mismatches = [name for name in reference if results.get(name) != reference[name]]
+    print("{} split {}: {} events in {:.3f} seconds, {} mismatches".format(
+        simulation, split, events, elapsed, len(mismatches)))
+    if len(mismatches) > 0 or events != reference_events:
+        raise RuntimeError("Partitioned results differ from sequential for {}".format(mismatches[:10]))
@@ -54,14 +54,21 @@
 # intellectual property used by its contributions to this software. You may
 # contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
 
+from __future__ import print_function
 import random
 import os
 import sys
-import binascii
 from simulator.simulator import Simulator
 from simulator.node import Node
 from simulator.delay import ExponentialDelay
 from simulator.channel import Channel
+from simulator.trace import TraceRecorder
+from simulator.cache import ResultCache
+from simulator.fixture import PairFixture
+from simulator.monitor import Monitors
+from simulator.compat import legacy_seed
+from simulator.compat import random_bytes
+from simulator.compat import seed_hex
 
 # Set message printing level
 Simulator.EXTRA_VERBOSE = False
@@ -75,74 +82,163 @@ repeat_count = 5000
 loss_rate = 0.60
 min_delay = 0.000001  # 1 micro-second minimum delay
 mean_dealy = 0.000020  # 20 micro-second delay
-
-def run_trial(trial, alice_reboot_at=0.0, bob_reboot_at=0.0):
-    sim = Simulator()
-
-    delay_generator = ExponentialDelay(min_delay, mean_dealy)
-
-    alice_output = Channel(sim, delay_generator, loss_rate)
-    alice = Node(sim, "ALICE", alice_output)
-
-    bob_output = Channel(sim, delay_generator, loss_rate)
-    bob = Node(sim, "BOB  ", bob_output)
-
-    alice.set_peer(bob)
-    bob.set_peer(alice)
+event_budget = 2000
+
+# Set master_seed to draw the same trial seeds on every run, and cache_path to a file to
+# keep the results of trials whose code, parameters and seed have not changed.
+master_seed = None
+cache_path = None
+
+# Check protocol invariants while a trial runs and stop it at the first failure
+use_monitors = True
+
+# Start both nodes in (OK, OK) instead of running the initial handshake of every trial, so
+# the event budget goes to the reboots (sim_initialization.py studies the handshake)
+synchronized_start = False
+
+_fixture = None
+_recorder = None
+_monitors = None
+
+def trial_fixture():
+    """The PairFixture that run_trial() resets, created without drawing from the random module"""
+    global _fixture, _recorder, _monitors
+    if _fixture is None:
+        state = random.getstate()
+        _fixture = PairFixture(ExponentialDelay(min_delay, mean_dealy), loss_rate)
+        random.setstate(state)
+
+        # Keep the last events in memory, written to trace_path only if the trial fails
+        _recorder = TraceRecorder([_fixture.alice, _fixture.bob])
+        _fixture.sim.set_recorder(_recorder)
+
+        if use_monitors:
+            _monitors = Monitors(_fixture.sim, [_fixture.alice, _fixture.bob])
+    return _fixture
+
+def run_trial(trial, alice_reboot_at=0.0, bob_reboot_at=0.0, trace_path=None):
+    """
+    Runs one trial on the random module as seeded by the caller.  The returned nodes are
+    reset by the next trial.
+    """
+    fixture = trial_fixture()
+    recorder = _recorder
 
     # Alice will reboot 10 seconds after she goes in to (OK, OK) mode.
-    if alice_reboot_at > 0:
-        alice.reboot_after(alice_reboot_at, 2.0)
-
-    if bob_reboot_at > 0:
-        bob.reboot_after(bob_reboot_at, 2.0)
-
-    sim.run_count(2000)
+    fixture.reset(None, alice_reboot_at, bob_reboot_at, 2.0, synchronized=synchronized_start)
+    recorder.reset()
+    if _monitors is not None:
+        _monitors.reset()
+    sim, alice, bob = fixture.sim, fixture.alice, fixture.bob
+
+    try:
+        sim.run_count(event_budget)
+    except Exception:
+        if trace_path is not None:
+            recorder.dump(trace_path)
+        raise
 
     alice.print_stats()
     bob.print_stats()
 
-    print "trail {:6} Alice is {}, Bob is {}".format(
+    print("trail {:6} Alice is {}, Bob is {}".format(
         trial,
         "OK" if alice.data_ready else "NOT OK",
         "OK" if bob.data_ready else "NOT OK",
-    )
+    ))
 
     sys.stdout.flush()
-    print ""
-    if not alice.data_ready or not bob.data_ready: raise RuntimeError("Terminated in failure mode")
+    print("")
+    if sim.stop_reason is not None or not alice.data_ready or not bob.data_ready:
+        if sim.stop_reason is not None:
+            print("stopped by monitor: {}".format(sim.stop_reason))
+        if trace_path is not None:
+            recorder.dump(trace_path)
+            print("trace written to {}".format(trace_path))
+        raise RuntimeError("Terminated in failure mode")
+
+    return alice, bob
+
+def failure_trace_path(seed):
+    return "trail_{}.trace".format(seed_hex(seed))
+
+def trial_parameters(alice_reboot_at=0.0, bob_reboot_at=0.0):
+    """Everything besides the seed and the code that decides the outcome of run_trial()"""
+    return {"loss_rate": loss_rate,
+            "delay": ["ExponentialDelay", min_delay, mean_dealy],
+            "timeout": [Node.TIMEOUT_MIN, Node.TIMEOUT_MAX, Node.TIMEOUT_JITTER],
+            "combined_resetack": Node.COMBINED_RESETACK,
+            "synchronized_start": synchronized_start,
+            "use_monitors": use_monitors,
+            "reboot_at": [alice_reboot_at, bob_reboot_at],
+            "reboot_delay": 2.0,
+            "event_budget": event_budget}
+
+def node_result(node):
+    state = node._state
+    return {"data_ready": node.data_ready,
+            "reset_sent": state.cnt_reset_sent,
+            "resetack_sent": state.cnt_resetack_sent,
+            "resetack_recv": state.cnt_resetack_recv,
+            "resetack_reset_sent": state.cnt_resetack_reset_sent,
+            "reboots": state.cnt_reboots}
+
+def run_seeded_trial(trial, seed, cache=None, alice_reboot_at=0.0, bob_reboot_at=0.0):
+    """
+    Seeds the random module and runs the trial, or returns the cached result of an earlier
+    run of the same trial.  Failed trials are not cached.
+
+    :return: dict of node_result() for alice and bob
+    """
+    print("trail {:6} random.seed() = 0x{}".format(trial, seed_hex(seed)))
+    parameters = trial_parameters(alice_reboot_at, bob_reboot_at)
+    if cache is not None:
+        result = cache.get(parameters, seed)
+        if result is not None:
+            print("trail {:6} Alice is OK, Bob is OK (cached)".format(trial))
+            print("")
+            return result
+
+    random.seed(legacy_seed(seed))
+    alice, bob = run_trial(trial, alice_reboot_at, bob_reboot_at, trace_path=failure_trace_path(seed))
+    result = {"alice": node_result(alice), "bob": node_result(bob)}
+    if cache is not None:
+        cache.put(parameters, seed, result)
+    return result
 
 def run_failure():
     # Failing simulation
     t=0
-    seed = "\xe2\xbf\x20\x27"
-    print "trail {:6} random.seed() = 0x{}".format(t, binascii.hexlify(seed))
-    random.seed(seed)
-    run_trial(t, alice_reboot_at=10.0, bob_reboot_at=10.1)
+    seed = b"\xe2\xbf\x20\x27"
+    print("trail {:6} random.seed() = 0x{}".format(t, seed_hex(seed)))
+    random.seed(legacy_seed(seed))
+    run_trial(t, alice_reboot_at=10.0, bob_reboot_at=10.1, trace_path=failure_trace_path(seed))
     exit()
 
 #run_failure()
 
-# Simulations with only Alice rebooting
-print "+++ Alice Failures"
-for t in range(1, repeat_count + 1):
-    seed = os.urandom(4)
-    print "trail {:6} random.seed() = 0x{}".format(t, binascii.hexlify(seed))
-    random.seed(seed)
-    run_trial(t, alice_reboot_at=10.0, bob_reboot_at=0.0)
-
-# Simulations with only Bob rebooting
-print "+++ Bob Failures"
-for t in range(repeat_count, 2*repeat_count + 1):
-    seed = os.urandom(4)
-    print "trail {:6} random.seed() = 0x{}".format(t, binascii.hexlify(seed))
-    random.seed(seed)
-    run_trial(t, alice_reboot_at=0.0, bob_reboot_at=10.0)
-
-# Simulations with Alice rebooting, then Bob rebooting during Alice's reboot
-print "+++ Alice and Bob Failures"
-for t in range(2*repeat_count, 3*repeat_count + 1):
-    seed = os.urandom(4)
-    print "trail {:6} random.seed() = 0x{}".format(t, binascii.hexlify(seed))
-    random.seed(seed)
-    run_trial(t, alice_reboot_at=10.0, bob_reboot_at=10.1)
+if __name__ == "__main__":
+    seeds = random.Random(legacy_seed(master_seed)) if master_seed is not None else None
+    def next_seed():
+        return os.urandom(4) if seeds is None else random_bytes(seeds, 4)
+
+    cache = ResultCache(cache_path, driver=__file__) if cache_path is not None else None
+
+    # Simulations with only Alice rebooting
+    print("+++ Alice Failures")
+    for t in range(1, repeat_count + 1):
+        run_seeded_trial(t, next_seed(), cache, alice_reboot_at=10.0, bob_reboot_at=0.0)
+
+    # Simulations with only Bob rebooting
+    print("+++ Bob Failures")
+    for t in range(repeat_count, 2*repeat_count + 1):
+        run_seeded_trial(t, next_seed(), cache, alice_reboot_at=0.0, bob_reboot_at=10.0)
+
+    # Simulations with Alice rebooting, then Bob rebooting during Alice's reboot
+    print("+++ Alice and Bob Failures")
+    for t in range(2*repeat_count, 3*repeat_count + 1):
+        run_seeded_trial(t, next_seed(), cache, alice_reboot_at=10.0, bob_reboot_at=10.1)
+
+    if cache is not None:
+        print(cache)
+        cache.close()
@@ -0,0 +1,153 @@
+#!/usr/local/bin/python
+
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import print_function
+import os
+import sys
+import time
+import multiprocessing
+import sim_reboot
+from simulator.jobqueue import JobQueue
+from simulator.cache import ResultCache
+from simulator.compat import seed_hex
+
+# Runs the sim_reboot.py trials from a shared SQLite job queue, so several processes and
+# hosts (through a shared filesystem) can work on one sweep.
+#
+# Usage:
+#   python sim_worker.py queue.db enqueue [repeat_count]   add the sim_reboot.py studies
+#   python sim_worker.py queue.db work [processes]         run trials until the queue is empty
+#   python sim_worker.py queue.db status                   job counts and failed seeds
+
+batch_size = 50     # jobs claimed (and results committed) at a time
+lease = 120.0       # seconds a claimed job stays with a worker without a heartbeat
+cache_path = None   # a ResultCache file shared by the workers, to skip unchanged trials
+
+# The sim_reboot.py studies, as run_trial() arguments
+scenarios = [{"alice_reboot_at": 10.0, "bob_reboot_at": 0.0},
+             {"alice_reboot_at": 0.0, "bob_reboot_at": 10.0},
+             {"alice_reboot_at": 10.0, "bob_reboot_at": 10.1}]
+
+
+def enqueue(path, repeat_count):
+    queue = JobQueue(path)
+    for scenario in scenarios:
+        added = queue.enqueue(scenario, [os.urandom(4) for i in range(repeat_count)])
+        print("enqueued {} jobs for {}".format(added, scenario))
+    queue.close()
+
+
+def work(path):
+    queue = JobQueue(path)
+    cache = ResultCache(cache_path, driver=sim_reboot.__file__) if cache_path is not None else None
+    worker = JobQueue.worker_name()
+    done = 0
+
+    while True:
+        jobs = queue.claim(worker, batch_size, lease)
+        if len(jobs) == 0:
+            break
+
+        results = []
+        renewed = time.time()
+        for job in jobs:
+            try:
+                result = sim_reboot.run_seeded_trial(job.id, job.seed, cache, **job.scenario)
+                results.append((job, True, result))
+            except RuntimeError as e:
+                results.append((job, False, {"error": str(e)}))
+
+            if time.time() - renewed > lease / 3:
+                queue.heartbeat(worker, jobs, lease)
+                renewed = time.time()
+
+        queue.complete(worker, results)
+        if cache is not None:
+            cache.flush()
+        done += len(results)
+
+    print("worker {} finished {} jobs".format(worker, done))
+    if cache is not None:
+        print(cache)
+        cache.close()
+    queue.close()
+
+
+def status(path):
+    queue = JobQueue(path)
+    print(queue.counts())
+    for scenario, seed, result in queue.results(JobQueue.FAILED):
+        print("FAILED {} random.seed() = 0x{} {}".format(scenario, seed_hex(seed), result))
+    queue.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[2] not in ("enqueue", "work", "status"):
+        print("Usage: {} queue.db enqueue [repeat_count] | work [processes] | status".format(sys.argv[0]))
+        exit(1)
+
+    path, command = sys.argv[1], sys.argv[2]
+    if command == "enqueue":
+        enqueue(path, int(sys.argv[3]) if len(sys.argv) > 3 else sim_reboot.repeat_count)
+    elif command == "work":
+        processes = [multiprocessing.Process(target=work, args=(path,))
+                     for i in range(int(sys.argv[3]) if len(sys.argv) > 3 else 1)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        status(path)
@@ -0,0 +1,382 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# Retransmission timeout policies for the RESET timer of a Node
+
+from __future__ import absolute_import
+import abc
+import math
+import random
+from .simulator import Simulator
+from .delay import ExponentialDelay
+from .node import TimedNode
+from .channel import Channel
+from .compat import ABC
+
+
+class Backoff(ABC):
+    """
+    Decides the RESET retransmission timeout of one Node.  The node keeps the current base
+    timeout and asks the policy for:
+
+        initial()               the base timeout when a handshake starts or a RESET is ACKed
+        increase(timeout, rng)  the base timeout after the timer fired
+        delay(timeout, rng)     the timer delay for the base timeout, with any jitter
+
+    sample(rtt) gets the RESET to RESETACK time of every RESET that was only sent once
+    (Karn's rule) and restart() is called when the node reboots.  Policies that learn keep
+    state, so every node needs its own instance.
+    """
+    def __init__(self):
+        pass
+
+    @abc.abstractproperty
+    def maximum(self):
+        """The largest base timeout (seconds)"""
+        pass
+
+    @abc.abstractmethod
+    def initial(self):
+        pass
+
+    @abc.abstractmethod
+    def increase(self, timeout, rng):
+        pass
+
+    def delay(self, timeout, rng):
+        return timeout
+
+    def sample(self, rtt):
+        pass
+
+    def restart(self):
+        pass
+
+
+class ExponentialBackoff(Backoff):
+    """
+    The Node default: doubles from minimum up to maximum and adds uniform jitter up to
+    jitter to every timer.  With the Node class values it draws the same random numbers as
+    a Node without a policy.
+    """
+
+    def __init__(self, minimum=0.050, maximum=4.0, jitter=0.005):
+        """
+        :param minimum: The first timeout (seconds), Node.TIMEOUT_MIN
+        :param maximum: The largest timeout (seconds), Node.TIMEOUT_MAX
+        :param jitter: The largest additive jitter (seconds), Node.TIMEOUT_JITTER
+        """
+        super(ExponentialBackoff, self).__init__()
+        if not (0.0 < minimum <= maximum): raise ValueError("0.0 < minimum <= maximum")
+        self._minimum = minimum
+        self._maximum = maximum
+        self._jitter = jitter
+
+    def __repr__(self):
+        return "{{ExponentialBackoff: ({}, {}, {})}}".format(self._minimum, self._maximum, self._jitter)
+
+    @property
+    def maximum(self):
+        return self._maximum
+
+    def initial(self):
+        return self._minimum
+
+    def increase(self, timeout, rng):
+        if timeout < self._maximum:
+            timeout = min(timeout * 2, self._maximum)
+        return timeout
+
+    def delay(self, timeout, rng):
+        return timeout + rng.uniform(0, self._jitter)
+
+
+class DecorrelatedJitterBackoff(Backoff):
+    """
+    Capped exponential backoff with decorrelated jitter: every retry draws the next
+    timeout uniformly between base and three times the last one, up to cap.  The jitter
+    is part of the timeout, so delay() adds nothing.
+    """
+
+    def __init__(self, base=0.001, cap=4.0):
+        """
+        :param base: The first and smallest timeout (seconds)
+        :param cap: The largest timeout (seconds)
+        """
+        super(DecorrelatedJitterBackoff, self).__init__()
+        if not (0.0 < base <= cap): raise ValueError("0.0 < base <= cap")
+        self._base = base
+        self._cap = cap
+
+    def __repr__(self):
+        return "{{DecorrelatedJitterBackoff: ({}, {})}}".format(self._base, self._cap)
+
+    @property
+    def maximum(self):
+        return self._cap
+
+    def initial(self):
+        return self._base
+
+    def increase(self, timeout, rng):
+        return min(self._cap, rng.uniform(self._base, timeout * 3))
+
+
+class AdaptiveBackoff(Backoff):
+    """
+    A timeout from the smoothed round trip time, as TCP computes its RTO (RFC 6298):
+
+        SRTT   = 7/8 SRTT + 1/8 R
+        RTTVAR = 3/4 RTTVAR + 1/4 |SRTT - R|
+        RTO    = SRTT + max(granularity, 4 RTTVAR), between minimum and maximum
+
+    Until the first sample the timeout is initial.  Each timeout doubles it up to maximum
+    and an ACK goes back to the RTO.  A reboot forgets the estimate.
+    """
+
+    def __init__(self, initial=0.050, minimum=0.001, maximum=4.0, granularity=0.0, jitter=0.0):
+        """
+        :param initial: The timeout before the first RTT sample (seconds)
+        :param minimum: The smallest RTO (seconds)
+        :param maximum: The largest timeout (seconds)
+        :param granularity: The clock granularity G of RFC 6298 (seconds)
+        :param jitter: The largest additive jitter (seconds)
+        """
+        super(AdaptiveBackoff, self).__init__()
+        if not (0.0 < minimum <= maximum): raise ValueError("0.0 < minimum <= maximum")
+        self._initial = initial
+        self._minimum = minimum
+        self._maximum = maximum
+        self._granularity = granularity
+        self._jitter = jitter
+        self.restart()
+
+    def __repr__(self):
+        return "{{AdaptiveBackoff: srtt {} rttvar {} rto {}}}".format(self._srtt, self._rttvar, self.initial())
+
+    @property
+    def maximum(self):
+        return self._maximum
+
+    @property
+    def srtt(self):
+        """The smoothed RTT, None before the first sample"""
+        return self._srtt
+
+    @property
+    def rttvar(self):
+        return self._rttvar
+
+    def restart(self):
+        self._srtt = None
+        self._rttvar = None
+
+    def sample(self, rtt):
+        if self._srtt is None:
+            self._srtt = rtt
+            self._rttvar = rtt / 2.0
+        else:
+            self._rttvar = 0.75 * self._rttvar + 0.25 * abs(self._srtt - rtt)
+            self._srtt = 0.875 * self._srtt + 0.125 * rtt
+
+    def initial(self):
+        if self._srtt is None:
+            rto = self._initial
+        else:
+            rto = self._srtt + max(self._granularity, 4 * self._rttvar)
+        return min(max(rto, self._minimum), self._maximum)
+
+    def increase(self, timeout, rng):
+        return min(timeout * 2, self._maximum)
+
+    def delay(self, timeout, rng):
+        if self._jitter > 0:
+            return timeout + rng.uniform(0, self._jitter)
+        return timeout
+
+
+class FixedBackoff(Backoff):
+    """Retries every interval plus uniform jitter up to jitter, without backing off"""
+
+    def __init__(self, interval=0.050, jitter=0.0):
+        """
+        :param interval: The timeout (seconds)
+        :param jitter: The largest additive jitter (seconds)
+        """
+        super(FixedBackoff, self).__init__()
+        if interval <= 0.0: raise ValueError("interval must be positive, got {}".format(interval))
+        self._interval = interval
+        self._jitter = jitter
+
+    def __repr__(self):
+        return "{{FixedBackoff: ({}, {})}}".format(self._interval, self._jitter)
+
+    @property
+    def maximum(self):
+        return self._interval
+
+    def initial(self):
+        return self._interval
+
+    def increase(self, timeout, rng):
+        return self._interval
+
+    def delay(self, timeout, rng):
+        if self._jitter > 0:
+            return timeout + rng.uniform(0, self._jitter)
+        return timeout
+
+
+Backoff.register(ExponentialBackoff)
+Backoff.register(DecorrelatedJitterBackoff)
+Backoff.register(AdaptiveBackoff)
+Backoff.register(FixedBackoff)
+
+
+class _ConvergenceNode(TimedNode):
+    """
+    A TimedNode that also records when its startup or reboot finished and when both nodes
+    became ready.  A node with a reboot (reboot_after, reboot_delay) reboots after the first
+    time both are ready, not after its own first (OK, OK), which may come while the peer is
+    still retrying.
+    """
+
+    def __init__(self, sim, name, channel, backoff, converged):
+        self.started = []
+        self.reboot = None
+        self._converged = converged
+        super(_ConvergenceNode, self).__init__(sim, name, channel, backoff=backoff)
+
+    def _reboot_finished_callback(self, data):
+        self.started.append(self._sim.now)
+        super(_ConvergenceNode, self)._reboot_finished_callback(data)
+
+    def _start_data_queue(self):
+        if self.peer.data_ready:
+            self._converged.append(self._sim.now)
+            for node in (self, self.peer):
+                if node.reboot is not None:
+                    node.reboot_after(*node.reboot)
+                    node.reboot = None
+        super(_ConvergenceNode, self)._start_data_queue()
+
+
+def measure(factory, loss_rate, delay_generator, seeds, reboot_at=5.0, reboot_delay=2.0, event_budget=100000):
+    """
+    Runs one trial per seed: two nodes start, converge to (OK, OK), then alice reboots.
+
+    :param factory: Called once per node to make its Backoff, e.g. the class
+    :param loss_rate: The loss rate of both channels
+    :param delay_generator: The Delay of both channels
+    :param seeds: The random.seed() of every trial
+    :param reboot_at: Alice reboots this long after both nodes first reach (OK, OK)
+    :param reboot_delay: How long the reboot takes
+    :param event_budget: Event budget of each trial
+    :return: A list with a (handshake, recovery, control messages) tuple per trial.  The
+             handshake time is from the later startup until both nodes are in (OK, OK), the
+             recovery time from the end of alice's reboot until they are again.  Both are
+             infinite if the trial did not get there.
+    """
+    results = []
+    for seed in seeds:
+        random.seed(seed)
+        sim = Simulator()
+        converged = []
+        alice = _ConvergenceNode(sim, "ALICE", Channel(sim, delay_generator, loss_rate), factory(), converged)
+        bob = _ConvergenceNode(sim, "BOB  ", Channel(sim, delay_generator, loss_rate), factory(), converged)
+        alice.set_peer(bob)
+        bob.set_peer(alice)
+        alice.reboot = (reboot_at, reboot_delay)
+        sim.run_count(event_budget)
+
+        handshake = recovery = float('inf')
+        if len(converged) > 0:
+            handshake = converged[0] - max(alice.start_time, bob.start_time)
+        if len(converged) > 1 and len(alice.started) > 1:
+            recovery = converged[1] - alice.started[1]
+        results.append((handshake, recovery, alice.control_sent + bob.control_sent))
+    return results
+
+
+def rank(policies, loss_rate, mean_delay, seeds, min_delay=0.000001, **kwargs):
+    """
+    Ranks Backoff policies by mean convergence time (handshake plus recovery), then by
+    control messages.  Every policy runs the same seeds.
+
+    :param policies: A list of (name, factory) pairs
+    :param loss_rate: The loss rate of both channels
+    :param mean_delay: The mean ExponentialDelay of both channels (seconds)
+    :param seeds: The trial seeds
+    :param kwargs: More measure() arguments
+    :return: A list of dicts with name, handshake, recovery, convergence, convergence_p99,
+             messages and failed (trials that did not converge twice), best first
+    """
+    rows = []
+    for name, factory in policies:
+        results = measure(factory, loss_rate, ExponentialDelay(min_delay, mean_delay), seeds, **kwargs)
+        finished = [r for r in results if not math.isinf(r[0]) and not math.isinf(r[1])]
+        row = {'name': name, 'failed': len(results) - len(finished)}
+        if len(finished) > 0:
+            convergence = sorted(r[0] + r[1] for r in finished)
+            row['handshake'] = sum(r[0] for r in finished) / len(finished)
+            row['recovery'] = sum(r[1] for r in finished) / len(finished)
+            row['convergence'] = sum(convergence) / len(finished)
+            row['convergence_p99'] = convergence[min(len(convergence) - 1, int(0.99 * len(convergence)))]
+        else:
+            row['handshake'] = row['recovery'] = row['convergence'] = row['convergence_p99'] = float('inf')
+        row['messages'] = sum(r[2] for r in results) / float(len(results))
+        rows.append(row)
+
+    rows.sort(key=lambda row: (row['failed'], row['convergence'], row['messages']))
+    return rows
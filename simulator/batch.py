@@ -0,0 +1,473 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import absolute_import
+import random
+import numpy
+from .node import Node
+from .delay import ExponentialDelay
+from .delay import UniformDelay
+from .compat import legacy_seed
+
+
+class BatchSimulator(object):
+    """
+    Vectorized engine that runs many independent two-node trials in lockstep.
+
+    Every trial has the same structure as the object engine: two Nodes (index 0 and 1),
+    each with an output Channel to the other, exchanging RESET and RESETACK messages.  The
+    per-trial state (STATE, N_LOCAL, N_REMOTE, timeouts, pending timers and the channel
+    queues) lives in NumPy arrays indexed by [trial, node].  Each step finds the next
+    event of every trial and executes all trials with the same kind of next event in one
+    masked operation, using the same transitions as Node.
+
+    Each trial draws its random numbers from its own random.Random(seed), in blocks, and
+    consumes them in the same order as the object engine.  A trial seeded with
+    the same seed as a Simulator/Channel/Node graph therefore follows the same trajectory.
+
+    Only the features used by the drivers are supported: one loss rate and delay model
+    shared by both channels and non-recurring reboots.
+
+    Example:
+        batch = BatchSimulator(seeds, ExponentialDelay(0.000001, 0.000020), 0.60)
+        batch.reboot_after(0, 10.0, 2.0)
+        batch.run_count(2000)
+        print(batch.data_ready.all(axis=1).sum())
+    """
+    # Event columns: timeout timers, reboot events, channel head-of-line timers
+    _EV_TIMER = 0
+    _EV_REBOOT = 2
+    _EV_CHANNEL = 4
+
+    _MSG_RESET = 0
+    _MSG_RESETACK = 1
+
+    # Pending reboot event kinds
+    _REBOOT_START = 0
+    _REBOOT_FINISHED = 1
+
+    # Number of random samples drawn per trial at a time
+    _BLOCK_SIZE = 64
+
+    def __init__(self, seeds, delay_generator, loss_rate):
+        """
+        :param seeds: One random.seed() value per trial
+        :param delay_generator: ExponentialDelay or UniformDelay shared by both channels
+        :param loss_rate: The channel loss rate (0.0 to 1.0)
+        """
+        if not isinstance(delay_generator, (ExponentialDelay, UniformDelay)):
+            raise TypeError("delay_generator must be ExponentialDelay or UniformDelay")
+        if not (0.0 <= loss_rate <= 1.0): raise ValueError("0.0 <= loss_rate <= 1.0")
+
+        self._seeds = list(seeds)
+        self._count = len(self._seeds)
+        self._delay = delay_generator
+        self._loss_rate = loss_rate
+        self._trials = numpy.arange(self._count)
+
+        n = self._count
+        self._generators = [random.Random(legacy_seed(seed)) for seed in self._seeds]
+        self._uniforms = numpy.empty((n, BatchSimulator._BLOCK_SIZE))
+        self._cursor = numpy.zeros(n, dtype=numpy.int64)
+        for i in range(n):
+            self._fill(i)
+
+        self._now = numpy.zeros(n)
+        self._event_count = numpy.zeros(n, dtype=numpy.int64)
+        self._done = numpy.zeros(n, dtype=bool)
+        self._error = numpy.zeros(n, dtype=bool)
+
+        # Node state, as per Node.State
+        self._state = numpy.full((n, 2), Node._STATE_REBOOT, dtype=numpy.int8)
+        self._n_local = numpy.zeros((n, 2), dtype=numpy.int64)
+        self._n_remote = numpy.zeros((n, 2), dtype=numpy.int64)
+        self._timeout = numpy.full((n, 2), Node.TIMEOUT_MIN)
+        self._ready = numpy.ones((n, 2), dtype=bool)
+
+        # Event times, numpy.inf when nothing is pending.  Columns as per _EV_*.
+        self._event_time = numpy.full((n, 6), numpy.inf)
+        self._reboot_kind = numpy.zeros((n, 2), dtype=numpy.int8)
+
+        self._use_reboot = numpy.zeros((n, 2), dtype=bool)
+        self._reboot_after = numpy.zeros((n, 2))
+        self._reboot_delay = numpy.zeros((n, 2))
+
+        # Channel output queues, appended at _queue_length and popped from the same end
+        # as Channel._queue_timer
+        self._queue_size = 4
+        self._queue_length = numpy.zeros((n, 2), dtype=numpy.int64)
+        self._queue_type = numpy.zeros((n, 2, self._queue_size), dtype=numpy.int8)
+        self._queue_reset = numpy.zeros((n, 2, self._queue_size), dtype=numpy.int64)
+        self._queue_ack = numpy.zeros((n, 2, self._queue_size), dtype=numpy.int64)
+
+        # stats
+        self._cnt_reset_sent = numpy.zeros((n, 2), dtype=numpy.int64)
+        self._cnt_resetack_sent = numpy.zeros((n, 2), dtype=numpy.int64)
+        self._cnt_resetack_recv = numpy.zeros((n, 2), dtype=numpy.int64)
+        self._cnt_reboots = numpy.zeros((n, 2), dtype=numpy.int64)
+
+        # Node.__init__: start each node at a random time between 1 and 2 seconds
+        for j in (0, 1):
+            self._event_time[:, BatchSimulator._EV_REBOOT + j] = self._draw_uniform(self._trials, 1, 2)
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def seeds(self):
+        return self._seeds
+
+    @property
+    def now(self):
+        """The time of the last event executed in each trial"""
+        return self._now
+
+    @property
+    def event_count(self):
+        return self._event_count
+
+    @property
+    def error(self):
+        """True for trials that hit a transition the object engine raises RuntimeError on"""
+        return self._error
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def n_local(self):
+        return self._n_local
+
+    @property
+    def n_remote(self):
+        return self._n_remote
+
+    @property
+    def data_ready(self):
+        """[trial, node] is True if the node is in (OK, OK)"""
+        return self._state == Node._STATE_OK_OK
+
+    def stats(self):
+        """Returns a dict of [trial, node] arrays with the counters of Node.State.stats()"""
+        return {'reset_sent': self._cnt_reset_sent,
+                'resetack_sent': self._cnt_resetack_sent,
+                'resetack_recv': self._cnt_resetack_recv,
+                'reboots': self._cnt_reboots}
+
+    def reboot_after(self, node, reboot_after, reboot_delay):
+        """
+        Same as Node.reboot_after() (non-recurring) for node 0 or 1 of every trial.  Must be called
+        before running.  The arguments may be scalars or per-trial arrays; a reboot_after <= 0
+        leaves that trial's node alone.
+
+        :param node: 0 or 1
+        :param reboot_after: The time after going in to (OK, OK) to reboot
+        :param reboot_delay: The time it takes to reboot
+        """
+        if node not in (0, 1): raise ValueError("node must be 0 or 1")
+        reboot_after = numpy.broadcast_to(numpy.asarray(reboot_after, dtype=float), (self._count,))
+        reboot_delay = numpy.broadcast_to(numpy.asarray(reboot_delay, dtype=float), (self._count,))
+
+        use = reboot_after > 0
+        self._use_reboot[use, node] = True
+        self._reboot_after[use, node] = reboot_after[use]
+        self._reboot_delay[use, node] = reboot_delay[use]
+
+    def run_count(self, stop_count):
+        """
+        Runs every trial for at most stop_count events, or until it has no more events.
+
+        :param stop_count: The number of events to run per trial
+        """
+        columns = numpy.arange(6)
+        while True:
+            active = ~self._done
+            if not active.any():
+                break
+
+            column = numpy.argmin(self._event_time, axis=1)
+            expiry = self._event_time[self._trials, column]
+
+            finished = active & (numpy.isinf(expiry) | (self._event_count >= stop_count))
+            self._done |= finished
+            active &= ~finished
+
+            for c in columns:
+                idx = numpy.nonzero(active & (column == c))[0]
+                if len(idx) == 0:
+                    continue
+
+                self._now[idx] = expiry[idx]
+                self._event_count[idx] += 1
+                self._event_time[idx, c] = numpy.inf
+
+                if c < BatchSimulator._EV_REBOOT:
+                    self._timeout_callback(idx, c - BatchSimulator._EV_TIMER)
+                elif c < BatchSimulator._EV_CHANNEL:
+                    self._reboot_callback(idx, c - BatchSimulator._EV_REBOOT)
+                else:
+                    self._queue_timer(idx, c - BatchSimulator._EV_CHANNEL)
+
+    #########################
+    # Random numbers
+
+    def _draw(self, idx):
+        """The next random.random() sample of each trial in idx"""
+        for i in idx[self._cursor[idx] >= BatchSimulator._BLOCK_SIZE]:
+            self._fill(i)
+
+        u = self._uniforms[idx, self._cursor[idx]]
+        self._cursor[idx] += 1
+        return u
+
+    def _fill(self, i):
+        generator = self._generators[i]
+        self._uniforms[i] = [generator.random() for k in range(BatchSimulator._BLOCK_SIZE)]
+        self._cursor[i] = 0
+
+    def _draw_uniform(self, idx, a, b):
+        """As random.uniform(a, b)"""
+        return a + (b - a) * self._draw(idx)
+
+    def _draw_delay(self, idx):
+        """As self._delay.next()"""
+        if isinstance(self._delay, ExponentialDelay):
+            # random.expovariate(1/beta)
+            return -numpy.log(1.0 - self._draw(idx)) / (1 / self._delay._beta) + self._delay._min
+        return self._draw_uniform(idx, self._delay._lower, self._delay._upper)
+
+    #########################
+    # Channel
+
+    def _send(self, idx, node, message_type):
+        """Node.send_reset() or Node._send_resetack() followed by Channel.send()"""
+        if len(idx) == 0:
+            return
+
+        if message_type == BatchSimulator._MSG_RESET:
+            self._cnt_reset_sent[idx, node] += 1
+        else:
+            self._cnt_resetack_sent[idx, node] += 1
+
+        if self._queue_length[idx, node].max() >= self._queue_size:
+            self._grow_queues()
+
+        position = self._queue_length[idx, node]
+        self._queue_type[idx, node, position] = message_type
+        self._queue_reset[idx, node, position] = self._n_local[idx, node]
+        self._queue_ack[idx, node, position] = self._n_remote[idx, node]
+        self._queue_length[idx, node] += 1
+
+        # enqueued first message, start a timer
+        first = idx[position == 0]
+        if len(first) > 0:
+            self._event_time[first, BatchSimulator._EV_CHANNEL + node] = self._now[first] + self._draw_delay(first)
+
+    def _grow_queues(self):
+        self._queue_size *= 2
+        self._queue_type = numpy.concatenate((self._queue_type, numpy.zeros_like(self._queue_type)), axis=2)
+        self._queue_reset = numpy.concatenate((self._queue_reset, numpy.zeros_like(self._queue_reset)), axis=2)
+        self._queue_ack = numpy.concatenate((self._queue_ack, numpy.zeros_like(self._queue_ack)), axis=2)
+
+    def _clear_channel(self, idx, node):
+        self._queue_length[idx, node] = 0
+        self._event_time[idx, BatchSimulator._EV_CHANNEL + node] = numpy.inf
+
+    def _queue_timer(self, idx, node):
+        """Channel._queue_timer() for the channel owned by node, delivering to its peer"""
+        position = self._queue_length[idx, node] - 1
+        message_type = self._queue_type[idx, node, position]
+        reset_number = self._queue_reset[idx, node, position]
+        ack_number = self._queue_ack[idx, node, position]
+        self._queue_length[idx, node] = position
+
+        # Channel._send_with_loss()
+        delivered = (self._draw(idx) < (1.0 - self._loss_rate)) & self._ready[idx, 1 - node]
+
+        reset = delivered & (message_type == BatchSimulator._MSG_RESET)
+        self._receive_reset(idx[reset], 1 - node, reset_number[reset])
+
+        resetack = delivered & (message_type == BatchSimulator._MSG_RESETACK)
+        self._receive_resetack(idx[resetack], 1 - node, reset_number[resetack], ack_number[resetack])
+
+        more = idx[self._queue_length[idx, node] > 0]
+        if len(more) > 0:
+            self._event_time[more, BatchSimulator._EV_CHANNEL + node] = self._now[more] + self._draw_delay(more)
+
+    #########################
+    # Node
+
+    def _start_timer(self, idx, node):
+        if len(idx) == 0:
+            return
+        delay = self._timeout[idx, node] + self._draw_uniform(idx, 0, Node.TIMEOUT_JITTER)
+        self._event_time[idx, BatchSimulator._EV_TIMER + node] = self._now[idx] + delay
+
+    def _cancel_timer(self, idx, node):
+        self._event_time[idx, BatchSimulator._EV_TIMER + node] = numpy.inf
+
+    def _increase_timeout(self, idx, node):
+        """Exponential backoff of timeout"""
+        timeout = self._timeout[idx, node]
+        self._timeout[idx, node] = numpy.where(timeout < Node.TIMEOUT_MAX,
+                                               numpy.minimum(timeout * 2, Node.TIMEOUT_MAX), timeout)
+
+    def _schedule_reboot(self, idx, node):
+        idx = idx[self._use_reboot[idx, node]]
+        self._event_time[idx, BatchSimulator._EV_REBOOT + node] = self._now[idx] + self._reboot_after[idx, node]
+        self._reboot_kind[idx, node] = BatchSimulator._REBOOT_START
+        # only do it once
+        self._use_reboot[idx, node] = False
+
+    def _fail(self, idx):
+        self._error[idx] = True
+        self._done[idx] = True
+
+    def _reboot_callback(self, idx, node):
+        kind = self._reboot_kind[idx, node]
+        start = idx[kind == BatchSimulator._REBOOT_START]
+        finished = idx[kind == BatchSimulator._REBOOT_FINISHED]
+
+        if len(start) > 0:
+            # Node._reboot_start_callback()
+            self._ready[start, node] = False
+            self._clear_channel(start, node)
+            self._cancel_timer(start, node)
+            self._event_time[start, BatchSimulator._EV_REBOOT + node] = self._now[start] + self._reboot_delay[start, node]
+            self._reboot_kind[start, node] = BatchSimulator._REBOOT_FINISHED
+
+        if len(finished) > 0:
+            # Node._reboot_finished_callback(), State.set_initial_state() and Node._master_start()
+            self._n_remote[finished, node] = 0
+            self._cnt_reboots[finished, node] += 1
+            self._ready[finished, node] = True
+
+            self._state[finished, node] = Node._STATE_INIT_INIT
+            self._n_local[finished, node] = 1 + (self._draw(finished) * 0xFFFF).astype(numpy.int64)
+            self._timeout[finished, node] = Node.TIMEOUT_MIN
+
+            self._send(finished, node, BatchSimulator._MSG_RESET)
+            self._start_timer(finished, node)
+            self._state[finished, node] = Node._STATE_SYNC_INIT
+
+    def _timeout_callback(self, idx, node):
+        state = self._state[idx, node]
+        retry = (state == Node._STATE_SYNC_OK) | (state == Node._STATE_SYNC_INIT)
+        self._fail(idx[~retry])
+
+        idx = idx[retry]
+        self._increase_timeout(idx, node)
+        self._send(idx, node, BatchSimulator._MSG_RESET)
+        self._start_timer(idx, node)
+
+    def _receive_reset(self, idx, node, reset_number):
+        if len(idx) == 0:
+            return
+
+        state = self._state[idx, node]
+        prior_data_ready = state == Node._STATE_OK_OK
+
+        # Drop in REBOOT, every other state records the reset number and ACKs it
+        accept = state != Node._STATE_REBOOT
+        changed = accept & (reset_number != self._n_remote[idx, node])
+        restart = (state == Node._STATE_INIT_INIT) | (changed & ((state == Node._STATE_SYNC_OK) |
+                                                                 (state == Node._STATE_OK_OK)))
+
+        self._cancel_timer(idx[changed & (state == Node._STATE_SYNC_OK)], node)
+        self._n_remote[idx[accept], node] = reset_number[accept]
+        self._send(idx[accept], node, BatchSimulator._MSG_RESETACK)
+        self._send(idx[restart], node, BatchSimulator._MSG_RESET)
+        self._start_timer(idx[restart], node)
+
+        self._state[idx[restart], node] = Node._STATE_SYNC_OK
+        self._state[idx[state == Node._STATE_SYNC_INIT], node] = Node._STATE_SYNC_OK
+        self._state[idx[state == Node._STATE_OK_INIT], node] = Node._STATE_OK_OK
+
+        self._schedule_reboot(idx[~prior_data_ready & (self._state[idx, node] == Node._STATE_OK_OK)], node)
+
+    def _receive_resetack(self, idx, node, reset_number, ack_number):
+        if len(idx) == 0:
+            return
+
+        self._cnt_resetack_recv[idx, node] += 1
+        state = self._state[idx, node]
+        prior_data_ready = state == Node._STATE_OK_OK
+
+        self._fail(idx[(state == Node._STATE_INIT_INIT) | (state == Node._STATE_INIT_OK)])
+
+        acked = (ack_number == self._n_local[idx, node]) & ((state == Node._STATE_SYNC_OK) |
+                                                           (state == Node._STATE_SYNC_INIT))
+        sync_ok = acked & (state == Node._STATE_SYNC_OK)
+        sync_init = acked & (state == Node._STATE_SYNC_INIT)
+        matched = sync_ok & (reset_number == self._n_remote[idx, node])
+        restart = sync_ok & ~matched
+
+        self._cancel_timer(idx[acked], node)
+        self._timeout[idx[acked], node] = Node.TIMEOUT_MIN
+
+        # (Sync, OK) with a new reset number from the peer
+        self._n_remote[idx[restart], node] = reset_number[restart]
+        self._send(idx[restart], node, BatchSimulator._MSG_RESETACK)
+        self._send(idx[restart], node, BatchSimulator._MSG_RESET)
+        self._start_timer(idx[restart], node)
+
+        # (Sync, Init) goes through (OK, Init) to (OK, OK)
+        self._n_remote[idx[sync_init], node] = reset_number[sync_init]
+        self._send(idx[sync_init], node, BatchSimulator._MSG_RESETACK)
+
+        self._state[idx[matched | sync_init], node] = Node._STATE_OK_OK
+
+        self._schedule_reboot(idx[~prior_data_ready & (self._state[idx, node] == Node._STATE_OK_OK)], node)
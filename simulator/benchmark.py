@@ -0,0 +1,257 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import absolute_import
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+from .simulator import Simulator
+from .node import Node
+from .delay import ExponentialDelay
+from .channel import Channel
+from .profiler import Profiler
+from .compat import legacy_seed
+from .compat import random_bytes
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+class Scenario(object):
+    """
+    A fixed-seed workload: trials of two nodes over lossy channels, with the nodes
+    rebooting at the given times.  The trials cycle through reboot_at.  With ticks, the
+    Simulator uses its integer nanosecond clock.
+    """
+    def __init__(self, name, trials, seed, loss_rate=0.60, reboot_at=((0.0, 0.0),), event_budget=2000,
+                 min_delay=0.000001, mean_delay=0.000020, ticks=False):
+        self.name = name
+        self.trials = trials
+        self.seed = seed
+        self.loss_rate = loss_rate
+        self.reboot_at = reboot_at
+        self.event_budget = event_budget
+        self.min_delay = min_delay
+        self.mean_delay = mean_delay
+        self.ticks = ticks
+
+    def __repr__(self):
+        return "{{Scenario: {} trials {} seed {} loss {}}}".format(self.name, self.trials, self.seed, self.loss_rate)
+
+    def seeds(self):
+        """The random.seed() of every trial"""
+        generator = random.Random(legacy_seed(self.seed))
+        return [random_bytes(generator, 4) for trial in range(self.trials)]
+
+    def setup(self, trial):
+        """Builds the simulator of a trial, after random has been seeded"""
+        sim = Simulator(ticks=self.ticks)
+        delay_generator = ExponentialDelay(self.min_delay, self.mean_delay)
+        alice = Node(sim, "ALICE", Channel(sim, delay_generator, self.loss_rate))
+        bob = Node(sim, "BOB  ", Channel(sim, delay_generator, self.loss_rate))
+        alice.set_peer(bob)
+        bob.set_peer(alice)
+
+        alice_reboot_at, bob_reboot_at = self.reboot_at[trial % len(self.reboot_at)]
+        if alice_reboot_at > 0:
+            alice.reboot_after(alice_reboot_at, 2.0)
+        if bob_reboot_at > 0:
+            bob.reboot_after(bob_reboot_at, 2.0)
+        return sim
+
+
+SCENARIOS = [
+    Scenario("handshake", 1000, 1, event_budget=1000),
+    Scenario("reboot_single", 500, 2, reboot_at=((10.0, 0.0),)),
+    Scenario("reboot_double", 500, 3, reboot_at=((10.0, 10.1),)),
+    Scenario("retry_storm", 50, 4, loss_rate=0.95, reboot_at=((10.0, 10.1),), event_budget=5000),
+    Scenario("sweep", 3000, 5, reboot_at=((10.0, 0.0), (0.0, 10.0), (10.0, 10.1))),
+    Scenario("sweep_ticks", 3000, 5, reboot_at=((10.0, 0.0), (0.0, 10.0), (10.0, 10.1)), ticks=True),
+]
+
+
+def scenario(name):
+    for s in SCENARIOS:
+        if s.name == name:
+            return s
+    raise KeyError("No scenario named {}".format(name))
+
+
+# Each metric and whether a higher value is better
+METRICS = [("events_per_sec", True),
+           ("setup_us", False),
+           ("peak_rss_kb", False),
+           ("traced_peak_kb", False),
+           ("heap_max", False)]
+
+
+def run_scenario(s, repeat=3):
+    """
+    Runs a scenario repeat times and keeps the fastest run, then once more with a
+    Profiler (heap high-water mark) and tracemalloc (peak traced memory, if available).
+
+    Run it in a fresh process for a meaningful peak_rss_kb, which is the process maximum.
+
+    :return: dict of the METRICS plus the event and trial counts
+    """
+    seeds = s.seeds()
+    best_run = best_setup = None
+    events = None
+
+    for r in range(repeat):
+        gc.collect()
+        setup_time = run_time = 0.0
+        count = 0
+        for trial, seed in enumerate(seeds):
+            random.seed(legacy_seed(seed))
+            start = timeit.default_timer()
+            sim = s.setup(trial)
+            started = timeit.default_timer()
+            sim.run_count(s.event_budget)
+            run_time += timeit.default_timer() - started
+            setup_time += started - start
+            count += sim.event_count
+
+        if events is not None and events != count:
+            raise RuntimeError("Scenario {} is not deterministic ({} then {} events)".format(s.name, events, count))
+        events = count
+        best_run = run_time if best_run is None else min(best_run, run_time)
+        best_setup = setup_time if best_setup is None else min(best_setup, setup_time)
+
+    profiler = Profiler(heap_sample_interval=1 << 20)
+    if tracemalloc is not None:
+        tracemalloc.start()
+    for trial, seed in enumerate(seeds):
+        random.seed(legacy_seed(seed))
+        sim = s.setup(trial)
+        sim.set_profiler(profiler)
+        sim.run_count(s.event_budget)
+    traced_peak_kb = None
+    if tracemalloc is not None:
+        traced_peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+
+    return {"trials": s.trials,
+            "events": events,
+            "events_per_sec": events / best_run if best_run > 0 else 0.0,
+            "setup_us": 1e6 * best_setup / s.trials,
+            "peak_rss_kb": peak_rss_kb(),
+            "traced_peak_kb": traced_peak_kb,
+            "heap_max": profiler.heap_max}
+
+
+def peak_rss_kb():
+    """The largest resident set size of this process so far, or None"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def environment():
+    return {"python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "system": platform.system()}
+
+
+def save(path, results):
+    """Writes a dict of scenario name to run_scenario() results as a JSON baseline"""
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "scenarios": results}, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    """Reads a baseline written by save(), returns the dict of scenario results"""
+    with open(path) as f:
+        return json.load(f)["scenarios"]
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Compares two dicts of scenario results.  A metric regresses when it is worse than
+    the baseline by more than threshold (a fraction).  A different event count means
+    the simulated behavior changed, so the other metrics are not comparable.
+
+    :return: list of (scenario name, metric, baseline value, current value) regressions
+    """
+    regressions = []
+    for name in sorted(current):
+        if name not in baseline:
+            continue
+        old, new = baseline[name], current[name]
+        if old["events"] != new["events"]:
+            regressions.append((name, "events", old["events"], new["events"]))
+            continue
+
+        for metric, higher_is_better in METRICS:
+            before, after = old.get(metric), new.get(metric)
+            if before is None or after is None or before == 0:
+                continue
+            change = (after - before) / float(before)
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append((name, metric, before, after))
+    return regressions
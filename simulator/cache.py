@@ -0,0 +1,222 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import absolute_import
+import binascii
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+def code_version(sources=None, driver=None):
+    """
+    Hash of the source files of the simulator that trials depend on.  By default every
+    module of the package counts, so any change invalidates cached results: a hand-picked
+    list silently misses modules that trials come to depend on (e.g. monitor.py).
+
+    :param sources: File names in the simulator/ directory, defaults to all of its *.py
+    :param driver: The path of the script that defines the trial (e.g. sim_reboot.py), or None
+    :return: hex string
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    if sources is None:
+        sources = [os.path.basename(path) for path in glob.glob(os.path.join(directory, "*.py"))]
+    paths = [(name, os.path.join(directory, name)) for name in sorted(sources)]
+    if driver is not None:
+        # a module's __file__ may be its compiled file
+        if driver.endswith((".pyc", ".pyo")):
+            driver = driver[:-1]
+        paths.append((os.path.basename(driver), driver))
+
+    digest = hashlib.sha256()
+    for name, path in paths:
+        with open(path, "rb") as f:
+            digest.update(name.encode("utf-8"))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ResultCache(object):
+    """
+    On-disk memoization of trial results, keyed by a hash of the code version, the full
+    parameter set of the trial and its seed.  A protocol change in node.py changes the
+    code version, so it misses on every entry of the old code; entries stay until they
+    are evicted.
+
+    Entries live in a SQLite database.  When the stored results exceed max_bytes the
+    least recently used entries are evicted.  Writes (including the recency updates of
+    hits) are committed every commit_every operations and by flush() or close().
+
+    Example:
+        cache = ResultCache("results.db")
+        result = cache.get(parameters, seed)
+        if result is None:
+            result = run(parameters, seed)
+            cache.put(parameters, seed, result)
+        cache.close()
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, sources=None, driver=None, commit_every=1000, timeout=60):
+        """
+        :param path: The database file, created if it does not exist
+        :param max_bytes: The most bytes of results to keep
+        :param sources: Files of simulator/ for the code version, defaults to all of its *.py
+        :param driver: The script that defines the trials, also part of the code version
+        :param commit_every: Commit after this many writes
+        :param timeout: Seconds to wait for another process writing to the database
+        """
+        if max_bytes <= 0: raise ValueError("max_bytes must be positive")
+
+        self._db = sqlite3.connect(path, timeout=timeout)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+        self._max_bytes = max_bytes
+        self._code_version = code_version(sources, driver)
+        self._commit_every = commit_every
+        self._writes = 0
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+        # stats
+        self.cnt_hits = 0
+        self.cnt_misses = 0
+        self.cnt_evictions = 0
+
+    def __repr__(self):
+        return "{{ResultCache: code {} size {} hits {} misses {} evictions {}}}".format(
+            self._code_version[:12], self._size, self.cnt_hits, self.cnt_misses, self.cnt_evictions)
+
+    @property
+    def code_version(self):
+        return self._code_version
+
+    @property
+    def size(self):
+        """The bytes of results stored"""
+        return self._size
+
+    def key(self, parameters, seed):
+        """
+        :param parameters: dict of every parameter of the trial (JSON serializable)
+        :param seed: The random.seed() byte string
+        :return: hex string
+        """
+        digest = hashlib.sha256()
+        digest.update(self._code_version.encode("utf-8"))
+        digest.update(json.dumps(parameters, sort_keys=True).encode("utf-8"))
+        digest.update(binascii.hexlify(seed))
+        return digest.hexdigest()
+
+    def get(self, parameters, seed):
+        """Returns the cached result, or None"""
+        key = self.key(parameters, seed)
+        row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.cnt_misses += 1
+            return None
+
+        self.cnt_hits += 1
+        self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._wrote()
+        return json.loads(row[0])
+
+    def put(self, parameters, seed, result):
+        """Stores a JSON serializable result, evicting old entries if needed"""
+        key = self.key(parameters, seed)
+        value = json.dumps(result)
+
+        old = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        if old is not None:
+            self._size -= old[0]
+        self._db.execute("INSERT OR REPLACE INTO results (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                         (key, value, len(value), time.time()))
+        self._size += len(value)
+
+        if self._size > self._max_bytes:
+            self._evict()
+        self._wrote()
+
+    def flush(self):
+        self._db.commit()
+        self._writes = 0
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes >= self._commit_every:
+            self.flush()
+
+    def _evict(self):
+        """Removes least recently used entries until at most 90% of max_bytes is used"""
+        target = 0.9 * self._max_bytes
+        rows = self._db.execute("SELECT key, size FROM results ORDER BY last_used")
+        evicted = []
+        for key, size in rows:
+            if self._size <= target:
+                break
+            evicted.append((key,))
+            self._size -= size
+
+        self._db.executemany("DELETE FROM results WHERE key = ?", evicted)
+        self.cnt_evictions += len(evicted)
@@ -0,0 +1,340 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# A linear chain of links, each running the reset protocol and begin-end fragmentation on
+# its own, with forwarding nodes that reassemble packets and fragment them again
+
+from __future__ import absolute_import
+import collections
+from .event import Event
+from .node import Node
+from .channel import SendTimeChannel
+from .delay import ExponentialDelay
+from .loss import BernoulliLoss
+from .message import Fragment
+from .failure import RunningStats
+from .parallel import stream
+
+
+Packet = collections.namedtuple("Packet", ["packet_id", "created", "length"])
+
+
+class LinkNode(Node):
+    """A Node on one link of a chain, which passes the data fragments it accepts to on_fragment(message)"""
+
+    def __init__(self, sim, name, channel, rng=None, on_fragment=None):
+        super(LinkNode, self).__init__(sim, name, channel, rng)
+        self.on_fragment = on_fragment
+
+    def _receive_data_ok(self, message):
+        super(LinkNode, self)._receive_data_ok(message)
+        if self.on_fragment is not None:
+            self.on_fragment(message)
+
+
+class Reassembler(object):
+    """
+    Begin-end reassembly on one link: a packet is the fragments from a FLAG_B fragment
+    to a FLAG_E fragment with consecutive FSNs.  A gap (a lost fragment, or a reset of the
+    FSN) drops the packet being reassembled.
+    """
+
+    def __init__(self, on_packet):
+        """
+        :param on_packet: Called with each reassembled Packet
+        """
+        self._on_packet = on_packet
+        self.reset()
+        self.cnt_packets = 0
+        self.cnt_dropped = 0
+
+    def reset(self):
+        """Drops the packet being reassembled, e.g. on a reboot"""
+        self._packet = None
+        self._next_fsn = None
+
+    def receive(self, message):
+        if message.is_begin:
+            if self._packet is not None:
+                self.cnt_dropped += 1
+            self._packet = message.frag_data
+        elif self._packet is None:
+            # the rest of a packet whose beginning we missed
+            return
+        elif message.fragment_id != self._next_fsn or message.frag_data is not self._packet:
+            self.cnt_dropped += 1
+            self._packet = None
+            return
+
+        if message.is_end:
+            packet = self._packet
+            self._packet = None
+            self.cnt_packets += 1
+            self._on_packet(packet)
+        else:
+            self._next_fsn = message.fragment_id + 1
+
+
+def fragment(node, packet, mtu):
+    """
+    Sends a packet on node's link as fragments of at most mtu bytes
+
+    :return: True if all the fragments were sent, False if the link is not in (OK, OK)
+    """
+    offset = 0
+    while True:
+        length = min(mtu, packet.length - offset)
+        flags = (Fragment.FLAG_B if offset == 0 else 0) | (Fragment.FLAG_E if offset + length >= packet.length else 0)
+        if not node.send_fragment(flags, length, packet):
+            return False
+        offset += length
+        if flags & Fragment.FLAG_E:
+            return True
+
+
+class ForwardingNode(object):
+    """
+    A hop in the middle of a chain: packets reassembled from the ingress link are
+    fragmented again onto the egress link, whose MTU may differ.  A packet is dropped if
+    the egress link is not in (OK, OK).  A reboot takes down both link nodes and the
+    packet being reassembled.
+    """
+
+    def __init__(self, name, ingress, egress, egress_mtu):
+        """
+        :param name: The node name
+        :param ingress: The LinkNode towards the source
+        :param egress: The LinkNode towards the sink
+        :param egress_mtu: The largest fragment on the egress link (bytes)
+        """
+        self.name = name
+        self.ingress = ingress
+        self.egress = egress
+        self.egress_mtu = egress_mtu
+        self.reassembler = Reassembler(self._forward)
+        ingress.on_fragment = self.reassembler.receive
+        self.cnt_forwarded = 0
+        self.cnt_not_ready = 0
+
+    def __repr__(self):
+        return "{{ForwardingNode: {} forwarded {} not ready {} reassembly drops {}}}".format(
+            self.name, self.cnt_forwarded, self.cnt_not_ready, self.reassembler.cnt_dropped)
+
+    def reboot_now(self, reboot_delay):
+        """Reboots both link nodes, returns False if already rebooting"""
+        if not (self.ingress.is_ready and self.egress.is_ready):
+            return False
+        self.ingress.reboot_now(reboot_delay)
+        self.egress.reboot_now(reboot_delay)
+        self.reassembler.reset()
+        return True
+
+    def _forward(self, packet):
+        if fragment(self.egress, packet, self.egress_mtu):
+            self.cnt_forwarded += 1
+        else:
+            self.cnt_not_ready += 1
+
+
+class Chain(object):
+    """
+    A source, hops - 1 forwarding nodes and a sink in a line.  Each link has a LinkNode at
+    both ends, over SendTimeChannels (in order, so fragments of a packet stay in sequence)
+    with their own random streams.  The source sends packets at a constant rate and the
+    sink measures the end-to-end latency, the delivered fraction and the recovery time
+    after a reboot.  The objects and events grow linearly with the number of hops.
+
+    Example:
+        chain = Chain(sim, 8, seed=1, loss_rate=0.01)
+        chain.start(rate=1000.0, packet_length=4000)
+        chain.reboot_at(5.0, 4, 2.0)
+        sim.run_until(15.0)
+        print(chain.results())
+    """
+
+    def __init__(self, sim, hops, seed=0, loss_rate=0.0, min_delay=0.000001, mean_delay=0.000020, mtu=1500,
+                 synchronized=True):
+        """
+        :param sim: The Simulator
+        :param hops: The number of links
+        :param seed: The seed of the component streams
+        :param loss_rate: The loss rate of every link
+        :param min_delay: The minimum delay of every link
+        :param mean_delay: The mean exponential delay of every link
+        :param mtu: The largest fragment, for every link or a list of one per link (bytes)
+        :param synchronized: If True the links start in (OK, OK) (Node.start_synchronized()),
+                             else they run the initial handshake
+        """
+        if hops < 1: raise ValueError("Need at least one hop")
+        mtus = list(mtu) if isinstance(mtu, (list, tuple)) else [mtu] * hops
+        if len(mtus) != hops: raise ValueError("Need one mtu per hop")
+
+        self._sim = sim
+        self._mtus = mtus
+        self._links = []
+        for i in range(hops):
+            nodes = []
+            for end, other in ((i, i + 1), (i + 1, i)):
+                name = "{}>{}".format(Chain._node_name(end, hops), Chain._node_name(other, hops))
+                delay = ExponentialDelay(min_delay, mean_delay, stream(seed, name, "delay"))
+                loss = BernoulliLoss(loss_rate, stream(seed, name, "loss"))
+                nodes.append(LinkNode(sim, name, SendTimeChannel(sim, delay, loss), stream(seed, name, "node")))
+            nodes[0].set_peer(nodes[1])
+            nodes[1].set_peer(nodes[0])
+            if synchronized:
+                nodes[0].start_synchronized(nodes[1])
+            self._links.append(nodes)
+
+        self.forwarders = [ForwardingNode(Chain._node_name(i, hops), self._links[i - 1][1], self._links[i][0], mtus[i])
+                           for i in range(1, hops)]
+        self._source = self._links[0][0]
+        self._sink = Reassembler(self._deliver)
+        self._links[-1][1].on_fragment = self._sink.receive
+
+        self._interval = None
+        self._packet_length = None
+        self._event = None
+        self._packet_id = 0
+        self._reboot_time = None
+
+        # stats
+        self.cnt_sent = 0
+        self.cnt_not_ready = 0
+        self.cnt_delivered = 0
+        self.latency = RunningStats()
+        self.recovery_time = None
+
+    def __repr__(self):
+        return "{{Chain: hops {} sent {} delivered {}}}".format(len(self._links), self.cnt_sent, self.cnt_delivered)
+
+    @staticmethod
+    def _node_name(index, hops):
+        if index == 0:
+            return "S"
+        if index == hops:
+            return "D"
+        return "F{}".format(index)
+
+    @property
+    def hops(self):
+        return len(self._links)
+
+    @property
+    def links(self):
+        """The [near, far] LinkNodes of each link, from the source"""
+        return self._links
+
+    def start(self, rate, packet_length):
+        """
+        Sends packets of packet_length bytes from the source, rate per second
+
+        :param rate: Packets per second
+        :param packet_length: Bytes per packet
+        :return:
+        """
+        if self._event is not None: raise RuntimeError("Chain already started")
+        self._interval = 1.0 / rate
+        self._packet_length = packet_length
+        self._schedule(self._interval, self._send)
+
+    def stop(self):
+        if self._event is not None:
+            self._event.set_inactive()
+            self._event = None
+
+    def reboot_at(self, time, index, reboot_delay):
+        """
+        Reboots forwarding node index (1 to hops - 1) at time.  recovery_time is then the
+        time from the reboot to the delivery of the first packet sent after it.
+        """
+        forwarder = self.forwarders[index - 1]
+        self._sim.schedule(Event(time - self._sim.now, self._reboot_callback, (forwarder, reboot_delay)))
+
+    def results(self):
+        """dict of the end-to-end measurements"""
+        return {"hops": self.hops,
+                "sent": self.cnt_sent,
+                "source_not_ready": self.cnt_not_ready,
+                "delivered": self.cnt_delivered,
+                "delivery_ratio": self.cnt_delivered / float(self.cnt_sent) if self.cnt_sent > 0 else 0.0,
+                "latency_mean": self.latency.mean,
+                "latency_max": self.latency.maximum,
+                "recovery_time": self.recovery_time,
+                "forwarder_not_ready": sum(f.cnt_not_ready for f in self.forwarders),
+                "reassembly_drops": sum(f.reassembler.cnt_dropped for f in self.forwarders) + self._sink.cnt_dropped}
+
+    def _schedule(self, delay, callback):
+        self._event = Event(delay, callback, None)
+        self._sim.schedule(self._event)
+
+    def _send(self, data):
+        self._packet_id += 1
+        packet = Packet(self._packet_id, self._sim.now, self._packet_length)
+        self.cnt_sent += 1
+        if not fragment(self._source, packet, self._mtus[0]):
+            self.cnt_not_ready += 1
+        self._schedule(self._interval, self._send)
+
+    def _reboot_callback(self, data):
+        forwarder, reboot_delay = data
+        if forwarder.reboot_now(reboot_delay):
+            self._reboot_time = self._sim.now
+            self.recovery_time = None
+
+    def _deliver(self, packet):
+        now = self._sim.now
+        self.cnt_delivered += 1
+        self.latency.add(now - packet.created)
+        if self._reboot_time is not None and self.recovery_time is None and packet.created >= self._reboot_time:
+            self.recovery_time = now - self._reboot_time
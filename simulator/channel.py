@@ -52,33 +52,51 @@
 # intellectual property used by its contributions to this software. You may
 # contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
 
-from delay import Delay
-from simulator import Simulator
-from event import Event
-import random
+from __future__ import absolute_import, print_function
+from .delay import Delay
+from .loss import Loss
+from .loss import BernoulliLoss
+from .simulator import Simulator
+from .event import Event
 import collections
 
 
 class Channel(object):
     """
      Represents a nodes output queue.  Messages will be sent in FIFO order with a random delay
-     drawn from a delay function and a given drop rate (drops happen after the delay).
+     drawn from a delay function and a given drop rate or Loss model (drops happen after the delay).
 
-     The output queue will have at most 1 timer running for the head-of-line message.
+     The output queue will have at most 1 timer running for the head-of-line message.  When that
+     timer fires the channel delivers the most recently queued message (last-in first-out); this
+     is kept so earlier seeds reproduce, SendTimeChannel delivers in FIFO order.
     """
     VERBOSE = False
 
     def __init__(self, sim, delay_generator, loss_rate):
+        """
+        :param sim: The Simulator
+        :param delay_generator: The Delay of each message
+        :param loss_rate: The loss rate (0.0 to 1.0) of independent losses, or a Loss
+        """
         if not isinstance(sim, Simulator): raise TypeError("sim must be Simulator")
         if not isinstance(delay_generator, Delay): raise TypeError("delay_generator must be Delay")
-        if not (0.0 <= loss_rate <= 1.0): raise ValueError("0.0 <= loss_rate <= 1.0")
+
+        if isinstance(loss_rate, Loss):
+            loss = loss_rate
+        else:
+            loss = BernoulliLoss(loss_rate)
 
         self._sim = sim
         self._delay = delay_generator
-        self._loss_rate = loss_rate
+        self._loss = loss
         self._queue = collections.deque()
         self._pending_event = None
 
+    @property
+    def loss(self):
+        """The Loss model of the channel"""
+        return self._loss
+
     def send(self, peer, message):
         """
         Sends the message to the peer.  Will call peer.receive(message).
@@ -94,6 +112,17 @@ class Channel(object):
             # enqueued first message, start a timer
             self._set_timer()
 
+    def reset(self):
+        """
+        Returns to the state after construction, for reusing the channel in another trial.
+        Call it after Simulator.reset(), which drops the pending events.
+        :return:
+        """
+        self._queue.clear()
+        self._pending_event = None
+        self._delay.reset()
+        self._loss.reset()
+
     def clear(self):
         """
         Clear the output queue
@@ -104,10 +133,16 @@ class Channel(object):
             self._pending_event.set_inactive()
             self._pending_event = None
 
+    def _head_of_line(self):
+        """The (peer, message) the next timer will deliver, or None"""
+        if len(self._queue) == 0:
+            return None
+        return self._queue[-1]
+
     def _set_timer(self):
         delay = self._delay.next()
         if Channel.VERBOSE:
-            print "{:>12.9f} CHANNEL start timer delay {}".format(self._sim.now, delay)
+            print("{:>12.9f} CHANNEL start timer delay {}".format(self._sim.now, delay))
 
         event = Event(delay, self._queue_timer, None)
         self._pending_event = event
@@ -123,9 +158,96 @@ class Channel(object):
             self._set_timer()
 
     def _send_with_loss(self, peer, message):
-        r = random.random()
-        if r < (1.0 - self._loss_rate):
+        if not self._loss.is_lost(self._sim.now):
             peer.receive(message)
         else:
             if Channel.VERBOSE:
-                print "{:>12.9f} CHANNEL message dropped to peer {} message {}".format(self._sim.now, peer, message)
+                print("{:>12.9f} CHANNEL message dropped to peer {} message {}".format(self._sim.now, peer, message))
+
+
+class SendTimeChannel(Channel):
+    """
+    A Channel that decides the loss and delivery time of each message when it is sent.
+
+    Messages are served in FIFO order with the same queueing as Channel: a message's delay
+    starts when the message ahead of it is delivered (or dropped).  A lost message still
+    takes its turn but never creates an event, and messages that arrive at the same time
+    share one delivery event.  Loss models see the send time, so channels that share one
+    Loss query it in time order.
+    """
+
+    def __init__(self, sim, delay_generator, loss_rate):
+        super(SendTimeChannel, self).__init__(sim, delay_generator, loss_rate)
+
+        # (delivery time, peer, message) of surviving messages, oldest first
+        self._in_flight = collections.deque()
+        # one Event per distinct delivery time in _in_flight
+        self._events = collections.deque()
+        # the time the last message sent leaves the queue
+        self._busy_until = 0.0
+
+    def send(self, peer, message):
+        """
+        Sends the message to the peer.  Will call peer.receive(message) at the delivery time,
+        unless the message is lost.
+
+        :param peer:
+        :param message:
+        :return:
+        """
+        if peer is None: raise RuntimeError("peer cannot be None")
+
+        now = self._sim.now
+        delivery_time = max(now, self._busy_until) + self._delay.next()
+        self._busy_until = delivery_time
+
+        if self._loss.is_lost(now):
+            if Channel.VERBOSE:
+                print("{:>12.9f} CHANNEL message will be dropped at {:>12.9f} to peer {} message {}".format(
+                    now, delivery_time, peer, message))
+            return
+
+        self._schedule_delivery(now, delivery_time, peer, message)
+
+    def _schedule_delivery(self, now, delivery_time, peer, message):
+        """Delivers a message that is not lost at delivery_time"""
+        same_time = len(self._in_flight) > 0 and self._in_flight[-1][0] == delivery_time
+        self._in_flight.append((delivery_time, peer, message))
+        if same_time:
+            return
+
+        if Channel.VERBOSE:
+            print("{:>12.9f} CHANNEL schedule delivery at {:>12.9f}".format(now, delivery_time))
+
+        event = Event(delivery_time - now, self._delivery_timer, delivery_time)
+        self._events.append(event)
+        self._sim.schedule(event)
+
+    def reset(self):
+        super(SendTimeChannel, self).reset()
+        self._in_flight.clear()
+        self._events.clear()
+        self._busy_until = 0.0
+
+    def clear(self):
+        """
+        Clear the output queue and cancel all deliveries
+        :return:
+        """
+        self._in_flight.clear()
+        for event in self._events:
+            event.set_inactive()
+        self._events.clear()
+        self._busy_until = self._sim.now
+
+    def _head_of_line(self):
+        if len(self._in_flight) == 0:
+            return None
+        delivery_time, peer, message = self._in_flight[0]
+        return peer, message
+
+    def _delivery_timer(self, delivery_time):
+        self._events.popleft()
+        while len(self._in_flight) > 0 and self._in_flight[0][0] == delivery_time:
+            delivery_time, peer, message = self._in_flight.popleft()
+            peer.receive(message)
@@ -0,0 +1,286 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# Writes the simulated timeline and the wall clock time of events in the Trace Event
+# JSON format of chrome://tracing and Perfetto (ui.perfetto.dev)
+
+from __future__ import absolute_import
+import json
+import timeit
+from .node import Node
+from .channel import SendTimeChannel
+from .profiler import Profiler
+
+_PID_SIMULATED = 1
+_PID_WALL = 2
+
+
+class ChromeTraceWriter(object):
+    """
+    Streams a trial to a Trace Event JSON file.  The "simulated" process has a track per
+    node with its state intervals ("Rebooting" while not ready) and its timer armed as an
+    async slice that ends when it fires or is cancelled, a track per channel with each
+    message as an async slice from send until it leaves the channel, and counter tracks
+    of the event heap size and each channel's queue depth.  The "wall clock" process has
+    a slice per executed event, named by callback, on the wall clock of the run.
+
+    Simulated times are in microseconds of simulation time, so 1 second of simulation
+    shows as 1 second in the viewer.
+
+    It has the interface of a Profiler: attach it with Simulator.set_profiler().  It finds
+    state changes by comparing the nodes and channels after each event to before, so Node
+    and Channel need no changes.  Events are formatted as they happen and written out
+    buffer_events at a time.  Call close() at the end for a complete JSON file.
+
+    Example:
+        writer = ChromeTraceWriter("trial.json", [alice, bob])
+        sim.set_profiler(writer)
+        sim.run_count(2000)
+        writer.close()
+    """
+
+    def __init__(self, path, nodes, heap_sample_interval=10, buffer_events=4096):
+        """
+        :param path: The JSON file to write
+        :param nodes: The Nodes to show, with their channels
+        :param heap_sample_interval: Add a heap size counter every this many events
+        :param buffer_events: Write to the file every this many trace events
+        """
+        if heap_sample_interval <= 0: raise ValueError("heap_sample_interval must be positive")
+        if buffer_events <= 0: raise ValueError("buffer_events must be positive")
+
+        self._nodes = list(nodes)
+        self._heap_sample_interval = heap_sample_interval
+        self._buffer_events = buffer_events
+        self._buffer = []
+        self._timer = timeit.default_timer
+        self._wall_start = None
+        self._event_count = 0
+        self._async_id = 0
+
+        # the event being executed between before() and after()
+        self._time = 0.0
+        self._event = None
+        self._start = 0.0
+
+        # per node: [track, state label, since]; per node: (timer Event, async id)
+        self._node_states = {}
+        self._timers = {}
+        # per channel: [track, {message id: (message, async id)}, queue depth, counter name]
+        self._channels = {}
+
+        self._file = open(path, "w")
+        self._file.write('{"displayTimeUnit": "ns", "traceEvents": [\n')
+        self._first = True
+
+        self._metadata(_PID_SIMULATED, None, "process_name", "simulated")
+        self._metadata(_PID_WALL, None, "process_name", "wall clock")
+        self._metadata(_PID_WALL, 1, "thread_name", "events")
+        for i, node in enumerate(self._nodes):
+            track = 1 + 2 * i
+            self._metadata(_PID_SIMULATED, track, "thread_name", "node {}".format(node.name))
+            self._metadata(_PID_SIMULATED, track + 1, "thread_name", "channel {} ->".format(node.name))
+            self._node_states[node] = [track, ChromeTraceWriter._state_label(node), 0.0]
+            self._timers[node] = (None, None)
+            self._channels[node.channel] = [track + 1, {}, 0, "queue depth {} ->".format(node.name)]
+
+    def __repr__(self):
+        return "{{ChromeTraceWriter: nodes {} events {}}}".format(len(self._nodes), self._event_count)
+
+    def before(self, time, event, heap_size):
+        """Called by the Simulator right before it executes event at time"""
+        if self._event_count % self._heap_sample_interval == 0:
+            self._add({"ph": "C", "name": "heap", "pid": _PID_SIMULATED, "ts": _us(time),
+                       "args": {"events": heap_size}})
+        self._event_count += 1
+        self._time = time
+        self._event = event
+        self._start = self._timer()
+        if self._wall_start is None:
+            self._wall_start = self._start
+
+    def after(self):
+        """Called by the Simulator right after it executed the event passed to before()"""
+        end = self._timer()
+        event = self._event
+        self._add({"ph": "X", "name": Profiler._callback_name(event.callback), "pid": _PID_WALL, "tid": 1,
+                   "ts": 1e6 * (self._start - self._wall_start), "dur": 1e6 * (end - self._start),
+                   "args": {"time": self._time}})
+
+        ts = _us(self._time)
+        for node in self._nodes:
+            self._update_node(node, event, ts)
+        for node in self._nodes:
+            self._update_channel(node.channel, self._channels[node.channel], ts)
+
+        if len(self._buffer) >= self._buffer_events:
+            self._flush()
+
+    def close(self):
+        """Ends the open state intervals, timers and messages and writes out the file"""
+        if self._file is None:
+            return
+        ts = _us(self._time)
+        for node in self._nodes:
+            track, label, since = self._node_states[node]
+            self._state_slice(track, label, since, ts)
+            timer, async_id = self._timers[node]
+            if timer is not None:
+                self._add({"ph": "e", "cat": "timer", "name": "timer", "id": async_id, "pid": _PID_SIMULATED,
+                           "tid": track, "ts": ts, "args": {"end": "pending"}})
+        for node in self._nodes:
+            track, in_flight, depth, counter = self._channels[node.channel]
+            for message, async_id in sorted(in_flight.values(), key=lambda entry: entry[1]):
+                self._add({"ph": "e", "cat": "message", "name": _message_name(message), "id": async_id,
+                           "pid": _PID_SIMULATED, "tid": track, "ts": ts})
+        self._flush()
+        self._file.write("\n]}\n")
+        self._file.close()
+        self._file = None
+
+    def _update_node(self, node, event, ts):
+        entry = self._node_states[node]
+        label = ChromeTraceWriter._state_label(node)
+        if label != entry[1]:
+            self._state_slice(entry[0], entry[1], entry[2], ts)
+            entry[1] = label
+            entry[2] = ts
+
+        timer, async_id = self._timers[node]
+        current = node._state.timeout_event
+        if current is not timer:
+            if timer is not None:
+                end = "fired" if timer is event else "cancelled"
+                self._add({"ph": "e", "cat": "timer", "name": "timer", "id": async_id, "pid": _PID_SIMULATED,
+                           "tid": entry[0], "ts": ts, "args": {"end": end}})
+            if current is not None:
+                async_id = self._next_async_id()
+                self._add({"ph": "b", "cat": "timer", "name": "timer", "id": async_id, "pid": _PID_SIMULATED,
+                           "tid": entry[0], "ts": ts, "args": {"delay": current.delay}})
+            self._timers[node] = (current, async_id)
+
+    def _update_channel(self, channel, entry, ts):
+        track, in_flight, depth, counter = entry
+        if isinstance(channel, SendTimeChannel):
+            messages = [message for delivery_time, peer, message in channel._in_flight]
+        else:
+            messages = [message for peer, message in channel._queue]
+
+        if len(messages) == depth and all(id(message) in in_flight for message in messages):
+            return
+
+        current = set(id(message) for message in messages)
+        for key in sorted((key for key in in_flight if key not in current), key=lambda key: in_flight[key][1]):
+            message, async_id = in_flight.pop(key)
+            self._add({"ph": "e", "cat": "message", "name": _message_name(message), "id": async_id,
+                       "pid": _PID_SIMULATED, "tid": track, "ts": ts})
+        for message in messages:
+            if id(message) not in in_flight:
+                async_id = self._next_async_id()
+                in_flight[id(message)] = (message, async_id)
+                self._add({"ph": "b", "cat": "message", "name": _message_name(message), "id": async_id,
+                           "pid": _PID_SIMULATED, "tid": track, "ts": ts, "args": _message_args(message)})
+
+        if len(messages) != depth:
+            entry[2] = len(messages)
+            self._add({"ph": "C", "name": counter, "pid": _PID_SIMULATED,
+                       "ts": ts, "args": {"messages": len(messages)}})
+
+    def _state_slice(self, track, label, since, ts):
+        self._add({"ph": "X", "cat": "state", "name": label, "pid": _PID_SIMULATED, "tid": track,
+                   "ts": since, "dur": ts - since})
+
+    def _metadata(self, pid, tid, name, value):
+        record = {"ph": "M", "name": name, "pid": pid, "args": {"name": value}}
+        if tid is not None:
+            record["tid"] = tid
+        self._add(record)
+
+    def _next_async_id(self):
+        self._async_id += 1
+        return self._async_id
+
+    def _add(self, record):
+        self._buffer.append(json.dumps(record, separators=(",", ":")))
+
+    def _flush(self):
+        if len(self._buffer) == 0:
+            return
+        if not self._first:
+            self._file.write(",\n")
+        self._file.write(",\n".join(self._buffer))
+        self._first = False
+        del self._buffer[:]
+
+    @staticmethod
+    def _state_label(node):
+        if not node.is_ready:
+            return "Rebooting"
+        return Node._state_strings[node._state.STATE]
+
+
+def _us(seconds):
+    return 1e6 * seconds
+
+
+def _message_name(message):
+    return type(message).__name__
+
+
+def _message_args(message):
+    args = {"fsn": message.fragment_id}
+    for name in ("reset_number", "ack_number"):
+        if hasattr(message, name):
+            args[name] = getattr(message, name)
+    return args
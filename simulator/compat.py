@@ -0,0 +1,114 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# Python 2 and 3 compatibility, so a seed gives the same trial on both
+
+from __future__ import absolute_import
+import abc
+import binascii
+
+# Base class of the abstract classes, as __metaclass__ = abc.ABCMeta is ignored by Python 3
+ABC = abc.ABCMeta("ABC", (object,), {})
+
+
+def legacy_seed(seed):
+    """
+    The number Python 2 seeds the Mersenne Twister with for random.seed(seed).  Python 2
+    hashes a byte string seed with its 64-bit string hash, Python 3 with SHA-512, so the
+    same os.urandom(4) seed would give different streams.  random.seed(legacy_seed(seed))
+    gives the stream of Python 2 (64-bit builds) on both.
+
+    :param seed: A byte string, e.g. os.urandom(4).  Python 3 text is taken as the Python 2
+                 byte string literal with the same characters.  Anything else, e.g. an int,
+                 is returned as it is.
+    :return: The value to pass to random.seed() or random.Random()
+    """
+    if isinstance(seed, bytes):
+        data = bytearray(seed)
+    elif isinstance(seed, type(u"")):
+        data = bytearray(seed.encode("latin-1"))
+    else:
+        return seed
+
+    if len(data) == 0:
+        return 0
+    x = data[0] << 7
+    for c in data:
+        x = ((1000003 * x) ^ c) & 0xFFFFFFFFFFFFFFFF
+    x ^= len(data)
+    if x == 0xFFFFFFFFFFFFFFFF:
+        # a hash of -1 is reserved for errors
+        x = 0xFFFFFFFFFFFFFFFE
+    return x
+
+
+def randbelow(rng, n):
+    """
+    As Python 2's rng.randrange(n), an int in [0, n).  Python 3 draws it from getrandbits()
+    instead of random(), which changes every later draw of the stream.
+
+    :param rng: A random.Random or the random module
+    :param n: The bound, below 2 ** 53
+    """
+    return int(rng.random() * n)
+
+
+def random_bytes(rng, count):
+    """A byte string of count bytes drawn with randbelow(), e.g. a random.seed() value"""
+    return bytes(bytearray(randbelow(rng, 256) for i in range(count)))
+
+
+def seed_hex(seed):
+    """The hex digits of a byte string seed, as a str"""
+    return str(binascii.hexlify(seed).decode("ascii"))
@@ -0,0 +1,267 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# Compares two Node configurations with common random numbers
+
+from __future__ import absolute_import
+import math
+import random
+from .simulator import Simulator
+from .node import Node
+from .node import TimedNode
+from .delay import ExponentialDelay
+from .loss import BernoulliLoss
+from .channel import Channel
+from .parallel import stream
+
+
+class AntitheticRandom(random.Random):
+    """
+    A random.Random whose random() returns 1 - U for the U of the same seed, so the
+    uniform, exponential and integer draws built on it mirror those of random.Random.
+    """
+    def random(self):
+        return 1.0 - random.Random.random(self)
+
+
+class Variant(object):
+    """
+    A Node configuration: the timeouts and protocol options to use instead of the Node
+    class defaults
+    """
+    def __init__(self, name, timeout_min=None, timeout_max=None, timeout_jitter=None, combined_resetack=None):
+        """
+        :param name: For the report
+        :param timeout_min: Node.TIMEOUT_MIN, None for the current value
+        :param timeout_max: Node.TIMEOUT_MAX, None for the current value
+        :param timeout_jitter: Node.TIMEOUT_JITTER, None for the current value
+        :param combined_resetack: Node.COMBINED_RESETACK, None for the current value
+        """
+        self.name = name
+        self.timeout_min = timeout_min
+        self.timeout_max = timeout_max
+        self.timeout_jitter = timeout_jitter
+        self.combined_resetack = combined_resetack
+
+    def __repr__(self):
+        return "{{Variant: {} timeout ({}, {}, {}) combined {}}}".format(
+            self.name, self.timeout_min, self.timeout_max, self.timeout_jitter, self.combined_resetack)
+
+    def apply(self):
+        """Sets the Node class options, returns the old ones for restore()"""
+        saved = (Node.TIMEOUT_MIN, Node.TIMEOUT_MAX, Node.TIMEOUT_JITTER, Node.COMBINED_RESETACK)
+        if self.timeout_min is not None:
+            Node.TIMEOUT_MIN = self.timeout_min
+        if self.timeout_max is not None:
+            Node.TIMEOUT_MAX = self.timeout_max
+        if self.timeout_jitter is not None:
+            Node.TIMEOUT_JITTER = self.timeout_jitter
+        if self.combined_resetack is not None:
+            Node.COMBINED_RESETACK = self.combined_resetack
+        return saved
+
+    @staticmethod
+    def restore(saved):
+        Node.TIMEOUT_MIN, Node.TIMEOUT_MAX, Node.TIMEOUT_JITTER, Node.COMBINED_RESETACK = saved
+
+
+class PairedStats(object):
+    """
+    Mean and confidence interval of paired differences a - b, next to the interval two
+    independent samples of the same size would give
+    """
+    # two-sided 95% normal quantile
+    Z = 1.959963984540054
+
+    def __init__(self, a, b):
+        """
+        :param a: List of values of variant a
+        :param b: List of values of variant b, paired with a
+        """
+        if len(a) != len(b): raise ValueError("a and b must be paired")
+        if len(a) < 2: raise ValueError("Need at least two pairs")
+
+        self.count = len(a)
+        self.mean_a = _mean(a)
+        self.mean_b = _mean(b)
+        differences = [x - y for x, y in zip(a, b)]
+        self.mean = _mean(differences)
+        self.variance = _variance(differences)
+        self.independent_variance = _variance(a) + _variance(b)
+
+    def __repr__(self):
+        return "{:.6g} - {:.6g} = {:.6g} +/- {:.6g} (independent +/- {:.6g}, {:.1f}x fewer trials)".format(
+            self.mean_a, self.mean_b, self.mean, self.half_width, self.independent_half_width, self.reduction)
+
+    @property
+    def half_width(self):
+        """Half width of the 95% confidence interval of the mean difference"""
+        return PairedStats.Z * math.sqrt(self.variance / self.count)
+
+    @property
+    def independent_half_width(self):
+        """The half width with independent sweeps of count trials each"""
+        return PairedStats.Z * math.sqrt(self.independent_variance / self.count)
+
+    @property
+    def reduction(self):
+        """How many times more trials independent sweeps need for the same interval"""
+        if self.variance == 0.0:
+            return float("inf")
+        return self.independent_variance / self.variance
+
+
+class ABRunner(object):
+    """
+    Runs each seed with both variants on the same per-component random streams: each
+    node, channel delay and channel loss draws from its own stream of the seed, so both
+    variants see the same startup and reboot times, the same delay for the k-th message
+    of a channel and the same loss decisions.  The differences are then mostly due to the
+    variants, and the paired differences have a much smaller variance than the
+    difference of two independent sweeps.
+
+    With antithetic, each seed also runs on the mirrored streams (1 - U) and the two
+    differences are averaged into one pair.
+
+    Example:
+        runner = ABRunner(Variant("4s", timeout_max=4.0), Variant("1s", timeout_max=1.0))
+        time, messages = runner.run(range(500))
+        print(time)
+    """
+
+    def __init__(self, a, b, loss_rate=0.60, min_delay=0.000001, mean_delay=0.000020, reboot_at=(0.0, 0.0),
+                 reboot_delay=2.0, event_budget=2000, antithetic=False):
+        """
+        :param a: The first Variant
+        :param b: The second Variant
+        :param loss_rate: The loss rate of both channels
+        :param min_delay: The minimum channel delay
+        :param mean_delay: The mean exponential part of the channel delay
+        :param reboot_at: The Node.reboot_after() time of each node, 0 for no reboot
+        :param reboot_delay: How long a reboot takes
+        :param event_budget: The most events of a trial
+        :param antithetic: Also run the mirrored streams of each seed
+        """
+        self._a = a
+        self._b = b
+        self._loss_rate = loss_rate
+        self._min_delay = min_delay
+        self._mean_delay = mean_delay
+        self._reboot_at = reboot_at
+        self._reboot_delay = reboot_delay
+        self._event_budget = event_budget
+        self._antithetic = antithetic
+
+    def run_trial(self, variant, seed, antithetic=False):
+        """
+        :return: (convergence time, RESET, RESETACK and combined messages sent).  The convergence
+                 time is the last time both nodes went to (OK, OK), or None if they are
+                 not both there at the end.
+        """
+        rng_class = AntitheticRandom if antithetic else random.Random
+        saved = variant.apply()
+        try:
+            sim = Simulator()
+            nodes = []
+            for name, reboot_at in zip(("a", "b"), self._reboot_at):
+                delay = ExponentialDelay(self._min_delay, self._mean_delay, stream(seed, name, "delay", rng_class))
+                loss = BernoulliLoss(self._loss_rate, stream(seed, name, "loss", rng_class))
+                node = TimedNode(sim, name, Channel(sim, delay, loss), stream(seed, name, "node", rng_class))
+                if reboot_at > 0:
+                    node.reboot_after(reboot_at, self._reboot_delay)
+                nodes.append(node)
+
+            alice, bob = nodes
+            alice.set_peer(bob)
+            bob.set_peer(alice)
+            sim.run_count(self._event_budget)
+        finally:
+            Variant.restore(saved)
+
+        converged = None
+        if alice.data_ready and bob.data_ready:
+            converged = max(alice.last_ready_time, bob.last_ready_time)
+        messages = sum(node.control_sent for node in nodes)
+        return converged, messages
+
+    def run(self, seeds):
+        """
+        Runs every seed with both variants.  Pairs where either variant did not converge
+        are left out of the convergence time.
+
+        :return: (PairedStats of convergence time, PairedStats of messages), a minus b
+        """
+        times = ([], [])
+        messages = ([], [])
+        for seed in seeds:
+            runs = [(self.run_trial(self._a, seed), self.run_trial(self._b, seed))]
+            if self._antithetic:
+                runs.append((self.run_trial(self._a, seed, True), self.run_trial(self._b, seed, True)))
+
+            if all(a[0] is not None and b[0] is not None for a, b in runs):
+                times[0].append(_mean([a[0] for a, b in runs]))
+                times[1].append(_mean([b[0] for a, b in runs]))
+            messages[0].append(_mean([a[1] for a, b in runs]))
+            messages[1].append(_mean([b[1] for a, b in runs]))
+
+        return PairedStats(*times), PairedStats(*messages)
+
+
+def _mean(values):
+    return sum(values) / float(len(values))
+
+
+def _variance(values):
+    mean = _mean(values)
+    return sum((x - mean) ** 2 for x in values) / (len(values) - 1)
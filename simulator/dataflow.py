@@ -0,0 +1,211 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import absolute_import, print_function
+from .event import Event
+from .simulator import Simulator
+from .node import Node
+
+
+class DataFlow(object):
+    """
+    Sends data fragments from a Node to its peer at a constant rate, one fragment every
+    fragment_size / rate seconds, whenever the node is in (OK, OK).
+
+    In discrete mode every fragment is an event and goes through the sender's Channel.
+
+    In hybrid mode, when both nodes are in (OK, OK) with no timers running, the flow
+    switches to a fluid model until guard seconds before the next scheduled event of the
+    simulation (a reboot, a RESET timeout, a message in flight), scheduled change of the
+    loss model (e.g. LinkDownLoss) or the run_until() stop time.  Those cannot change while nothing else happens, so
+    the flow schedules a single event at the end of the window, where it advances the
+    sender's FSN and data counters by the number of fragments in the window and the
+    receiver's by the expected number delivered (from the loss model's loss_rate_at() the
+    start of the window, e.g. none while a LinkDownLoss link is down).
+    Then it goes back to one event per fragment, so the time around resets and reboots
+    keeps its per-fragment detail.
+
+    Example:
+        flow = DataFlow(sim, alice, 1500 * 1000, 1500, hybrid=True)
+        flow.start()
+    """
+    VERBOSE = False
+
+    def __init__(self, sim, sender, rate, fragment_size, hybrid=False, guard=1.0, max_fluid=3600.0):
+        """
+        :param sim: The Simulator
+        :param sender: The Node that sends the data (to its peer)
+        :param rate: The data rate (bytes per second)
+        :param fragment_size: The bytes per fragment
+        :param hybrid: Use the fluid model when nothing else is going on
+        :param guard: Per-fragment time kept before the next scheduled event (seconds)
+        :param max_fluid: The longest fluid step, if nothing else is scheduled (seconds)
+        """
+        if not isinstance(sim, Simulator): raise TypeError("sim must be Simulator")
+        if not isinstance(sender, Node): raise TypeError("sender must be Node")
+        if rate <= 0: raise ValueError("rate must be positive, got {}".format(rate))
+        if fragment_size <= 0: raise ValueError("fragment_size must be positive, got {}".format(fragment_size))
+
+        self._sim = sim
+        self._sender = sender
+        self._fragment_size = fragment_size
+        self._interval = float(fragment_size) / rate
+        self._hybrid = hybrid
+        self._guard = guard
+        self._max_fluid = max_fluid
+
+        self._event = None
+        self._fluid_count = 0
+        self._fluid_loss_rate = 0.0
+
+        # stats
+        self.cnt_ticks = 0
+        self.cnt_fluid_steps = 0
+        self.cnt_fluid_fragments = 0
+        self.cnt_fluid_delivered = 0
+
+    def __repr__(self):
+        return "{{DataFlow: sender {} interval {} hybrid {} ticks {} fluid steps {} fluid fragments {}}}".format(
+            self._sender.name, self._interval, self._hybrid,
+            self.cnt_ticks, self.cnt_fluid_steps, self.cnt_fluid_fragments)
+
+    @property
+    def in_fluid_mode(self):
+        return self._fluid_count > 0
+
+    def start(self):
+        """Start sending, the first fragment one interval from now"""
+        if self._event is not None: raise RuntimeError("DataFlow already started")
+        self._schedule(self._interval, self._tick)
+
+    def stop(self):
+        """Stop sending.  Fragments of an unfinished fluid step are not counted."""
+        if self._event is not None:
+            self._event.set_inactive()
+            self._event = None
+        self._fluid_count = 0
+
+    @staticmethod
+    def is_flow_event(event):
+        """True if the event belongs to a DataFlow"""
+        return isinstance(getattr(event.callback, "__self__", None), DataFlow)
+
+    def _schedule(self, delay, callback):
+        self._event = Event(delay, callback, None)
+        self._sim.schedule(self._event)
+
+    def _tick(self, data):
+        self.cnt_ticks += 1
+        if self._hybrid and self._start_fluid():
+            return
+
+        self._sender.send_data(self._fragment_size)
+        self._schedule(self._interval, self._tick)
+
+    def _start_fluid(self):
+        sender = self._sender
+        receiver = sender.peer
+        if not (sender.data_ready and receiver.data_ready):
+            return False
+        if sender._state.timeout_pending or receiver._state.timeout_pending:
+            return False
+
+        now = self._sim.now
+        end = now + self._max_fluid
+        next_time = self._sim.next_event_time(ignore=DataFlow.is_flow_event)
+        if next_time is not None:
+            end = min(end, next_time - self._guard)
+        loss_change = sender.channel.loss.next_change(now)
+        if loss_change is not None:
+            end = min(end, loss_change - self._guard)
+        if self._sim.stop_time is not None:
+            end = min(end, self._sim.stop_time - self._guard)
+
+        count = int((end - now) / self._interval)
+        if count < 2:
+            return False
+
+        if DataFlow.VERBOSE:
+            print("{:>12.9f} DATAFLOW {} fluid for {} fragments".format(now, sender.name, count))
+
+        self._fluid_count = count
+        self._fluid_loss_rate = sender.channel.loss.loss_rate_at(now)
+        self._schedule(count * self._interval, self._end_fluid)
+        return True
+
+    def _end_fluid(self, data):
+        count = self._fluid_count
+        self._fluid_count = 0
+
+        sender = self._sender._state
+        sender.cnt_data_sent += count
+        sender.cnt_bytes_sent += count * self._fragment_size
+        sender.FSN_LOCAL += count
+
+        delivered = int(round(count * (1.0 - self._fluid_loss_rate)))
+        receiver = self._sender.peer._state
+        receiver.cnt_data_recv += delivered
+        receiver.cnt_bytes_recv += delivered * self._fragment_size
+        if delivered > 0:
+            receiver.FSN_REMOTE = sender.FSN_LOCAL - 1
+
+        self.cnt_fluid_steps += 1
+        self.cnt_fluid_fragments += count
+        self.cnt_fluid_delivered += delivered
+
+        if DataFlow.VERBOSE:
+            print("{:>12.9f} DATAFLOW {} fluid step done, {} fragments {} delivered".format(
+                self._sim.now, self._sender.name, count, delivered))
+
+        self._tick(None)
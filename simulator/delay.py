@@ -54,13 +54,16 @@
 
 # Called to generate a delay value
 
+from __future__ import absolute_import
 import abc
+import math
+import mmap
 import random
+import struct
+from .compat import ABC
 
 
-class Delay(object):
-    __metaclass__ = abc.ABCMeta
-
+class Delay(ABC):
     def __init__(self):
         pass
 
@@ -72,43 +75,424 @@ class Delay(object):
         """
         pass
 
+    def reset(self):
+        """Returns to the state after construction, for reusing the model in another trial"""
+        pass
+
 
 class ExponentialDelay(Delay):
     """
     Generates a delay from an exponential distribution with the specified mean (1/lambda):
-
-    TODO: Should generate its own seed and keep its own RNG stream
     """
 
-    def __init__(self, min_delay, mean):
+    def __init__(self, min_delay, mean, rng=None):
         """
         :param min_delay: Added to the exponential sample
         :param mean: the mean exponential delay (1 / lambda)
+        :param rng: A random.Random for its own stream, or None for the random module
         """
         super(ExponentialDelay, self).__init__()
         if mean <= 0.0: raise ValueError("Mean must be positive, got {}".format(mean))
         self._beta = mean
         self._min = min_delay
+        self._random = random if rng is None else rng
+
+    @property
+    def min_delay(self):
+        return self._min
+
+    @property
+    def mean(self):
+        """The mean delay, including min_delay"""
+        return self._min + self._beta
+
+    @property
+    def mean_excess(self):
+        """The mean of the exponential part, not including min_delay"""
+        return self._beta
 
     def next(self):
-        return random.expovariate(1/self._beta) + self._min
+        return self._random.expovariate(1/self._beta) + self._min
 
 
 
 class UniformDelay(Delay):
     """
-    TODO: Should generate its own seed and keep its own RNG stream
+    Generates a delay uniformly distributed between lower and upper
     """
 
-    def __init__(self, lower, upper):
+    def __init__(self, lower, upper, rng=None):
+        """
+        :param lower: The smallest delay
+        :param upper: The largest delay
+        :param rng: A random.Random for its own stream, or None for the random module
+        """
         super(UniformDelay, self).__init__()
         self._lower = lower
         self._upper = upper
+        self._random = random if rng is None else rng
+
+    @property
+    def min_delay(self):
+        return self._lower
+
+    def next(self):
+        return self._random.uniform(self._lower, self._upper)
+
+
+class WeibullDelay(Delay):
+    """
+    Generates a delay from a Weibull distribution, e.g. times between failures that
+    become more likely with age (shape > 1) or less likely (shape < 1)
+    """
+
+    def __init__(self, scale, shape, rng=None):
+        """
+        :param scale: The scale (alpha), the 63rd percentile
+        :param shape: The shape (beta), 1 for an exponential distribution
+        :param rng: A random.Random for its own stream, or None for the random module
+        """
+        super(WeibullDelay, self).__init__()
+        if scale <= 0.0: raise ValueError("Scale must be positive, got {}".format(scale))
+        if shape <= 0.0: raise ValueError("Shape must be positive, got {}".format(shape))
+        self._scale = scale
+        self._shape = shape
+        self._random = random if rng is None else rng
+
+    @property
+    def mean(self):
+        return self._scale * math.gamma(1.0 + 1.0 / self._shape)
+
+    def next(self):
+        return self._random.weibullvariate(self._scale, self._shape)
+
+
+class BlockDelay(Delay):
+    """
+    A Delay that draws block_size delays at a time with sample_block() and hands them out
+    one per next(), so Channel._set_timer() pays for an index and a list lookup and the
+    sampling runs in one tight loop.  A block draws the same values from the random stream
+    as block_size single draws, but ahead of time: when other components share the stream,
+    the interleaving of draws changes with block_size, so give the delay its own rng to
+    keep trials comparable across block sizes.
+    """
+
+    def __init__(self, block_size=1):
+        """
+        :param block_size: The number of delays drawn at a time
+        """
+        super(BlockDelay, self).__init__()
+        if block_size <= 0: raise ValueError("block_size must be positive, got {}".format(block_size))
+        self._block_size = block_size
+        self._block = []
+        self._index = 0
+
+    @property
+    def block_size(self):
+        return self._block_size
+
+    @abc.abstractmethod
+    def sample_block(self, count):
+        """
+        Draws count delays
+
+        :param count: The number of delays
+        :return: list of float (seconds)
+        """
+        pass
 
     def next(self):
-        return random.uniform(self._lower, self._upper)
+        index = self._index
+        if index == len(self._block):
+            self._block = self.sample_block(self._block_size)
+            index = 0
+        self._index = index + 1
+        return self._block[index]
+
+    def reset(self):
+        """Drops the rest of the current block, so the next trial samples a fresh one"""
+        self._block = []
+        self._index = 0
+
+
+class EmpiricalDelay(BlockDelay):
+    """
+    Generates delays from a histogram, e.g. of measured latencies: a bin is chosen with
+    probability proportional to its weight by the alias method (Vose), in constant time
+    whatever the number of bins, then the delay is uniform within the bin.
+
+    Example:
+        delay = EmpiricalDelay.from_samples(latencies, bins=128, log_bins=True, rng=random.Random(7))
+    """
+
+    def __init__(self, edges, weights, rng=None, block_size=1):
+        """
+        :param edges: The len(weights) + 1 increasing bin edges (seconds)
+        :param weights: The non-negative weight of each bin, not all zero
+        :param rng: A random.Random for its own stream, or None for the random module
+        :param block_size: The number of delays drawn at a time
+        """
+        super(EmpiricalDelay, self).__init__(block_size)
+        if len(weights) == 0: raise ValueError("Need at least one bin")
+        if len(edges) != len(weights) + 1: raise ValueError("Need one more edge than weights")
+        if any(edges[i] >= edges[i + 1] for i in range(len(weights))): raise ValueError("Edges must increase")
+        if edges[0] < 0.0: raise ValueError("Delays must be non-negative")
+        if any(w < 0.0 for w in weights) or sum(weights) <= 0.0:
+            raise ValueError("Weights must be non-negative and not all zero")
+
+        self._lower = [float(edge) for edge in edges[:-1]]
+        self._width = [float(edges[i + 1] - edges[i]) for i in range(len(weights))]
+        total = float(sum(weights))
+        self._mean = sum(w * (lower + 0.5 * width) for w, lower, width in zip(weights, self._lower, self._width)) / total
+        self._probability, self._alias = EmpiricalDelay._alias_table([w / total for w in weights])
+        self._random = random if rng is None else rng
+
+    @staticmethod
+    def from_samples(samples, bins=64, log_bins=False, rng=None, block_size=1):
+        """
+        The histogram of measured delays
+
+        :param samples: The delays (seconds)
+        :param bins: The number of bins between the smallest and largest sample
+        :param log_bins: If True, the bins are equally wide on a log scale, for heavy tails
+        :return: An EmpiricalDelay
+        """
+        if len(samples) == 0: raise ValueError("Need at least one sample")
+        low, high = float(min(samples)), float(max(samples))
+        if low == high:
+            high = low * (1.0 + 1e-9) + 1e-12
+        if log_bins:
+            if low <= 0.0: raise ValueError("log_bins needs positive samples")
+            ratio = (high / low) ** (1.0 / bins)
+            edges = [low * ratio ** i for i in range(bins + 1)]
+        else:
+            edges = [low + (high - low) * i / float(bins) for i in range(bins + 1)]
+        edges[-1] = high
+
+        weights = [0] * bins
+        for sample in samples:
+            if log_bins:
+                i = int(math.log(sample / low) / math.log(ratio))
+            else:
+                i = int((sample - low) / (high - low) * bins)
+            weights[min(i, bins - 1)] += 1
+        return EmpiricalDelay(edges, weights, rng, block_size)
+
+    @staticmethod
+    def _alias_table(probabilities):
+        n = len(probabilities)
+        probability = [0.0] * n
+        alias = list(range(n))
+        scaled = [p * n for p in probabilities]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while len(small) > 0 and len(large) > 0:
+            s = small.pop()
+            l = large.pop()
+            probability[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # what is left is 1 up to rounding
+        for i in large + small:
+            probability[i] = 1.0
+        return probability, alias
+
+    @property
+    def min_delay(self):
+        return self._lower[0]
+
+    @property
+    def mean(self):
+        return self._mean
+
+    def sample_block(self, count):
+        uniform = self._random.random
+        n = len(self._probability)
+        probability, alias, lower, width = self._probability, self._alias, self._lower, self._width
+        block = []
+        for k in range(count):
+            u = uniform() * n
+            i = int(u)
+            if u - i >= probability[i]:
+                i = alias[i]
+            block.append(lower[i] + width[i] * uniform())
+        return block
+
+
+class LognormalDelay(BlockDelay):
+    """
+    Generates min_delay plus a lognormal delay, whose log has mean mu and standard
+    deviation sigma: a right-skewed body with a long tail
+    """
+
+    def __init__(self, min_delay, mu, sigma, rng=None, block_size=1):
+        """
+        :param min_delay: Added to the lognormal sample
+        :param mu: The mean of the log of the delay (the median is exp(mu))
+        :param sigma: The standard deviation of the log of the delay
+        :param rng: A random.Random for its own stream, or None for the random module
+        :param block_size: The number of delays drawn at a time
+        """
+        super(LognormalDelay, self).__init__(block_size)
+        if sigma <= 0.0: raise ValueError("Sigma must be positive, got {}".format(sigma))
+        self._min = min_delay
+        self._mu = mu
+        self._sigma = sigma
+        self._random = random if rng is None else rng
+
+    @staticmethod
+    def from_median(min_delay, median, sigma, rng=None, block_size=1):
+        """The LognormalDelay whose lognormal part has the given median"""
+        return LognormalDelay(min_delay, math.log(median), sigma, rng, block_size)
+
+    @property
+    def min_delay(self):
+        return self._min
+
+    @property
+    def mean(self):
+        """The mean delay, including min_delay"""
+        return self._min + self.mean_excess
+
+    @property
+    def mean_excess(self):
+        """The mean of the lognormal part, not including min_delay"""
+        return math.exp(self._mu + 0.5 * self._sigma ** 2)
+
+    def sample_block(self, count):
+        lognormvariate, mu, sigma, lower = self._random.lognormvariate, self._mu, self._sigma, self._min
+        return [lognormvariate(mu, sigma) + lower for k in range(count)]
+
+
+class ParetoDelay(BlockDelay):
+    """
+    Generates delays from a Pareto distribution starting at scale, with tail index alpha:
+    P(delay > x) = (scale / x) ** alpha.  With alpha <= 2 the variance is infinite, so
+    cap bounds the delays (the samples above it are set to cap).
+    """
+
+    def __init__(self, scale, alpha, cap=None, rng=None, block_size=1):
+        """
+        :param scale: The smallest delay (seconds)
+        :param alpha: The tail index, smaller is heavier
+        :param cap: If not None, the largest delay
+        :param rng: A random.Random for its own stream, or None for the random module
+        :param block_size: The number of delays drawn at a time
+        """
+        super(ParetoDelay, self).__init__(block_size)
+        if scale <= 0.0: raise ValueError("Scale must be positive, got {}".format(scale))
+        if alpha <= 0.0: raise ValueError("Alpha must be positive, got {}".format(alpha))
+        if cap is not None and cap < scale: raise ValueError("cap must be at least scale")
+        self._scale = scale
+        self._alpha = alpha
+        self._cap = cap
+        self._random = random if rng is None else rng
+
+    @property
+    def min_delay(self):
+        return self._scale
+
+    @property
+    def mean(self):
+        """The mean, infinite for alpha <= 1 without a cap"""
+        a, xm = self._alpha, self._scale
+        if self._cap is None:
+            return a * xm / (a - 1.0) if a > 1.0 else float("inf")
+        # E[min(X, cap)] = xm + integral from xm to cap of (xm / x) ** a
+        c = self._cap
+        if a == 1.0:
+            return xm + xm * math.log(c / xm)
+        return xm + xm * (1.0 - (xm / c) ** (a - 1.0)) / (a - 1.0)
+
+    def sample_block(self, count):
+        paretovariate, alpha, scale = self._random.paretovariate, self._alpha, self._scale
+        block = [scale * paretovariate(alpha) for k in range(count)]
+        if self._cap is not None:
+            cap = self._cap
+            block = [delay if delay < cap else cap for delay in block]
+        return block
+
+
+class ReplayDelay(BlockDelay):
+    """
+    Replays recorded per-packet delays in order from a file of little-endian doubles
+    (seconds), e.g. written by ReplayDelay.write() from switch telemetry.  The file is
+    memory-mapped and read block_size delays at a time, so long recordings are not loaded
+    into memory.  At the end of the file it starts over.
+
+    Give each channel its own offset to replay different parts of one recording.
+    """
+
+    _DELAY = struct.Struct("<d")
+
+    def __init__(self, path, offset=0, block_size=1024):
+        """
+        :param path: The file of recorded delays
+        :param offset: The index of the first delay to replay
+        :param block_size: The number of delays read at a time
+        """
+        super(ReplayDelay, self).__init__(block_size)
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = ReplayDelay._DELAY.size
+        if len(self._map) == 0 or len(self._map) % size != 0:
+            self._map.close()
+            raise ValueError("{} is not a file of delays".format(path))
+        self._count = len(self._map) // size
+        self._start = offset % self._count
+        self._position = self._start
+        self._min = None
+
+    def __len__(self):
+        """The number of recorded delays"""
+        return self._count
+
+    @staticmethod
+    def write(path, delays):
+        """
+        Writes delays to a file for ReplayDelay
+
+        :param path: The file to write
+        :param delays: Iterable of delays (seconds)
+        """
+        with open(path, "wb") as f:
+            for delay in delays:
+                if delay < 0.0: raise ValueError("Delays must be non-negative")
+                f.write(ReplayDelay._DELAY.pack(delay))
+
+    @property
+    def min_delay(self):
+        """The smallest recorded delay, found by reading the whole file the first time"""
+        if self._min is None:
+            chunk = 65536
+            self._min = min(min(struct.unpack_from("<{}d".format(min(chunk, self._count - i)), self._map,
+                                                   i * ReplayDelay._DELAY.size))
+                            for i in range(0, self._count, chunk))
+        return self._min
+
+    def reset(self):
+        """Starts over at the offset, for replaying the same delays in another trial"""
+        super(ReplayDelay, self).reset()
+        self._position = self._start
+
+    def close(self):
+        self._map.close()
+
+    def sample_block(self, count):
+        block = []
+        while len(block) < count:
+            n = min(count - len(block), self._count - self._position)
+            block.extend(struct.unpack_from("<{}d".format(n), self._map, self._position * ReplayDelay._DELAY.size))
+            self._position = (self._position + n) % self._count
+        return block
 
 
 Delay.register(ExponentialDelay)
 Delay.register(UniformDelay)
+Delay.register(WeibullDelay)
+Delay.register(BlockDelay)
 
@@ -0,0 +1,433 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# Runs Nodes in real time on an asyncio event loop, with Channels that send encoded
+# frames over loopback UDP sockets (Python 3)
+
+from __future__ import absolute_import
+import random
+import struct
+import timeit
+from .simulator import Simulator
+from .event import Event
+from .node import Node
+from .node import TimedNode
+from .channel import Channel
+from .delay import Delay
+from .compat import legacy_seed
+from .message import Fragment
+from .message import FragReset
+from .message import FragResetAck
+from .message import FragResetAckReset
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+
+# kind, flags, fragment id, fragment length, reset number, ack number; data frames are
+# followed by fragment length bytes of padding
+_FRAME = struct.Struct("<BBIIII")
+_KIND_DATA = 0
+_KIND_RESET = 1
+_KIND_RESETACK = 2
+_KIND_RESETACK_RESET = 3
+
+
+def encode(message):
+    """The UDP payload of a message"""
+    if message.is_reset:
+        return _FRAME.pack(_KIND_RESET, Fragment.FLAG_I, 0, 0, message.reset_number, 0)
+    if message.is_resetack_reset:
+        return _FRAME.pack(_KIND_RESETACK_RESET, Fragment.FLAG_I, 0, 0, message.reset_number, message.ack_number)
+    if message.is_resetack:
+        return _FRAME.pack(_KIND_RESETACK, Fragment.FLAG_I, 0, 0, message.reset_number, message.ack_number)
+    flags = (Fragment.FLAG_B if message.is_begin else 0) | (Fragment.FLAG_E if message.is_end else 0)
+    return _FRAME.pack(_KIND_DATA, flags, message.fragment_id, message.frag_length, 0, 0) + \
+        b"\0" * message.frag_length
+
+
+def decode(frame):
+    """The message of a UDP payload, without a sender"""
+    kind, flags, fragment_id, frag_length, reset_number, ack_number = _FRAME.unpack_from(frame)
+    if kind == _KIND_RESET:
+        return FragReset(None, reset_number)
+    if kind == _KIND_RESETACK:
+        return FragResetAck(None, reset_number, ack_number)
+    if kind == _KIND_RESETACK_RESET:
+        return FragResetAckReset(None, reset_number, ack_number)
+    return Fragment(None, flags, fragment_id, frag_length, None)
+
+
+class RealTimeSimulator(Simulator):
+    """
+    The Simulator interface served by an asyncio event loop: schedule() maps to
+    loop.call_later(), now is the seconds of loop time since the last reset() and run_until()
+    runs the loop in real time.  Cancelled events still wake the loop but are skipped, as
+    in Simulator.  run() and run_count() have no real-time meaning.
+
+    The recorder and profiler see the events as in Simulator.  The first exception raised
+    by an event (e.g. a Node in an unexpected state) stops run_until() and is raised from it.
+
+    Example:
+        sim = RealTimeSimulator()
+        alice, bob = udp_pair(sim, ExponentialDelay(0.000001, 0.000020), 0.60)
+        sim.run_until(5.0)
+        sim.close()
+    """
+
+    def __init__(self, loop=None):
+        """
+        :param loop: The event loop, or None for a new one
+        """
+        if asyncio is None: raise RuntimeError("RealTimeSimulator needs asyncio (Python 3)")
+        self._loop = asyncio.new_event_loop() if loop is None else loop
+        self._origin = self._loop.time()
+        self._done = None
+        self._error = None
+        self._transports = []
+        super(RealTimeSimulator, self).__init__()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    @property
+    def now(self):
+        return self._loop.time() - self._origin
+
+    def reset(self, seed=None):
+        super(RealTimeSimulator, self).reset(seed)
+        self._origin = self._loop.time()
+
+    def schedule(self, event):
+        self._loop.call_later(event.delay, self._execute, event)
+
+    def schedule_at(self, expiry, event):
+        if expiry < self.now: raise ValueError("Cannot schedule at {} before now {}".format(expiry, self.now))
+        self._loop.call_at(self._origin + expiry, self._execute, event)
+
+    def next_event_time(self, ignore=None):
+        raise RuntimeError("Cannot find the next event time, the event loop does not expose its timers")
+
+    def run(self):
+        raise RuntimeError("Cannot run until the queue is empty in real time, use run_until()")
+
+    def run_count(self, stop_count):
+        raise RuntimeError("Cannot run a count of events in real time, use run_until()")
+
+    def run_until(self, stop_time):
+        """
+        Runs the event loop until stop_time seconds after the last reset(), or until stop()
+
+        :param stop_time: The time to stop at (seconds)
+        :return:
+        """
+        if self._running: raise RuntimeError("Cannot call a run function while already running")
+        self._running = True
+        self._use_stop_time = True
+        self._stop_time = stop_time
+        self._stop_requested = False
+        self._done = self._loop.create_future()
+        self._loop.call_at(self._origin + stop_time, self._finish)
+        try:
+            self._loop.run_until_complete(self._done)
+        finally:
+            self._running = False
+            self._done = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def stop(self, reason=None):
+        super(RealTimeSimulator, self).stop(reason)
+        self._finish()
+
+    def run_until_complete(self, future):
+        """Runs a coroutine or future on the loop, e.g. to open an endpoint before run_until()"""
+        return self._loop.run_until_complete(future)
+
+    def add_transport(self, transport):
+        """Closes transport in close()"""
+        self._transports.append(transport)
+
+    def close(self):
+        """Closes the transports and the event loop"""
+        for transport in self._transports:
+            transport.close()
+        del self._transports[:]
+        # let the transports finish closing
+        self._loop.run_until_complete(asyncio.sleep(0))
+        self._loop.close()
+
+    def _finish(self):
+        if self._done is not None and not self._done.done():
+            self._done.set_result(None)
+
+    def _execute(self, event):
+        if not event.active or self._stop_requested:
+            return
+        self._event_count += 1
+        try:
+            if self._recorder is None and self._profiler is None:
+                event.callback(event.data)
+            else:
+                self._execute_observed(self.now, event)
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+            self.stop("{} in {}".format(type(e).__name__, event))
+
+    def deliver(self, callback, data):
+        """Runs callback(data) now as an event, e.g. for a datagram that arrived"""
+        self._execute(Event(0.0, callback, data))
+
+
+class _NoDelay(Delay):
+    def next(self):
+        return 0.0
+
+
+class UdpChannel(Channel):
+    """
+    A Channel that sends each message as a UDP datagram to the socket of the peer's
+    UdpChannel on 127.0.0.1, which hands it to the node that owns it.  The delay and loss
+    are impairments added on top of the real loopback: a lost message is never sent, and
+    a delayed one is sent after its delay with loop.call_later().  clear() cancels the
+    sends still waiting for their delay; datagrams already sent are delivered.
+
+    Call open() after constructing the Node that sends on the channel.
+    """
+
+    def __init__(self, sim, delay_generator=None, loss_rate=0.0):
+        """
+        :param sim: A RealTimeSimulator
+        :param delay_generator: The Delay added to each message, or None for none
+        :param loss_rate: The loss rate or Loss added to the loopback
+        """
+        if not isinstance(sim, RealTimeSimulator): raise TypeError("sim must be RealTimeSimulator")
+        super(UdpChannel, self).__init__(sim, _NoDelay() if delay_generator is None else delay_generator, loss_rate)
+        self._impaired = delay_generator is not None
+        self._node = None
+        self._transport = None
+        self._address = None
+        # sends waiting for their delay, by key
+        self._handles = {}
+        self._handle_key = 0
+
+        # stats
+        self.cnt_frames_sent = 0
+        self.cnt_frames_recv = 0
+
+    @property
+    def address(self):
+        """The (host, port) this channel's node receives on"""
+        return self._address
+
+    def open(self, node):
+        """
+        Binds a loopback UDP socket for node's incoming messages
+
+        :param node: The Node that sends on this channel
+        :return:
+        """
+        self._node = node
+        transport, protocol = self._sim.run_until_complete(
+            self._sim.loop.create_datagram_endpoint(lambda: _Receiver(self), local_addr=("127.0.0.1", 0)))
+        self._transport = transport
+        self._address = transport.get_extra_info("sockname")
+        self._sim.add_transport(transport)
+
+    def send(self, peer, message):
+        if peer is None: raise RuntimeError("peer cannot be None")
+        if self._loss.is_lost(self._sim.now):
+            return
+        frame = encode(message)
+        address = peer.channel.address
+        if self._impaired:
+            self._handle_key += 1
+            self._handles[self._handle_key] = self._sim.loop.call_later(
+                self._delay.next(), self._send_delayed, self._handle_key, frame, address)
+        else:
+            self._sendto(frame, address)
+
+    def reset(self):
+        super(UdpChannel, self).reset()
+        self._cancel_pending()
+
+    def clear(self):
+        super(UdpChannel, self).clear()
+        self._cancel_pending()
+
+    def _cancel_pending(self):
+        for handle in self._handles.values():
+            handle.cancel()
+        self._handles.clear()
+
+    def _send_delayed(self, key, frame, address):
+        del self._handles[key]
+        self._sendto(frame, address)
+
+    def _sendto(self, frame, address):
+        self.cnt_frames_sent += 1
+        self._transport.sendto(frame, address)
+
+    def _received(self, frame):
+        self.cnt_frames_recv += 1
+        self._sim.deliver(self._node.receive, decode(frame))
+
+
+class _Receiver(object):
+    """asyncio datagram protocol of a UdpChannel's socket"""
+
+    def __init__(self, channel):
+        self._channel = channel
+
+    def connection_made(self, transport):
+        pass
+
+    def connection_lost(self, exc):
+        pass
+
+    def datagram_received(self, data, addr):
+        self._channel._received(data)
+
+    def error_received(self, exc):
+        pass
+
+
+def udp_pair(sim, delay_generator=None, loss_rate=0.0, names=("ALICE", "BOB  "), node_class=Node):
+    """
+    Two nodes that talk over loopback UDP
+
+    :param sim: A RealTimeSimulator
+    :param delay_generator: The Delay impairment of both channels, or None
+    :param loss_rate: The loss rate or Loss impairment of both channels
+    :param names: The names of the two nodes
+    :param node_class: Node or a subclass
+    :return: (alice, bob)
+    """
+    nodes = []
+    for name in names:
+        channel = UdpChannel(sim, delay_generator, loss_rate)
+        node = node_class(sim, name, channel)
+        channel.open(node)
+        nodes.append(node)
+    nodes[0].set_peer(nodes[1])
+    nodes[1].set_peer(nodes[0])
+    return tuple(nodes)
+
+
+def _pair_results(name, pairs, horizon, wall_time, event_count):
+    latencies = sorted(max(a.ready_time, b.ready_time) - max(a.start_time, b.start_time)
+                       for a, b in pairs if max(a.ready_time, b.ready_time) < float("inf"))
+    messages = sum(node.control_sent for pair in pairs for node in pair)
+
+    def quantile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if len(latencies) > 0 else float("nan")
+
+    return {"name": name,
+            "pairs": len(pairs),
+            "converged": len(latencies),
+            "latency_mean": sum(latencies) / len(latencies) if len(latencies) > 0 else float("nan"),
+            "latency_p50": quantile(0.50),
+            "latency_p95": quantile(0.95),
+            "messages": messages,
+            "message_rate": messages / horizon,
+            "events": event_count,
+            "events_per_wall_sec": event_count / wall_time if wall_time > 0 else 0.0}
+
+
+def compare(pair_count, horizon, delay_generator, loss_rate, seed=None):
+    """
+    Starts pair_count pairs of nodes at once in real time over loopback UDP and in the
+    Simulator with the same delay and loss, and runs both for horizon seconds.  The random
+    draws follow the order of execution, which real time changes, so the two runs do not
+    have the same trials, only the same parameters.
+
+    :param pair_count: The number of node pairs
+    :param horizon: The seconds to run (real or simulated)
+    :param delay_generator: The Delay of the channels (an impairment on top of loopback)
+    :param loss_rate: The loss rate of the channels
+    :param seed: If not None, the random.seed() of both runs
+    :return: list of two dicts, "emulated" then "simulated": converged pairs, handshake latency
+             (mean, median, 95th percentile of the converged), control messages and their rate per
+             second, events and events per wall clock second
+    """
+    rows = []
+    for name in ("emulated", "simulated"):
+        if seed is not None:
+            random.seed(legacy_seed(seed))
+        if name == "emulated":
+            sim = RealTimeSimulator()
+            pairs = [udp_pair(sim, delay_generator, loss_rate, ("A{}".format(i), "B{}".format(i)), TimedNode)
+                     for i in range(pair_count)]
+        else:
+            sim = Simulator()
+            pairs = []
+            for i in range(pair_count):
+                alice = TimedNode(sim, "A{}".format(i), Channel(sim, delay_generator, loss_rate))
+                bob = TimedNode(sim, "B{}".format(i), Channel(sim, delay_generator, loss_rate))
+                alice.set_peer(bob)
+                bob.set_peer(alice)
+                pairs.append((alice, bob))
+
+        start = timeit.default_timer()
+        sim.run_until(horizon)
+        wall_time = timeit.default_timer() - start
+        if name == "emulated":
+            sim.close()
+        rows.append(_pair_results(name, pairs, horizon, wall_time, sim.event_count))
+    return rows
@@ -0,0 +1,360 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# Stochastic node failures and repairs, and streaming estimates of availability
+
+from __future__ import absolute_import
+import math
+import random
+from .event import Event
+from .monitor import Monitor
+
+
+class RunningStats(object):
+    """
+    Count, mean, variance and extremes of a stream of values (Welford's method), without
+    keeping the values
+    """
+    # two-sided 95% normal quantile
+    Z = 1.959963984540054
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+        self._m2 = 0.0
+
+    def __repr__(self):
+        return "{{RunningStats: count {} mean {:.6g} +/- {:.6g}}}".format(self.count, self.mean, self.half_width)
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def half_width(self):
+        """Half width of the 95% confidence interval of the mean, 0 with fewer than two values"""
+        if self.count < 2:
+            return 0.0
+        return RunningStats.Z * math.sqrt(self.variance / self.count)
+
+
+class _Indicator(object):
+    """The up time of one condition, in total and per batch, and the lengths of its outages"""
+
+    def __init__(self, start, batch_length):
+        self.up = False
+        self.since = start
+        self.up_time = 0.0
+        self.batch_up_time = 0.0
+        self.batch_length = batch_length
+        self.batches = RunningStats()
+        self.outages = RunningStats()
+
+    def set(self, now, up):
+        if up == self.up:
+            return
+        if self.up:
+            self.up_time += now - self.since
+            self.batch_up_time += now - self.since
+        elif self.up_time > 0.0 or self.outages.count > 0:
+            # not counting the startup before the first time up
+            self.outages.add(now - self.since)
+        self.up = up
+        self.since = now
+
+    def close_batch(self, end):
+        """Ends the batch at end, which is no earlier than since"""
+        if self.up:
+            self.up_time += end - self.since
+            self.batch_up_time += end - self.since
+            self.since = end
+        self.batches.add(self.batch_up_time / self.batch_length)
+        self.batch_up_time = 0.0
+
+    def up_time_at(self, now):
+        return self.up_time + (now - self.since if self.up else 0.0)
+
+
+class Availability(Monitor):
+    """
+    Protocol-level availability: the fraction of time each node is ready and in (OK, OK),
+    and the fraction in which all of them are, so the link can carry data.  The estimates
+    are updated as the nodes change state, without storing a timeline: the up time, the
+    mean and variance of outage lengths, and batch means of fixed length for a confidence
+    interval of the availability.
+
+    Reboots started with reboot_after() are not seen until the node's next event; use a
+    RebootProcess, which updates the estimates itself.
+
+    Example:
+        availability = Availability(sim, [alice, bob], batch_length=3600.0)
+        monitors = Monitors(sim, [alice, bob], [UnexpectedEventMonitor(), AgreementMonitor(), availability])
+        sim.run_until(7 * 24 * 3600.0)
+        print(availability.fraction(), availability.half_width())
+    """
+
+    def __init__(self, sim, nodes, batch_length=3600.0):
+        """
+        :param sim: The Simulator
+        :param nodes: The Nodes to watch
+        :param batch_length: The simulated time of each batch mean (seconds)
+        """
+        if batch_length <= 0.0: raise ValueError("batch_length must be positive")
+        self._sim = sim
+        self._nodes = list(nodes)
+        self._batch_length = batch_length
+        self.reset()
+
+    def __repr__(self):
+        return "{{Availability: nodes {} all {:.6f}}}".format(len(self._nodes), self.fraction())
+
+    def reset(self):
+        self._start = self._sim.now
+        self._batch_end = self._start + self._batch_length
+        self._indicators = dict((node.name, _Indicator(self._start, self._batch_length)) for node in self._nodes)
+        self._indicators[None] = _Indicator(self._start, self._batch_length)
+        self.update()
+
+    def after_receive(self, node, message, state_before):
+        self.update(node)
+        return None
+
+    def after_timeout(self, node, state_before):
+        self.update(node)
+        return None
+
+    def update(self, node=None):
+        """
+        Records the current state of node, or of all nodes if None
+
+        :param node: The Node whose state may have changed
+        :return:
+        """
+        now = self._sim.now
+        if now >= self._batch_end:
+            self._close_batches(now)
+
+        nodes = self._nodes if node is None else (node,)
+        for n in nodes:
+            self._indicators[n.name].set(now, n.is_ready and n.data_ready)
+        self._indicators[None].set(now, all(self._indicators[n.name].up for n in self._nodes))
+
+    def fraction(self, name=None):
+        """
+        The availability so far
+
+        :param name: A node name, or None for all nodes at once
+        :return: The fraction of the elapsed time that was up
+        """
+        now = self._sim.now
+        if now <= self._start:
+            return 0.0
+        return self._indicators[name].up_time_at(now) / (now - self._start)
+
+    def half_width(self, name=None):
+        """Half width of the 95% confidence interval of the availability, from the completed batches"""
+        self.update()
+        return self._indicators[name].batches.half_width
+
+    def batches(self, name=None):
+        """RunningStats of the availability of each completed batch"""
+        self.update()
+        return self._indicators[name].batches
+
+    def outages(self, name=None):
+        """RunningStats of the lengths of the completed outages after the first time up"""
+        return self._indicators[name].outages
+
+    def _close_batches(self, now):
+        while self._batch_end <= now:
+            for indicator in self._indicators.values():
+                indicator.close_batch(self._batch_end)
+            self._batch_end += self._batch_length
+
+
+class RebootProcess(object):
+    """
+    Reboots a node at random times: an alternating renewal process of time to failure
+    and time to repair, each drawn from a Delay.  A repair makes the node as good as new,
+    so the time to the next failure is counted from the end of the last repair, whatever
+    caused it.  Each failure costs one Event, so long runs stay cheap.
+
+    Example:
+        process = RebootProcess(sim, alice, ExponentialDelay(0.0, 3600.0, rng), UniformDelay(1.0, 5.0, rng))
+        process.start()
+    """
+
+    def __init__(self, sim, node, time_to_failure, time_to_repair, availability=None):
+        """
+        :param sim: The Simulator
+        :param node: The Node to reboot
+        :param time_to_failure: The Delay of the up time between repairs and failures (MTBF is its mean)
+        :param time_to_repair: The Delay of the reboot time (MTTR is its mean)
+        :param availability: An optional Availability to update on every failure
+        """
+        self._sim = sim
+        self._node = node
+        self._time_to_failure = time_to_failure
+        self._time_to_repair = time_to_repair
+        self._availability = availability
+        self._event = None
+        self.failures = 0
+
+    def __repr__(self):
+        return "{{RebootProcess: {} failures {}}}".format(self._node.name, self.failures)
+
+    @property
+    def node(self):
+        return self._node
+
+    def start(self):
+        """Schedules the first failure, one time to failure from now"""
+        self._schedule(self._time_to_failure.next())
+
+    def stop(self):
+        """Cancels the next failure"""
+        if self._event is not None:
+            self._event.set_inactive()
+            self._event = None
+
+    def fail(self, repair_time=None):
+        """
+        Reboots the node now, unless it is already rebooting, and schedules the next failure
+        after the repair.
+
+        :param repair_time: The reboot time, or None to draw it
+        :return: True if the node failed
+        """
+        if not self._node.is_ready:
+            return False
+        if repair_time is None:
+            repair_time = self._time_to_repair.next()
+
+        self.failures += 1
+        self._node.reboot_now(repair_time)
+        if self._availability is not None:
+            self._availability.update(self._node)
+
+        self.stop()
+        self._schedule(repair_time + self._time_to_failure.next())
+        return True
+
+    def _schedule(self, delay):
+        self._event = Event(delay, self._failure_callback, None)
+        self._sim.schedule(self._event)
+
+    def _failure_callback(self, data):
+        self._event = None
+        if not self.fail():
+            # rebooting for another reason, e.g. reboot_after(): keep the process going
+            self._schedule(self._time_to_failure.next())
+
+
+class Segment(object):
+    """
+    Common-cause failures of the nodes that share something, e.g. a switch or a power
+    feed: each segment failure fails each node's RebootProcess with probability coupling
+    (the beta-factor model), with the node's own repair time.  Nodes already rebooting
+    are not affected.
+    """
+
+    def __init__(self, sim, processes, time_to_failure, coupling=1.0, rng=None):
+        """
+        :param sim: The Simulator
+        :param processes: The RebootProcess of each node on the segment
+        :param time_to_failure: The Delay between segment failures
+        :param coupling: The probability that a segment failure fails each node
+        :param rng: A random.Random for its own stream, or None for the random module
+        """
+        if not 0.0 <= coupling <= 1.0: raise ValueError("coupling must be between 0 and 1")
+        self._sim = sim
+        self._processes = list(processes)
+        self._time_to_failure = time_to_failure
+        self._coupling = coupling
+        self._random = random if rng is None else rng
+        self._event = None
+        self.failures = 0
+
+    def __repr__(self):
+        return "{{Segment: nodes {} coupling {} failures {}}}".format(
+            len(self._processes), self._coupling, self.failures)
+
+    def start(self):
+        self._schedule()
+
+    def stop(self):
+        if self._event is not None:
+            self._event.set_inactive()
+            self._event = None
+
+    def _schedule(self):
+        self._event = Event(self._time_to_failure.next(), self._failure_callback, None)
+        self._sim.schedule(self._event)
+
+    def _failure_callback(self, data):
+        self.failures += 1
+        for process in self._processes:
+            if self._coupling >= 1.0 or self._random.random() < self._coupling:
+                process.fail()
+        self._schedule()
@@ -0,0 +1,127 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import absolute_import
+from .simulator import Simulator
+from .node import Node
+from .channel import Channel
+
+
+class PairFixture(object):
+    """
+    Two Nodes that send to each other over Channels, in one Simulator, reset in place
+    between trials instead of being built again.
+
+    reset() draws from the random streams in the same order as building the fixture, so a
+    trial on a reset fixture is the same as on a new one with the same seed.
+
+    Example:
+        fixture = PairFixture(ExponentialDelay(0.000001, 0.000020), 0.60)
+        for seed in seeds:
+            fixture.reset(seed, alice_reboot_at=10.0)
+            fixture.sim.run_count(2000)
+    """
+
+    def __init__(self, delay_generator, loss_rate, channel_class=Channel, names=("ALICE", "BOB  ")):
+        """
+        :param delay_generator: The Delay of both channels
+        :param loss_rate: The loss rate or Loss of both channels
+        :param channel_class: Channel or a subclass
+        :param names: The names of the two nodes
+        """
+        self._sim = Simulator()
+        self._alice = Node(self._sim, names[0], channel_class(self._sim, delay_generator, loss_rate))
+        self._bob = Node(self._sim, names[1], channel_class(self._sim, delay_generator, loss_rate))
+        self._alice.set_peer(self._bob)
+        self._bob.set_peer(self._alice)
+
+    def __repr__(self):
+        return "{{PairFixture: {} {}}}".format(self._alice, self._bob)
+
+    @property
+    def sim(self):
+        return self._sim
+
+    @property
+    def alice(self):
+        return self._alice
+
+    @property
+    def bob(self):
+        return self._bob
+
+    def reset(self, seed=None, alice_reboot_at=0.0, bob_reboot_at=0.0, reboot_delay=2.0, synchronized=False):
+        """
+        Starts a new trial
+
+        :param seed: If not None, the random.seed() of the trial
+        :param alice_reboot_at: If positive, the Node.reboot_after() of alice
+        :param bob_reboot_at: If positive, the Node.reboot_after() of bob
+        :param reboot_delay: How long a reboot takes
+        :param synchronized: If True, start both nodes in (OK, OK) with Node.start_synchronized(),
+                             so the reboots are from time 0 instead of after the handshake
+        :return:
+        """
+        self._sim.reset(seed)
+        for node in (self._alice, self._bob):
+            node.channel.reset()
+            node.reset()
+
+        if synchronized:
+            self._alice.start_synchronized(self._bob)
+
+        if alice_reboot_at > 0:
+            self._alice.reboot_after(alice_reboot_at, reboot_delay)
+        if bob_reboot_at > 0:
+            self._bob.reboot_after(bob_reboot_at, reboot_delay)
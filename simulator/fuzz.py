@@ -0,0 +1,366 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# Coverage-guided search for trials that break the reset protocol
+
+from __future__ import absolute_import, print_function
+import binascii
+import json
+import os
+import random
+from .simulator import Simulator
+from .node import Node
+from .delay import ExponentialDelay
+from .loss import BernoulliLoss
+from .loss import LinkDownLoss
+from .channel import Channel
+from .compat import legacy_seed
+from .compat import randbelow
+from .compat import random_bytes
+from .compat import seed_hex
+
+
+class Case(object):
+    """
+    The inputs of one trial: the random.seed(), the Node.reboot_after() time of each node
+    (0 for none) and the (start, end) intervals both directions of the link are down
+    """
+    def __init__(self, seed, alice_reboot_at=0.0, bob_reboot_at=0.0, bursts=()):
+        self.seed = seed
+        self.alice_reboot_at = alice_reboot_at
+        self.bob_reboot_at = bob_reboot_at
+        self.bursts = sorted(bursts)
+
+    def __repr__(self):
+        return "{{Case: seed 0x{} reboot_at ({}, {}) bursts {}}}".format(
+            seed_hex(self.seed), self.alice_reboot_at, self.bob_reboot_at, self.bursts)
+
+    def to_dict(self):
+        return {"seed": seed_hex(self.seed),
+                "alice_reboot_at": self.alice_reboot_at,
+                "bob_reboot_at": self.bob_reboot_at,
+                "bursts": [list(burst) for burst in self.bursts]}
+
+    @staticmethod
+    def from_dict(d):
+        return Case(binascii.unhexlify(d["seed"]), d["alice_reboot_at"], d["bob_reboot_at"],
+                    [tuple(burst) for burst in d["bursts"]])
+
+
+class CoverageNode(Node):
+    """
+    A Node that adds each transition of _receive_reset(), _receive_resetack() and
+    _timeout_callback() to a set, as (state before, event, number relation, state after).
+    The state after is "error" if the handler raised.
+    """
+
+    def __init__(self, sim, name, channel, transitions):
+        super(CoverageNode, self).__init__(sim, name, channel)
+        self._transitions = transitions
+
+    def _receive_reset(self, message):
+        state = self._state
+        relation = "n=remote" if message.reset_number == state.N_REMOTE else "n!=remote"
+        self._covered(Node._receive_reset, message, "RESET", relation)
+
+    def _receive_resetack(self, message):
+        state = self._state
+        relation = "{},{}".format("ack=local" if message.ack_number == state.N_LOCAL else "ack!=local",
+                                  "n=remote" if message.reset_number == state.N_REMOTE else "n!=remote")
+        self._covered(Node._receive_resetack, message, "RESETACK", relation)
+
+    def _timeout_callback(self, data):
+        if not self.is_ready:
+            return
+        self._covered(Node._timeout_callback, data, "TIMEOUT", "-")
+
+    def _covered(self, handler, argument, event, relation):
+        before = Node._state_strings[self._state.STATE]
+        try:
+            handler(self, argument)
+        except Exception:
+            self._transitions.add((before, event, relation, "error"))
+            raise
+        self._transitions.add((before, event, relation, Node._state_strings[self._state.STATE]))
+
+
+class Fuzzer(object):
+    """
+    Mutates Cases (seed, reboot offsets, link down bursts) and keeps those that cover a
+    transition no earlier case covered.  Parents are picked in proportion to the rarity
+    of their transitions (the sum of 1 / hits), so the budget goes to the corners of
+    the state machine the random seeds rarely reach.
+
+    A trial fails if a handler raises or the nodes are not both in (OK, OK) at the end.
+    Failing cases are minimized (bursts dropped, reboot offsets zeroed or rounded while
+    the trial still fails the same way) and, with a failure_dir, saved as JSON.
+
+    Example:
+        fuzzer = Fuzzer(rng_seed=1)
+        fuzzer.fuzz(10000)
+        fuzzer.print_report()
+    """
+
+    def __init__(self, loss_rate=0.60, min_delay=0.000001, mean_delay=0.000020, event_budget=2000, rng_seed=None,
+                 failure_dir=None, max_bursts=4):
+        """
+        :param loss_rate: The loss rate of both channels outside bursts
+        :param min_delay: The minimum channel delay
+        :param mean_delay: The mean exponential part of the channel delay
+        :param event_budget: The most events of a trial
+        :param rng_seed: The seed of the fuzzer's own choices
+        :param failure_dir: If not None, the directory to save minimized failing cases in
+        :param max_bursts: The most link down intervals of a case
+        """
+        self._loss_rate = loss_rate
+        self._min_delay = min_delay
+        self._mean_delay = mean_delay
+        self._event_budget = event_budget
+        self._random = random.Random(rng_seed)
+        self._failure_dir = failure_dir
+        self._max_bursts = max_bursts
+
+        # transition -> number of trials that covered it
+        self._hits = {}
+        # list of (Case, transitions) that found something new
+        self._corpus = []
+        # failure reason -> minimized Case
+        self._failures = {}
+
+        # stats
+        self.cnt_trials = 0
+
+    def __repr__(self):
+        return "{{Fuzzer: trials {} transitions {} corpus {} failures {}}}".format(
+            self.cnt_trials, len(self._hits), len(self._corpus), len(self._failures))
+
+    @property
+    def coverage(self):
+        """dict of transition to the number of trials that covered it"""
+        return self._hits
+
+    @property
+    def failures(self):
+        """dict of failure reason to minimized Case"""
+        return self._failures
+
+    def run_case(self, case):
+        """
+        Runs one trial.  Uses and reseeds the random module.
+
+        :return: (set of transitions, failure reason or None)
+        """
+        transitions = set()
+        random.seed(legacy_seed(case.seed))
+        sim = Simulator(quiet=True)
+        delay_generator = ExponentialDelay(self._min_delay, self._mean_delay)
+        loss = LinkDownLoss(case.bursts, BernoulliLoss(self._loss_rate))
+        alice = CoverageNode(sim, "ALICE", Channel(sim, delay_generator, loss), transitions)
+        bob = CoverageNode(sim, "BOB  ", Channel(sim, delay_generator, loss), transitions)
+        alice.set_peer(bob)
+        bob.set_peer(alice)
+        if case.alice_reboot_at > 0:
+            alice.reboot_after(case.alice_reboot_at, 2.0)
+        if case.bob_reboot_at > 0:
+            bob.reboot_after(case.bob_reboot_at, 2.0)
+
+        try:
+            sim.run_count(self._event_budget)
+        except Exception as e:
+            # any exception of a handler is a protocol bug to record, not the end of the campaign
+            return transitions, "exception: {}: {}".format(type(e).__name__, e.args[0] if len(e.args) > 0 else e)
+
+        if not alice.data_ready or not bob.data_ready:
+            return transitions, "not converged: ALICE ({}), BOB ({})".format(
+                Node._state_strings[alice._state.STATE], Node._state_strings[bob._state.STATE])
+        return transitions, None
+
+    def add(self, case):
+        """Runs a case and keeps it if it covers something new, returns the failure reason or None"""
+        transitions, failure = self.run_case(case)
+        self.cnt_trials += 1
+
+        new = False
+        for transition in transitions:
+            if transition not in self._hits:
+                new = True
+                self._hits[transition] = 0
+            self._hits[transition] += 1
+        if new:
+            self._corpus.append((case, transitions))
+
+        if failure is not None and failure not in self._failures:
+            minimized = self.minimize(case, failure)
+            self._failures[failure] = minimized
+            if self._failure_dir is not None:
+                self._save(minimized, failure)
+        return failure
+
+    def fuzz(self, iterations, initial=None):
+        """
+        :param iterations: The number of mutated trials to run
+        :param initial: List of Cases to start from, defaults to the sim_reboot.py studies
+        """
+        if len(self._corpus) == 0:
+            if initial is None:
+                initial = [Case(self._new_seed(), alice, bob)
+                           for alice, bob in ((0.0, 0.0), (10.0, 0.0), (0.0, 10.0), (10.0, 10.1))]
+            for case in initial:
+                self.add(case)
+
+        for i in range(iterations):
+            self.add(self.mutate(self._pick()))
+
+    def mutate(self, case):
+        """A new Case with one or two random changes"""
+        seed, alice, bob, bursts = case.seed, case.alice_reboot_at, case.bob_reboot_at, list(case.bursts)
+        for i in range(1 + randbelow(self._random, 2)):
+            choice = randbelow(self._random, 7)
+            if choice == 0:
+                seed = self._new_seed()
+            elif choice == 1:
+                position = randbelow(self._random, len(seed))
+                seed = seed[:position] + random_bytes(self._random, 1) + seed[position + 1:]
+            elif choice == 2:
+                alice = self._mutate_offset(alice)
+            elif choice == 3:
+                bob = self._mutate_offset(bob)
+            elif choice == 4:
+                # reboots close together make the rare interleavings
+                bob = alice + self._random.expovariate(1 / 0.2)
+            elif choice == 5 and len(bursts) < self._max_bursts:
+                start = self._random.uniform(0.0, 40.0)
+                bursts.append((start, start + self._random.expovariate(1 / 2.0)))
+            elif len(bursts) > 0:
+                del bursts[randbelow(self._random, len(bursts))]
+        return Case(seed, alice, bob, _merge(bursts))
+
+    def minimize(self, case, failure):
+        """Simplifies a failing case while it still fails with the same reason"""
+        def fails(candidate):
+            return self.run_case(candidate)[1] == failure
+
+        changed = True
+        while changed:
+            changed = False
+            candidates = [Case(case.seed, case.alice_reboot_at, case.bob_reboot_at,
+                               case.bursts[:i] + case.bursts[i + 1:]) for i in range(len(case.bursts))]
+            if case.alice_reboot_at > 0:
+                candidates.append(Case(case.seed, 0.0, case.bob_reboot_at, case.bursts))
+                candidates.append(Case(case.seed, round(case.alice_reboot_at, 1), case.bob_reboot_at, case.bursts))
+            if case.bob_reboot_at > 0:
+                candidates.append(Case(case.seed, case.alice_reboot_at, 0.0, case.bursts))
+                candidates.append(Case(case.seed, case.alice_reboot_at, round(case.bob_reboot_at, 1), case.bursts))
+
+            for candidate in candidates:
+                if candidate.to_dict() != case.to_dict() and fails(candidate):
+                    case = candidate
+                    changed = True
+                    break
+        return case
+
+    def print_report(self):
+        print(self)
+        print("{:>8}  {:<12} {:<10} {:<22} {}".format("trials", "state", "event", "relation", "state after"))
+        for transition, hits in sorted(self._hits.items(), key=lambda item: item[1]):
+            before, event, relation, after = transition
+            print("{:>8}  {:<12} {:<10} {:<22} {}".format(hits, before, event, relation, after))
+        for failure, case in sorted(self._failures.items()):
+            print("FAILURE {} {}".format(failure, case))
+
+    def _pick(self):
+        """A corpus case, weighted by the rarity of its transitions"""
+        # sorted, as the order of a set of strings changes with the hash seed on Python 3
+        weights = [sum(1.0 / self._hits[t] for t in sorted(transitions)) for case, transitions in self._corpus]
+        r = self._random.uniform(0.0, sum(weights))
+        for (case, transitions), weight in zip(self._corpus, weights):
+            r -= weight
+            if r <= 0.0:
+                return case
+        return self._corpus[-1][0]
+
+    def _mutate_offset(self, offset):
+        """No reboot, a new reboot time or a nudge of the old one"""
+        choice = randbelow(self._random, 3)
+        if choice == 0:
+            return 0.0
+        if choice == 1:
+            return self._random.uniform(0.0, 20.0)
+        return max(0.0, offset + self._random.gauss(0.0, 0.5))
+
+    def _new_seed(self):
+        return random_bytes(self._random, 4)
+
+    def _save(self, case, failure):
+        if not os.path.isdir(self._failure_dir):
+            os.makedirs(self._failure_dir)
+        path = os.path.join(self._failure_dir, "fuzz_{}.json".format(seed_hex(case.seed)))
+        with open(path, "w") as f:
+            json.dump({"failure": failure,
+                       "case": case.to_dict(),
+                       "parameters": {"loss_rate": self._loss_rate,
+                                      "min_delay": self._min_delay,
+                                      "mean_delay": self._mean_delay,
+                                      "event_budget": self._event_budget}}, f, indent=2, sort_keys=True)
+
+
+def _merge(bursts):
+    """Sorted, non-overlapping intervals"""
+    merged = []
+    for start, end in sorted(bursts):
+        if len(merged) > 0 and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
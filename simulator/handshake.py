@@ -0,0 +1,271 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import absolute_import
+import math
+import numpy
+from .simulator import Simulator
+from .channel import Channel
+from .node import Node
+from .node import TimedNode
+from .delay import ExponentialDelay
+
+
+class HandshakeModel(object):
+    """
+    Semi-analytic model of the initialization handshake between two fresh nodes.
+
+    The channel delays (microseconds) are tiny compared to the retransmission timeouts
+    (TIMEOUT_MIN and up), so every RESET a node sends starts a short exchange that is over
+    long before any other timer fires.  The model therefore steps from one RESET to the
+    next instead of from one message to the next:
+
+        RESET (I -> P)      lost with loss_rate, or dropped if P has not started yet
+        RESETACK (P -> I)   lost with loss_rate, otherwise I goes to (OK, OK)
+        RESETACK (I -> P)   only if I was in (Sync, Init), otherwise P goes to (OK, OK)
+
+    A node that is not in (OK, OK) sends its next RESET after its current timeout plus
+    jitter, doubling the timeout up to timeout_max, exactly like Node.  The handshake
+    latency is the time from the later node start until both nodes are in (OK, OK).
+
+    sample() draws latencies for many trials at once in NumPy, which is fast enough to
+    screen wide parameter ranges.  validate() compares it to the event-driven simulator.
+
+    Example:
+        model = HandshakeModel(0.60, ExponentialDelay(0.000001, 0.000020))
+        latency = model.sample(10000, seed=1)
+        print(model.first_exchange_probability(), numpy.percentile(latency, 99))
+    """
+
+    # Per-node progress, as seen from the node itself
+    _SYNC_INIT = 0
+    _SYNC_OK = 1
+    _OK_OK = 2
+
+    def __init__(self, loss_rate, delay_generator, timeout_min=None, timeout_max=None, timeout_jitter=None):
+        """
+        :param loss_rate: The channel loss rate (0.0 to 1.0, exclusive)
+        :param delay_generator: The ExponentialDelay of both channels
+        :param timeout_min: Defaults to Node.TIMEOUT_MIN
+        :param timeout_max: Defaults to Node.TIMEOUT_MAX
+        :param timeout_jitter: Defaults to Node.TIMEOUT_JITTER
+        """
+        if not isinstance(delay_generator, ExponentialDelay): raise TypeError("delay_generator must be ExponentialDelay")
+        if not (0.0 <= loss_rate < 1.0): raise ValueError("0.0 <= loss_rate < 1.0")
+
+        self._loss_rate = loss_rate
+        self._delay = delay_generator
+        self._timeout_min = Node.TIMEOUT_MIN if timeout_min is None else timeout_min
+        self._timeout_max = Node.TIMEOUT_MAX if timeout_max is None else timeout_max
+        self._timeout_jitter = Node.TIMEOUT_JITTER if timeout_jitter is None else timeout_jitter
+
+    def __repr__(self):
+        return "{{HandshakeModel: loss {} delay ({}, {}) timeout ({}, {}, {})}}".format(
+            self._loss_rate, self._delay.min_delay, self._delay.mean_excess,
+            self._timeout_min, self._timeout_max, self._timeout_jitter)
+
+    @property
+    def loss_rate(self):
+        return self._loss_rate
+
+    def retry_gaps(self, count):
+        """
+        The time between consecutive RESETs of a node that never gets an ACK, without jitter.
+
+        :param count: The number of gaps
+        :return: numpy array of count gaps (seconds)
+        """
+        doublings = numpy.minimum(numpy.arange(count), 64)
+        return numpy.minimum(self._timeout_min * 2.0 ** doublings, self._timeout_max)
+
+    def first_exchange_probability(self):
+        """
+        Probability that both nodes are in (OK, OK) right after the later node's first
+        RESET: its RESET and both RESETACKs must get through.
+        """
+        return (1.0 - self._loss_rate) ** 3
+
+    def mean_exchange_latency(self):
+        """Mean time of the three message exchange when nothing is lost (seconds)"""
+        return 3 * self._delay.mean
+
+    def attempts_quantile(self, q):
+        """
+        The number of RESETs a node needs until one is ACKed with probability q, when the
+        peer is up and only that node's own RESET/RESETACK pairs count.  This is an upper
+        bound, the peer's RESETs only make the handshake faster.
+        """
+        success = (1.0 - self._loss_rate) ** 2
+        if success >= 1.0:
+            return 1
+        return int(math.ceil(math.log(1.0 - q) / math.log(1.0 - success)))
+
+    def sample(self, count, seed=None, horizon=3600.0):
+        """
+        Draws the handshake latency of count independent trials.
+
+        :param count: The number of trials
+        :param seed: Seed for numpy.random.RandomState
+        :param horizon: Trials not done by this simulated time get an infinite latency
+        :return: numpy array of latencies (seconds)
+        """
+        rng = numpy.random.RandomState(seed)
+        rows = numpy.arange(count)
+        delivered = 1.0 - self._loss_rate
+
+        # Node.__init__ starts each node at a random time between 1 and 2 seconds
+        start = rng.uniform(1, 2, (count, 2))
+        next_reset = start.copy()
+        timeout = numpy.full((count, 2), self._timeout_min)
+        progress = numpy.full((count, 2), HandshakeModel._SYNC_INIT, dtype=numpy.int8)
+        ready_time = numpy.full((count, 2), numpy.inf)
+
+        while True:
+            pending = numpy.where(progress == HandshakeModel._OK_OK, numpy.inf, next_reset)
+            initiator = numpy.argmin(pending, axis=1)
+            now = pending[rows, initiator]
+
+            live = now < horizon
+            if not live.any():
+                break
+
+            idx = rows[live]
+            i = initiator[live]
+            p = 1 - i
+            now = now[live]
+            n = len(idx)
+
+            # RESET from I reaches P only after P started
+            t = now + self._delays(rng, n)
+            reached = (rng.random_sample(n) < delivered) & (start[idx, p] <= t)
+            i_sync_init = progress[idx, i] == HandshakeModel._SYNC_INIT
+            p_sync_init = reached & (progress[idx, p] == HandshakeModel._SYNC_INIT)
+            progress[idx[p_sync_init], p[p_sync_init]] = HandshakeModel._SYNC_OK
+
+            # P always answers a RESET with a RESETACK
+            t = t + self._delays(rng, n)
+            acked = reached & (rng.random_sample(n) < delivered)
+            progress[idx[acked], i[acked]] = HandshakeModel._OK_OK
+            ready_time[idx[acked], i[acked]] = t[acked]
+
+            # I came from (Sync, Init), so it ACKs P's reset number
+            t = t + self._delays(rng, n)
+            third = acked & i_sync_init & (rng.random_sample(n) < delivered)
+            third &= progress[idx, p] == HandshakeModel._SYNC_OK
+            progress[idx[third], p[third]] = HandshakeModel._OK_OK
+            ready_time[idx[third], p[third]] = t[third]
+
+            # Timeout and exponential backoff
+            retry = ~acked
+            jitter = rng.uniform(0, self._timeout_jitter, n)
+            next_reset[idx[retry], i[retry]] = now[retry] + timeout[idx[retry], i[retry]] + jitter[retry]
+            timeout[idx[retry], i[retry]] = numpy.minimum(timeout[idx[retry], i[retry]] * 2, self._timeout_max)
+
+        return ready_time.max(axis=1) - start.max(axis=1)
+
+    def _delays(self, rng, n):
+        return self._delay.min_delay + rng.exponential(self._delay.mean_excess, n)
+
+
+def simulate(model, count, event_count=100000):
+    """
+    Measures the handshake latency of count trials with the event-driven simulator,
+    using the current random seed.
+
+    :param model: The HandshakeModel whose parameters to use
+    :param count: The number of trials
+    :param event_count: Event budget of each trial
+    :return: numpy array of latencies (seconds), infinite if a trial did not finish
+    """
+    saved = (Node.TIMEOUT_MIN, Node.TIMEOUT_MAX, Node.TIMEOUT_JITTER)
+    Node.TIMEOUT_MIN, Node.TIMEOUT_MAX, Node.TIMEOUT_JITTER = \
+        model._timeout_min, model._timeout_max, model._timeout_jitter
+
+    latency = numpy.empty(count)
+    try:
+        for trial in range(count):
+            sim = Simulator()
+            alice = TimedNode(sim, "ALICE", Channel(sim, model._delay, model.loss_rate))
+            bob = TimedNode(sim, "BOB  ", Channel(sim, model._delay, model.loss_rate))
+            alice.set_peer(bob)
+            bob.set_peer(alice)
+            sim.run_count(event_count)
+
+            latency[trial] = max(alice.ready_time, bob.ready_time) - max(alice.start_time, bob.start_time)
+    finally:
+        Node.TIMEOUT_MIN, Node.TIMEOUT_MAX, Node.TIMEOUT_JITTER = saved
+
+    return latency
+
+
+def validate(model, count, seed=None):
+    """
+    Compares model.sample() to simulate() on count trials each.
+
+    :return: dict with the mean and 50/90/99th percentiles of both, and the two-sample
+             Kolmogorov-Smirnov distance between them
+    """
+    sampled = numpy.sort(model.sample(count, seed=seed))
+    simulated = numpy.sort(simulate(model, count))
+
+    points = numpy.concatenate((sampled, simulated))
+    cdf_sampled = numpy.searchsorted(sampled, points, side='right') / float(count)
+    cdf_simulated = numpy.searchsorted(simulated, points, side='right') / float(count)
+
+    result = {'ks': numpy.abs(cdf_sampled - cdf_simulated).max()}
+    for name, values in (('model', sampled), ('simulator', simulated)):
+        result[name + '_mean'] = values.mean()
+        for q in (50, 90, 99):
+            result['{}_p{}'.format(name, q)] = numpy.percentile(values, q)
+    return result
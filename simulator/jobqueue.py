@@ -0,0 +1,237 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import absolute_import
+import binascii
+from .compat import seed_hex
+import collections
+import json
+import socket
+import os
+import sqlite3
+import time
+
+
+Job = collections.namedtuple("Job", ["id", "scenario", "seed", "attempts"])
+
+
+class JobQueue(object):
+    """
+    A queue of (scenario, seed) trials in a local SQLite database, shared by worker
+    processes on one host or on several hosts through a shared filesystem.
+
+    Workers claim a batch of jobs with a lease, renew it with heartbeat() while they
+    run, and store the results of the batch with complete() in one transaction.  A job
+    whose lease expired (its worker died) is claimed again by the next worker.  Each
+    call is a short transaction, so adding workers scales until the database is busy
+    most of the time; claim bigger batches if it is.
+
+    Scenarios are dicts of parameters, stored as JSON.  Seeds are byte strings, stored
+    as hex.
+
+    SQLite locking on network filesystems depends on the filesystem honouring POSIX
+    locks; NFS must be mounted with locking enabled.
+    """
+
+    PENDING = 0
+    RUNNING = 1
+    DONE = 2
+    FAILED = 3
+
+    state_strings = {PENDING: "pending", RUNNING: "running", DONE: "done", FAILED: "failed"}
+
+    def __init__(self, path, timeout=60.0):
+        """
+        :param path: The database file, created if it does not exist
+        :param timeout: Seconds to wait for a lock held by another worker
+        """
+        self._db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                scenario TEXT NOT NULL,
+                seed TEXT NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                UNIQUE (scenario, seed))""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires)")
+
+    @staticmethod
+    def worker_name():
+        """A name for this worker process: host and pid"""
+        return "{}:{}".format(socket.gethostname(), os.getpid())
+
+    def close(self):
+        self._db.close()
+
+    def enqueue(self, scenario, seeds):
+        """
+        Adds one job per seed for the scenario, skipping (scenario, seed) pairs already queued.
+
+        :param scenario: dict of scenario parameters
+        :param seeds: iterable of byte string seeds
+        :return: The number of jobs added
+        """
+        key = JobQueue._scenario_key(scenario)
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO jobs (scenario, seed) VALUES (?, ?)",
+                                 ((key, JobQueue._encode_seed(seed)) for seed in seeds))
+            return self._db.total_changes - before
+
+    def claim(self, worker, count, lease):
+        """
+        Claims up to count pending jobs, or jobs whose lease expired.
+
+        :param worker: The worker name
+        :param count: The largest number of jobs to claim
+        :param lease: Seconds until the jobs may be claimed by someone else
+        :return: list of Job
+        """
+        now = time.time()
+        with self._transaction():
+            rows = self._db.execute(
+                "SELECT id, scenario, seed, attempts FROM jobs WHERE state = ? OR (state = ? AND lease_expires < ?) "
+                "ORDER BY id LIMIT ?", (JobQueue.PENDING, JobQueue.RUNNING, now, count)).fetchall()
+            self._db.executemany(
+                "UPDATE jobs SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                ((JobQueue.RUNNING, worker, now + lease, row[0]) for row in rows))
+
+        return [Job(job_id, json.loads(scenario), JobQueue._decode_seed(seed), attempts + 1)
+                for job_id, scenario, seed, attempts in rows]
+
+    def heartbeat(self, worker, jobs, lease):
+        """
+        Renews the lease of jobs this worker still holds.
+
+        :return: The number of jobs renewed.  Fewer than len(jobs) means some expired and
+                 were claimed by another worker.
+        """
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.executemany(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND state = ?",
+                ((time.time() + lease, job.id, worker, JobQueue.RUNNING) for job in jobs))
+            return self._db.total_changes - before
+
+    def complete(self, worker, results):
+        """
+        Stores results in one transaction.  Results of jobs this worker no longer holds are
+        still stored, the first result of a job wins.
+
+        :param worker: The worker name
+        :param results: list of (Job, ok, result) where result is JSON serializable
+        """
+        with self._transaction():
+            self._db.executemany(
+                "UPDATE jobs SET state = ?, worker = ?, result = ?, lease_expires = NULL WHERE id = ? AND state < ?",
+                ((JobQueue.DONE if ok else JobQueue.FAILED, worker, json.dumps(result), job.id, JobQueue.DONE)
+                 for job, ok, result in results))
+
+    def requeue_expired(self):
+        """Puts jobs with expired leases back in the pending state, returns how many"""
+        with self._transaction():
+            cursor = self._db.execute(
+                "UPDATE jobs SET state = ?, worker = NULL, lease_expires = NULL WHERE state = ? AND lease_expires < ?",
+                (JobQueue.PENDING, JobQueue.RUNNING, time.time()))
+            return cursor.rowcount
+
+    def counts(self):
+        """Returns a dict of state name to the number of jobs in that state"""
+        counts = dict((name, 0) for name in JobQueue.state_strings.values())
+        for state, count in self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"):
+            counts[JobQueue.state_strings[state]] = count
+        return counts
+
+    def results(self, state=DONE):
+        """Yields (scenario, seed, result) of the jobs in state"""
+        for scenario, seed, result in self._db.execute(
+                "SELECT scenario, seed, result FROM jobs WHERE state = ? ORDER BY id", (state,)):
+            yield json.loads(scenario), JobQueue._decode_seed(seed), json.loads(result)
+
+    def _transaction(self):
+        return _Transaction(self._db)
+
+    @staticmethod
+    def _scenario_key(scenario):
+        return json.dumps(scenario, sort_keys=True)
+
+    @staticmethod
+    def _encode_seed(seed):
+        return seed_hex(seed)
+
+    @staticmethod
+    def _decode_seed(seed):
+        return binascii.unhexlify(seed)
+
+
+class _Transaction(object):
+    """BEGIN IMMEDIATE ... COMMIT, or ROLLBACK on an exception"""
+
+    def __init__(self, db):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        return self._db
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self._db.execute("COMMIT")
+        else:
+            self._db.execute("ROLLBACK")
+        return False
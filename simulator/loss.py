@@ -0,0 +1,347 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# Called to decide if a message is lost
+
+from __future__ import absolute_import
+import abc
+import bisect
+import math
+import random
+from .compat import ABC
+
+
+class Loss(ABC):
+    def __init__(self):
+        pass
+
+    @abc.abstractmethod
+    def is_lost(self, now):
+        """
+        Decide if the message the channel delivers at time now is lost.  Channels call
+        this once per message at the current simulation time, so calls are in time order
+        even when both Channels of a link share one instance to model faults of the whole
+        link.  Models with state (e.g. GilbertElliottLoss) reject earlier times.
+
+        :param now: The simulation time (seconds)
+        :return: True if the message is lost
+        """
+        pass
+
+    @abc.abstractproperty
+    def mean_loss_rate(self):
+        """The long-run fraction of messages lost, for fluid approximations"""
+        pass
+
+    def loss_rate_at(self, now):
+        """
+        The fraction of messages lost from now until next_change(now), for fluid
+        approximations.  Defaults to mean_loss_rate.
+        """
+        return self.mean_loss_rate
+
+    def next_change(self, now):
+        """
+        The next time after now that the loss behaviour changes on a schedule (e.g. a link
+        going down), or None.  Random bursts are not scheduled changes.
+        """
+        return None
+
+    def reset(self):
+        """Returns to the state after construction, for reusing the model in another trial"""
+        pass
+
+
+class BernoulliLoss(Loss):
+    """
+    Every message is lost independently with probability loss_rate.  This is what
+    Channel does with a plain loss_rate.
+    """
+
+    def __init__(self, loss_rate, rng=None):
+        """
+        :param loss_rate: The loss probability (0.0 to 1.0)
+        :param rng: A random.Random for its own stream, or None for the random module
+        """
+        super(BernoulliLoss, self).__init__()
+        if not (0.0 <= loss_rate <= 1.0): raise ValueError("0.0 <= loss_rate <= 1.0")
+        self._loss_rate = loss_rate
+        self._random = random if rng is None else rng
+
+    @property
+    def loss_rate(self):
+        return self._loss_rate
+
+    @property
+    def mean_loss_rate(self):
+        return self._loss_rate
+
+    def is_lost(self, now):
+        r = self._random.random()
+        return not r < (1.0 - self._loss_rate)
+
+
+class GilbertElliottLoss(Loss):
+    """
+    Two-state burst loss.  The link alternates between a Good and a Bad state with
+    exponentially distributed durations, and loses messages with probability loss_good
+    or loss_bad depending on the state at delivery time.
+
+    The state is advanced lazily: on each message the state is re-drawn from the exact
+    two-state transition probability over the time since the previous message, so the
+    cost is O(1) per message no matter how long the link was idle.
+    """
+
+    def __init__(self, mean_good, mean_bad, loss_good=0.0, loss_bad=1.0, rng=None):
+        """
+        :param mean_good: Mean time in the Good state (seconds)
+        :param mean_bad: Mean time in the Bad state (seconds)
+        :param loss_good: Loss probability in the Good state
+        :param loss_bad: Loss probability in the Bad state
+        :param rng: A random.Random for its own stream, or None for the random module
+        """
+        super(GilbertElliottLoss, self).__init__()
+        if mean_good <= 0.0: raise ValueError("mean_good must be positive, got {}".format(mean_good))
+        if mean_bad <= 0.0: raise ValueError("mean_bad must be positive, got {}".format(mean_bad))
+        if not (0.0 <= loss_good <= 1.0): raise ValueError("0.0 <= loss_good <= 1.0")
+        if not (0.0 <= loss_bad <= 1.0): raise ValueError("0.0 <= loss_bad <= 1.0")
+
+        self._rate_to_bad = 1.0 / mean_good
+        self._rate_to_good = 1.0 / mean_bad
+        self._loss_good = loss_good
+        self._loss_bad = loss_bad
+
+        # stationary probability of the Bad state
+        self._pi_bad = self._rate_to_bad / (self._rate_to_bad + self._rate_to_good)
+
+        self._random = random if rng is None else rng
+        self.reset()
+
+    def reset(self):
+        # start in the stationary distribution
+        self._bad = self._random.random() < self._pi_bad
+        self._last_time = 0.0
+
+    @property
+    def is_bad(self):
+        return self._bad
+
+    @property
+    def mean_loss_rate(self):
+        """The long-run loss rate"""
+        return (1.0 - self._pi_bad) * self._loss_good + self._pi_bad * self._loss_bad
+
+    def is_lost(self, now):
+        if now < self._last_time:
+            raise ValueError("Loss queried out of time order: {} after {}".format(now, self._last_time))
+        elapsed = now - self._last_time
+        self._last_time = now
+
+        # P(Bad at now | state at last time) of the two-state Markov chain
+        decay = math.exp(-(self._rate_to_bad + self._rate_to_good) * elapsed)
+        if self._bad:
+            p_bad = self._pi_bad + (1.0 - self._pi_bad) * decay
+        else:
+            p_bad = self._pi_bad * (1.0 - decay)
+        self._bad = self._random.random() < p_bad
+
+        loss_rate = self._loss_bad if self._bad else self._loss_good
+        return self._random.random() < loss_rate
+
+
+class LinkDownLoss(Loss):
+    """
+    Loses every message delivered while the link is down, e.g. a cable flap or a switch
+    reboot.  Outside the down intervals the optional loss model decides.  Overlapping
+    intervals are merged, and times may be queried in any order.
+    """
+
+    def __init__(self, intervals, loss=None):
+        """
+        :param intervals: List of (start, end) times the link is down, end exclusive
+        :param loss: A Loss for when the link is up, or None for no loss
+        """
+        super(LinkDownLoss, self).__init__()
+        if loss is not None and not isinstance(loss, Loss): raise TypeError("loss must be Loss")
+        for start, end in intervals:
+            if end < start: raise ValueError("Interval ends before it starts: ({}, {})".format(start, end))
+
+        self._intervals = []
+        for start, end in sorted(intervals):
+            if len(self._intervals) > 0 and start <= self._intervals[-1][1]:
+                self._intervals[-1] = (self._intervals[-1][0], max(end, self._intervals[-1][1]))
+            else:
+                self._intervals.append((start, end))
+        self._ends = [end for start, end in self._intervals]
+        self._loss = loss
+
+    @property
+    def mean_loss_rate(self):
+        """The loss rate while the link is up"""
+        if self._loss is not None:
+            return self._loss.mean_loss_rate
+        return 0.0
+
+    def loss_rate_at(self, now):
+        """1 while the link is down, else the loss rate of the up link"""
+        if self.is_link_down(now):
+            return 1.0
+        if self._loss is not None:
+            return self._loss.loss_rate_at(now)
+        return 0.0
+
+    def next_change(self, now):
+        index = self._interval_after(now)
+        if self.is_link_down(now):
+            return self._intervals[index][1]
+        changes = []
+        if index < len(self._intervals):
+            changes.append(self._intervals[index][0])
+        if self._loss is not None and self._loss.next_change(now) is not None:
+            changes.append(self._loss.next_change(now))
+        return min(changes) if len(changes) > 0 else None
+
+    def reset(self):
+        if self._loss is not None:
+            self._loss.reset()
+
+    def is_link_down(self, now):
+        index = self._interval_after(now)
+        return index < len(self._intervals) and self._intervals[index][0] <= now
+
+    def _interval_after(self, now):
+        """The index of the first interval that has not ended at now"""
+        return bisect.bisect_right(self._ends, now)
+
+    def is_lost(self, now):
+        if self.is_link_down(now):
+            return True
+        if self._loss is not None:
+            return self._loss.is_lost(now)
+        return False
+
+
+class TraceLoss(Loss):
+    """
+    Replays recorded per-message loss from a text file with one outcome per line: 1 (or
+    L) for a lost message, 0 (or D) for a delivered one.  Empty lines and lines starting
+    with # are skipped.  The file is read incrementally, and starts over at the end if
+    repeat is True.
+    """
+
+    def __init__(self, path, repeat=True):
+        super(TraceLoss, self).__init__()
+        self._path = path
+        self._repeat = repeat
+        self._file = open(path, "r")
+        self._count = 0
+        self._mean_loss_rate = None
+
+    @property
+    def mean_loss_rate(self):
+        """The fraction of lost messages in the whole trace (read once, on first use)"""
+        if self._mean_loss_rate is None:
+            lost = 0
+            total = 0
+            with open(self._path, "r") as f:
+                for line in f:
+                    outcome = self._parse(line)
+                    if outcome is not None:
+                        total += 1
+                        lost += outcome
+            if total == 0:
+                raise RuntimeError("Loss trace is empty: {}".format(self._path))
+            self._mean_loss_rate = float(lost) / total
+        return self._mean_loss_rate
+
+    def is_lost(self, now):
+        while True:
+            line = self._file.readline()
+            if line == "":
+                if not self._repeat or self._count == 0:
+                    raise RuntimeError("Loss trace exhausted: {}".format(self._path))
+                self._file.seek(0)
+                self._count = 0
+                continue
+
+            outcome = self._parse(line)
+            if outcome is None:
+                continue
+
+            self._count += 1
+            return outcome
+
+    def reset(self):
+        self._file.seek(0)
+        self._count = 0
+
+    def _parse(self, line):
+        """True if the line is a lost message, False if delivered, None if skipped"""
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            return None
+        if line in ("1", "L", "l"):
+            return True
+        if line in ("0", "D", "d"):
+            return False
+        raise ValueError("Bad loss trace line in {}: {}".format(self._path, line))
+
+    def close(self):
+        self._file.close()
+
+
+Loss.register(BernoulliLoss)
+Loss.register(GilbertElliottLoss)
+Loss.register(LinkDownLoss)
+Loss.register(TraceLoss)
@@ -52,15 +52,15 @@
 # intellectual property used by its contributions to this software. You may
 # contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
 
+from __future__ import absolute_import
 import abc
+from .compat import ABC
 
 
-class Message(object):
+class Message(ABC):
     """
     Base class for messages exchnaged in the simulator
     """
-    __metaclass__ = abc.ABCMeta
-
     def __init__(self):
         pass
 
@@ -82,6 +82,18 @@ class Fragment(Message):
         self._frag_length = frag_length
         self._frag_data = frag_data
 
+    @property
+    def fragment_id(self):
+        return self._fragment_id
+
+    @property
+    def frag_length(self):
+        return self._frag_length
+
+    @property
+    def frag_data(self):
+        return self._frag_data
+
     @property
     def is_idle(self):
         return self._flags & Fragment.FLAG_I == Fragment.FLAG_I
@@ -102,6 +114,10 @@ class Fragment(Message):
     def is_resetack(self):
         return self.is_idle and isinstance(self, FragResetAck)
 
+    @property
+    def is_resetack_reset(self):
+        return self.is_idle and isinstance(self, FragResetAckReset)
+
 
 class FragReset(Fragment):
     """
@@ -144,6 +160,23 @@ class FragResetAck(Fragment):
         return ack_number
 
 
+class FragResetAckReset(FragResetAck):
+    """
+    A fragmentation reset ACK and a reset in one Fragment: the receiver handles it as the
+    RESETACK followed by the RESET of the same reset number.  Not part of the draft, see
+    Node.COMBINED_RESETACK.
+    """
+    def __init__(self, sender, reset_number, ack_number):
+        """
+
+        :param sender:
+        :param reset_number: The number to advertise as our reset number, and to be ACKed
+        :param ack_number: The number we are ACKing from the peer
+        """
+        super(FragResetAckReset, self).__init__(sender, reset_number, ack_number)
+
+
 Message.register(Fragment)
 Fragment.register(FragReset)
 Fragment.register(FragResetAck)
+FragResetAck.register(FragResetAckReset)
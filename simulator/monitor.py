@@ -0,0 +1,225 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# Online checks of protocol invariants that stop the Simulator on the first failure
+
+from __future__ import absolute_import
+from .node import Node
+
+
+class Monitor(object):
+    """
+    An invariant check.  Each hook returns None if the invariant holds, or a string that
+    says why it failed.  Subclasses override the hooks they need.
+    """
+
+    def reset(self):
+        """Forgets per-trial state"""
+        pass
+
+    def before_receive(self, node, message):
+        return None
+
+    def after_receive(self, node, message, state_before):
+        return None
+
+    def before_timeout(self, node):
+        return None
+
+    def after_timeout(self, node, state_before):
+        return None
+
+
+class UnexpectedEventMonitor(Monitor):
+    """
+    Fails on a message or timeout in a state where the Node would raise, e.g. a RESETACK
+    in (Init, Init) or a timeout in (OK, OK), before the node raises.
+    """
+    _resetack_states = (Node._STATE_INIT_INIT, Node._STATE_INIT_OK)
+    _timeout_states = (Node._STATE_REBOOT, Node._STATE_INIT_INIT, Node._STATE_INIT_OK, Node._STATE_OK_INIT,
+                       Node._STATE_OK_OK)
+
+    def before_receive(self, node, message):
+        if message.is_resetack and node._state.STATE in UnexpectedEventMonitor._resetack_states:
+            return "RESETACK in ({})".format(Node._state_strings[node._state.STATE])
+        return None
+
+    def before_timeout(self, node):
+        if node._state.STATE in UnexpectedEventMonitor._timeout_states:
+            return "timeout in ({})".format(Node._state_strings[node._state.STATE])
+        return None
+
+
+class AgreementMonitor(Monitor):
+    """
+    Fails if both nodes are in (OK, OK) but do not agree on each other's reset numbers,
+    so data would flow with the wrong sequence numbers.
+    """
+
+    def after_receive(self, node, message, state_before):
+        peer = node.peer
+        if node.data_ready and peer is not None and peer.data_ready:
+            mine, theirs = node._state, peer._state
+            if mine.N_REMOTE != theirs.N_LOCAL or mine.N_LOCAL != theirs.N_REMOTE:
+                return "both (OK, OK) with N ({}, {}) and peer N ({}, {})".format(
+                    mine.N_LOCAL, mine.N_REMOTE, theirs.N_LOCAL, theirs.N_REMOTE)
+        return None
+
+
+class LivelockMonitor(Monitor):
+    """
+    Fails if a node keeps retrying at TIMEOUT_MAX (or its Backoff maximum) while its peer is in (OK, OK) and the
+    peer's messages get through: max_retries timeouts in a row, each after hearing from
+    the peer, without the node reaching (OK, OK).  Plain loss does not trigger it, as a
+    round in which nothing arrives starts the count over.
+    """
+
+    def __init__(self, max_retries=3):
+        if max_retries <= 0: raise ValueError("max_retries must be positive")
+        self._max_retries = max_retries
+        self._heard = {}
+        self._retries = {}
+
+    def reset(self):
+        self._heard.clear()
+        self._retries.clear()
+
+    def after_receive(self, node, message, state_before):
+        if node.data_ready:
+            self._retries[node] = 0
+        elif node.peer.data_ready:
+            self._heard[node] = True
+        return None
+
+    def after_timeout(self, node, state_before):
+        stuck = node.timeout_capped and node.peer.data_ready and self._heard.get(node, False)
+        self._heard[node] = False
+        self._retries[node] = self._retries.get(node, 0) + 1 if stuck else 0
+        if self._retries[node] >= self._max_retries:
+            return "{} retries at TIMEOUT_MAX while the peer is (OK, OK) and reachable".format(self._retries[node])
+        return None
+
+
+class Monitors(object):
+    """
+    Runs a list of Monitors around the events of nodes.  The first failed invariant is
+    recorded in failure and stops the Simulator, and the node skips the event.  Nodes
+    without monitors pay only for a None check per event.
+
+    Example:
+        monitors = Monitors(sim, [alice, bob])
+        sim.run_count(2000)
+        if monitors.failure is not None: print(monitors.failure)
+    """
+
+    def __init__(self, sim, nodes, monitors=None):
+        """
+        :param sim: The Simulator to stop
+        :param nodes: The Nodes to monitor
+        :param monitors: List of Monitor, defaults to the unexpected event, agreement and
+                         livelock monitors
+        """
+        if monitors is None:
+            monitors = [UnexpectedEventMonitor(), AgreementMonitor(), LivelockMonitor()]
+        self._sim = sim
+        self._monitors = monitors
+        self._failure = None
+        for node in nodes:
+            node.set_monitor(self)
+
+    def __repr__(self):
+        return "{{Monitors: {} failure {}}}".format(len(self._monitors), self._failure)
+
+    @property
+    def failure(self):
+        """(time, node name, reason) of the first failed invariant, or None"""
+        return self._failure
+
+    def reset(self):
+        """For a new trial on the same nodes, e.g. after PairFixture.reset()"""
+        self._failure = None
+        for monitor in self._monitors:
+            monitor.reset()
+
+    def before_receive(self, node, message):
+        for monitor in self._monitors:
+            reason = monitor.before_receive(node, message)
+            if reason is not None:
+                return self._fail(node, reason)
+        return True
+
+    def after_receive(self, node, message, state_before):
+        for monitor in self._monitors:
+            reason = monitor.after_receive(node, message, state_before)
+            if reason is not None:
+                return self._fail(node, reason)
+
+    def before_timeout(self, node):
+        for monitor in self._monitors:
+            reason = monitor.before_timeout(node)
+            if reason is not None:
+                return self._fail(node, reason)
+        return True
+
+    def after_timeout(self, node, state_before):
+        for monitor in self._monitors:
+            reason = monitor.after_timeout(node, state_before)
+            if reason is not None:
+                return self._fail(node, reason)
+
+    def _fail(self, node, reason):
+        if self._failure is None:
+            self._failure = (self._sim.now, node.name, reason)
+            self._sim.stop("{} at {:.9f}: {}".format(node.name, self._sim.now, reason))
+        return False
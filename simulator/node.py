@@ -52,14 +52,17 @@
 # intellectual property used by its contributions to this software. You may
 # contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
 
-from event import Event
-from simulator import Simulator
-from channel import Channel
-from message import Fragment
-from message import FragReset
-from message import FragResetAck
+from __future__ import absolute_import, print_function
+from .event import Event
+from .simulator import Simulator
+from .channel import Channel
+from .message import Fragment
+from .message import FragReset
+from .message import FragResetAck
+from .message import FragResetAckReset
 import random
 import sys
+from .compat import legacy_seed
 
 
 class Node(object):
@@ -93,21 +96,33 @@ class Node(object):
     # a little additive jitter at the end of the timeout
     TIMEOUT_JITTER = 0.005
 
+    # Send a RESETACK and the RESET that follows it as one FragResetAckReset instead of the
+    # two messages of the draft
+    COMBINED_RESETACK = False
+
     class State(object):
         """
         Maintains the state for a single peer, as per draft-mosko-icnrg-beginendfragment-01 section 2.1
         """
         def __init__(self):
+            self.reset()
+
+        def reset(self):
+            """The initial state with all counters zero"""
             self.set_initial_state()
 
             # stats
             self.cnt_data_recv = 0
             self.cnt_data_sent = 0
             self.cnt_data_not_ok = 0
+            self.cnt_bytes_recv = 0
+            self.cnt_bytes_sent = 0
             self.cnt_reset_recv = 0
             self.cnt_reset_sent = 0
             self.cnt_resetack_recv = 0
             self.cnt_resetack_sent = 0
+            self.cnt_resetack_reset_recv = 0
+            self.cnt_resetack_reset_sent = 0
             self.cnt_reboots = 0
 
         def __repr__(self):
@@ -132,6 +147,10 @@ class Node(object):
             self.timeout_pending = False
             self.timeout_event = None
 
+            # RESETs sent since the timeout was reset, and when the last one was sent
+            self.reset_sends = 0
+            self.reset_time = 0.0
+
         def stats(self):
             return "{{Stats: {{data: recv {} sent {} not_ok {}}}, {{reset: recv {} sent {}}}, {{ack: recv {} sent {}}}, {{reboots: {}}}".format(
                 self.cnt_data_recv, self.cnt_data_sent, self.cnt_data_not_ok,
@@ -139,16 +158,56 @@ class Node(object):
                 self.cnt_resetack_recv, self.cnt_resetack_sent,
                 self.cnt_reboots)
 
-    def __init__(self, sim, name, channel):
+    def __init__(self, sim, name, channel, rng=None, backoff=None):
+        """
+        :param sim: The Simulator
+        :param name: The node name
+        :param channel: The Channel of our messages to the peer
+        :param rng: A random.Random for its own stream, or None for the random module
+        :param backoff: The Backoff of the RESET timer, or None for the TIMEOUT_MIN, TIMEOUT_MAX
+                        and TIMEOUT_JITTER doubling
+        """
         if not isinstance(sim, Simulator): raise TypeError("sim must be Simulator")
         if not isinstance(channel, Channel): raise TypeError("channel must be Channel")
 
         self._sim = sim
+        self._random = random if rng is None else rng
         self._name = name
         self._peer = None
         self._state = Node.State()
         self._channel = channel
+        self._backoff = backoff
+
+        # optional Monitors, called around every message and timeout
+        self._monitor = None
+
+        # the (N_LOCAL, N_REMOTE) ACKed while handling a FragResetAckReset, else None
+        self._frame_acks = None
+
+        if Node.VERBOSE:
+            print("{:>12.9f} Created {}".format(self._sim.now, self))
+
+        self._start()
+
+    def reset(self, seed=None):
+        """
+        Returns to the state after construction, keeping the peer and channel, for reusing
+        the node in another trial: zero counters, no reboot_after() and a new startup
+        reboot.  Call it after Simulator.reset() and Channel.reset().
 
+        :param seed: If not None, reseeds the node's stream (the random module if the node
+                     was created without an rng), as seed() on Python 2
+        :return:
+        """
+        if seed is not None:
+            self._random.seed(legacy_seed(seed))
+        self._state.reset()
+        if self._backoff is not None:
+            # start_synchronized() skips the startup reboot that would restart it
+            self._backoff.restart()
+        self._start()
+
+    def _start(self):
         self._use_reboot = False
         self._reboot_after = 0
         self._reboot_delay = 0
@@ -156,11 +215,8 @@ class Node(object):
 
         self._ready = True
 
-        if Node.VERBOSE:
-            print "{:>12.9f} Created {}".format(self._sim.now, self)
-
         # start at a random time between 1 and 2 seconds from now
-        delay = random.uniform(1, 2)
+        delay = self._random.uniform(1, 2)
         self._reboot_after = delay
         self._use_reboot = True
         self._schedule_reboot()
@@ -176,25 +232,70 @@ class Node(object):
     def name(self):
         return self._name
 
+    @property
+    def peer(self):
+        return self._peer
+
+    @property
+    def channel(self):
+        return self._channel
+
+    @property
+    def backoff(self):
+        return self._backoff
+
+    @property
+    def timeout_capped(self):
+        """True if the RESET timeout cannot back off any further"""
+        maximum = Node.TIMEOUT_MAX if self._backoff is None else self._backoff.maximum
+        return self._state.timeout >= maximum
+
+    @property
+    def control_sent(self):
+        """The number of RESET, RESETACK and combined messages sent"""
+        return self._state.cnt_reset_sent + self._state.cnt_resetack_sent + self._state.cnt_resetack_reset_sent
+
     @property
     def data_ready(self):
         """Returns true if node is ready to send/receive data"""
         return self._state.STATE == Node._STATE_OK_OK
 
+    def set_monitor(self, monitor):
+        """
+        Checks invariants around every message and timeout with monitor.before_receive(node,
+        message), monitor.after_receive(node, message, state before), monitor.before_timeout(node)
+        and monitor.after_timeout(node, state before).  The node skips the event if a before
+        hook returns False.
+
+        :param monitor: A Monitors, or None to stop monitoring
+        :return:
+        """
+        self._monitor = monitor
+
     def print_stats(self):
-        print "{:>12.9f} NODE {} {}".format(self._sim.now, self._name, self._state.stats())
+        print("{:>12.9f} NODE {} {}".format(self._sim.now, self._name, self._state.stats()))
 
     def receive(self, message):
         if not isinstance(message, Fragment): raise TypeError("message must be a fragment")
         if not self.is_ready: return
 
+        monitor = self._monitor
+        if monitor is not None:
+            state_before = self._state.STATE
+            if not monitor.before_receive(self, message): return
+
         if message.is_reset:
             self._receive_reset(message)
+        elif message.is_resetack_reset:
+            self._receive_resetack_reset(message)
         elif message.is_resetack:
             self._receive_resetack(message)
         else:
             self._receive_data(message)
 
+        if monitor is not None:
+            monitor.after_receive(self, message, state_before)
+
     def reboot_after(self, reboot_after, reboot_delay, recurring=False):
         """
         Schedule the node to reboot a certain amount of time after it goes in to (OK, OK) state.
@@ -213,33 +314,110 @@ class Node(object):
             # If we're already in (OK, OK) schedule the reboot immediately
             self._schedule_reboot()
 
+    def reboot_now(self, reboot_delay):
+        """
+        Starts a reboot now that takes reboot_delay, for failures drawn outside the node (e.g.
+        by a RebootProcess) instead of reboot_after().
+
+        :param reboot_delay: The time it takes to reboot
+        :return: False if the node is already rebooting
+        """
+        if not self._ready:
+            return False
+        self._reboot_start_callback(reboot_delay)
+        return True
+
+    def start_synchronized(self, peer):
+        """
+        Skips the startup handshake of this node and its peer: both go straight to (OK, OK)
+        with each other's reset numbers and FSNs from zero, as if the RESET/RESETACK exchange
+        had just finished.  A pending reboot_after() is scheduled from now.  Call it on new or
+        reset nodes before the simulator runs, for studies of reboots that do not need the
+        initial handshake.
+
+        Draws N_LOCAL from this node's stream, then from the peer's.
+
+        :param peer: The peer Node
+        :return:
+        """
+        nodes = (self, peer)
+        for node in nodes:
+            if node._state.STATE != Node._STATE_REBOOT or not node._ready:
+                raise RuntimeError("Node {} has already started".format(node._name))
+
+        for node in nodes:
+            # the startup reboot would begin a handshake
+            node._reboot_event.set_inactive()
+            node._state.STATE = Node._STATE_OK_OK
+            node._state.N_LOCAL = 1 + int(node._random.random() * 0xFFFF)
+            node._reset_timeout()
+
+        self._state.N_REMOTE = peer._state.N_LOCAL
+        peer._state.N_REMOTE = self._state.N_LOCAL
+
+        for node in nodes:
+            if Node.VERBOSE:
+                print("{:>12.9f} NODE {} start synchronized {}".format(node._sim.now, node._name, node))
+            node._start_data_queue()
+
     @property
     def is_ready(self):
         """Determines if the node is ready to process messages"""
         return self._ready
 
+    def send_data(self, length):
+        """
+        Sends one data fragment with the next FSN to the peer.  Data is only sent in (OK, OK).
+
+        :param length: The fragment length (bytes)
+        :return: True if the fragment was sent
+        """
+        return self.send_fragment(Fragment.FLAG_BE, length)
+
+    def send_fragment(self, flags, length, data=None):
+        """
+        Sends one fragment of a larger packet with the next FSN to the peer, e.g. with
+        FLAG_B on the first fragment and FLAG_E on the last.  Data is only sent in (OK, OK).
+
+        :param flags: The Fragment flags
+        :param length: The fragment length (bytes)
+        :param data: The fragment data
+        :return: True if the fragment was sent
+        """
+        if not self.is_ready or not self.data_ready:
+            return False
+
+        self._state.cnt_data_sent += 1
+        self._state.cnt_bytes_sent += length
+        message = Fragment(self, flags, self._state.FSN_LOCAL, length, data)
+        self._state.FSN_LOCAL += 1
+        self._channel.send(self._peer, message)
+        return True
+
     #########################
     # Private API
 
     def _schedule_reboot(self):
         if self._use_reboot:
             if Node.VERBOSE:
-                print "{:>12.9f} NODE {} schedule reboot delay {}".format(self._sim.now, self._name, self._reboot_after)
+                print("{:>12.9f} NODE {} schedule reboot delay {}".format(self._sim.now, self._name, self._reboot_after))
 
             event = Event(self._reboot_after, self._reboot_start_callback, None)
             self._sim.schedule(event)
+            self._reboot_event = event
             # only do it once unless recurring reboot
             self._use_reboot = self._reboot_recurring
 
     def _reboot_start_callback(self, data):
+        """data is the reboot delay, or None for the one of reboot_after()"""
         self._ready = False
         self._channel.clear()
         self._cancel_timer()
 
         if Node.VERBOSE:
-            print "{:>12.9f} NODE {} rebooting {}".format(self._sim.now, self._name, self)
+            print("{:>12.9f} NODE {} rebooting {}".format(self._sim.now, self._name, self))
 
-        event = Event(self._reboot_delay, self._reboot_finished_callback, None)
+        event = Event(self._reboot_delay if data is None else data, self._reboot_finished_callback, None)
         self._sim.schedule(event)
 
     ########################################
@@ -249,29 +427,76 @@ class Node(object):
         if not self.is_ready: raise RuntimeError("Cannot send while not ready")
 
         self._state.cnt_reset_sent += 1
+        self._state.reset_sends += 1
+        self._state.reset_time = self._sim.now
         message = FragReset(self, self._state.N_LOCAL)
         if Node.EXTRA_VERBOSE:
-            print "{:>12.9f} NODE {} send RESET    {}".format(self._sim.now, self._name, self._state.N_LOCAL)
+            print("{:>12.9f} NODE {} send RESET    {}".format(self._sim.now, self._name, self._state.N_LOCAL))
 
         self._channel.send(self._peer, message)
 
     def _send_resetack(self):
         if not self.is_ready: raise RuntimeError("Cannot send while not ready")
+        if self._frame_acked(): return
 
         self._state.cnt_resetack_sent += 1
         message = FragResetAck(self, self._state.N_LOCAL, self._state.N_REMOTE)
         if Node.EXTRA_VERBOSE:
-            print "{:>12.9f} NODE {} send RESETACK {}, {}".format(
-                self._sim.now, self._name, self._state.N_LOCAL, self._state.N_REMOTE)
+            print("{:>12.9f} NODE {} send RESETACK {}, {}".format(
+                self._sim.now, self._name, self._state.N_LOCAL, self._state.N_REMOTE))
 
         self._channel.send(self._peer, message)
 
+    def _send_resetack_reset(self):
+        """A RESETACK then a RESET, as one message with COMBINED_RESETACK"""
+        if not Node.COMBINED_RESETACK:
+            self._send_resetack()
+            self._send_reset()
+            return
+
+        if not self.is_ready: raise RuntimeError("Cannot send while not ready")
+        self._frame_acked()
+
+        self._state.cnt_resetack_reset_sent += 1
+        self._state.reset_sends += 1
+        self._state.reset_time = self._sim.now
+        message = FragResetAckReset(self, self._state.N_LOCAL, self._state.N_REMOTE)
+        if Node.EXTRA_VERBOSE:
+            print("{:>12.9f} NODE {} send RESETACK+RESET {}, {}".format(
+                self._sim.now, self._name, self._state.N_LOCAL, self._state.N_REMOTE))
+
+        self._channel.send(self._peer, message)
+
+    def _frame_acked(self):
+        """
+        While handling a FragResetAckReset, True if this ACK went out already, so its RESET
+        part does not ACK again what its RESETACK part just did.
+        """
+        if self._frame_acks is None:
+            return False
+        ack = (self._state.N_LOCAL, self._state.N_REMOTE)
+        if ack in self._frame_acks:
+            return True
+        self._frame_acks.append(ack)
+        return False
+
     def _reset_timeout(self):
-        self._state.timeout = Node.TIMEOUT_MIN
+        self._state.reset_sends = 0
+        if self._backoff is not None:
+            self._state.timeout = self._backoff.initial()
+        else:
+            self._state.timeout = Node.TIMEOUT_MIN
+
+    def _sample_rtt(self):
+        """Karn's rule: only a RESET sent once since the timeout reset gives an unambiguous RTT"""
+        if self._backoff is not None and self._state.reset_sends == 1:
+            self._backoff.sample(self._sim.now - self._state.reset_time)
 
     def _increase_timeout(self):
         """Exponential backoff of timeout"""
-        if self._state.timeout < Node.TIMEOUT_MAX:
+        if self._backoff is not None:
+            self._state.timeout = self._backoff.increase(self._state.timeout, self._random)
+        elif self._state.timeout < Node.TIMEOUT_MAX:
             self._state.timeout *= 2
             if self._state.timeout > Node.TIMEOUT_MAX:
                 self._state.timeout = Node.TIMEOUT_MAX
@@ -279,7 +504,9 @@ class Node(object):
     def _get_timeout(self):
         """ The current timeout plus some random jitter """
         t = self._state.timeout
-        jitter = random.uniform(0, Node.TIMEOUT_JITTER)
+        if self._backoff is not None:
+            return self._backoff.delay(t, self._random)
+        jitter = self._random.uniform(0, Node.TIMEOUT_JITTER)
         return t + jitter
 
     def _cancel_timer(self):
@@ -289,7 +516,7 @@ class Node(object):
         self._state.timeout_pending = False
 
         if Node.EXTRA_VERBOSE:
-            print "{:>12.9f} NODE {} cancel_timer  {}".format(self._sim.now, self._name, self._state)
+            print("{:>12.9f} NODE {} cancel_timer  {}".format(self._sim.now, self._name, self._state))
 
     def _start_timer(self):
         if not self.is_ready: raise RuntimeError("Cannot start a time while not ready")
@@ -298,7 +525,7 @@ class Node(object):
         delay = self._get_timeout()
 
         if Node.EXTRA_VERBOSE:
-            print "{:>12.9f} NODE {} timeout delay {} {}".format(self._sim.now, self._name, delay, self)
+            print("{:>12.9f} NODE {} timeout delay {} {}".format(self._sim.now, self._name, delay, self))
 
         event = Event(delay, self._timeout_callback, None)
         self._state.timeout_pending = True
@@ -308,7 +535,7 @@ class Node(object):
     def _start_data_queue(self):
         sys.stdout.flush()
         if Node.VERBOSE:
-            print "{:>12.9f} NODE {} start data queue {}".format(self._sim.now, self._name, self)
+            print("{:>12.9f} NODE {} start data queue {}".format(self._sim.now, self._name, self))
         # this may be a no-op if not setup to reboot node
         self._schedule_reboot()
 
@@ -320,19 +547,22 @@ class Node(object):
         self._state.cnt_reboots += 1
 
         self._ready = True
+        if self._backoff is not None:
+            self._backoff.restart()
 
         if Node.VERBOSE:
-            print "{:>12.9f} NODE {} reboot finished {}".format(self._sim.now, self._name, self)
+            print("{:>12.9f} NODE {} reboot finished {}".format(self._sim.now, self._name, self))
 
         self._master_start(None)
 
     def _master_start(self, data):
         self._state.STATE = Node._STATE_INIT_INIT
-        self._state.N_LOCAL = random.randint(1, 0xFFFF)
+        # randint(1, 0xFFFF) as Python 2 draws it, Python 3 uses getrandbits()
+        self._state.N_LOCAL = 1 + int(self._random.random() * 0xFFFF)
         self._reset_timeout()
 
         if Node.VERBOSE:
-            print "{:>12.9f} NODE {} master_start {}".format(self._sim.now, self._name, self)
+            print("{:>12.9f} NODE {} master_start {}".format(self._sim.now, self._name, self))
 
         self._send_reset()
         self._start_timer()
@@ -347,11 +577,16 @@ class Node(object):
         """
         if not self.is_ready: return
 
+        monitor = self._monitor
+        if monitor is not None:
+            state_before = self._state.STATE
+            if not monitor.before_timeout(self): return
+
         self._state.timeout_pending = False
         self._state.timeout_event = None
 
         if Node.EXTRA_VERBOSE:
-            print "{:>12.9f} NODE {} timeout {}".format(self._sim.now, self._name, self._state)
+            print("{:>12.9f} NODE {} timeout {}".format(self._sim.now, self._name, self._state))
 
         if self._state.STATE == Node._STATE_REBOOT:
             raise RuntimeError("Unexpected event state: {}", self._state)
@@ -382,17 +617,21 @@ class Node(object):
             raise RuntimeError("Invalid state: ", self._state.STATE)
 
         if Node.EXTRA_VERBOSE:
-            print "{:>12.9f} NODE {} finished {}".format(self._sim.now, self._name, self._state)
+            print("{:>12.9f} NODE {} finished {}".format(self._sim.now, self._name, self._state))
+
+        if monitor is not None:
+            monitor.after_timeout(self, state_before)
 
     def _receive_data_not_ok(self):
         if Node.VERBOSE:
-            print "{:>12.9f} NODE {} error received data not OK mode {}".format(self._sim.now, self._name, self)
+            print("{:>12.9f} NODE {} error received data not OK mode {}".format(self._sim.now, self._name, self))
         self._state.cnt_data_not_ok += 1
 
-    def _receive_data_ok(self):
+    def _receive_data_ok(self, message):
         if Node.VERBOSE:
-            print "{:>12.9f} NODE {} receive data {}".format(self._sim.now, self._name, self)
-        # Do something
+            print("{:>12.9f} NODE {} receive data {}".format(self._sim.now, self._name, self))
+        self._state.FSN_REMOTE = message.fragment_id
+        self._state.cnt_bytes_recv += message.frag_length
 
     def _receive_data(self, message):
         self._state.cnt_data_recv += 1
@@ -404,10 +643,10 @@ class Node(object):
             self._receive_data_not_ok()
 
         elif self._state.STATE == Node._STATE_INIT_OK:
-            self._receive_data_ok()
+            self._receive_data_ok(message)
 
         elif self._state.STATE == Node._STATE_SYNC_OK:
-            self._receive_data_ok()
+            self._receive_data_ok(message)
 
         elif self._state.STATE == Node._STATE_SYNC_INIT:
             self._receive_data_not_ok()
@@ -416,7 +655,7 @@ class Node(object):
             self._receive_data_not_ok()
 
         elif self._state.STATE == Node._STATE_OK_OK:
-            self._receive_data_ok()
+            self._receive_data_ok(message)
 
         else:
             raise RuntimeError("Invalid state: ", self._state.STATE)
@@ -428,7 +667,7 @@ class Node(object):
         reset_number = message.reset_number
 
         if Node.EXTRA_VERBOSE:
-            print "{:>12.9f} NODE {} recv RESET    {} {}".format(self._sim.now, self._name, reset_number, self._state)
+            print("{:>12.9f} NODE {} recv RESET    {} {}".format(self._sim.now, self._name, reset_number, self._state))
 
         if self._state.STATE == Node._STATE_REBOOT:
             # Drop
@@ -436,10 +675,8 @@ class Node(object):
 
         elif self._state.STATE == Node._STATE_INIT_INIT:
             self._state.N_REMOTE = reset_number
-            self._send_resetack()
             self._state.STATE = Node._STATE_INIT_OK
-
-            self._send_reset()
+            self._send_resetack_reset()
             self._start_timer()
             self._state.STATE = Node._STATE_SYNC_OK
 
@@ -455,10 +692,8 @@ class Node(object):
                 self._state.N_REMOTE = reset_number
                 self._state.S_LOCAL = 0
                 self._state.S_REMOTE = 0
-                self._send_resetack()
                 self._state.STATE = Node._STATE_INIT_OK
-
-                self._send_reset()
+                self._send_resetack_reset()
                 self._start_timer()
                 self._state.STATE = Node._STATE_SYNC_OK
 
@@ -479,10 +714,8 @@ class Node(object):
                 self._state.N_REMOTE = reset_number
                 self._state.S_LOCAL = 0
                 self._state.S_REMOTE = 0
-                self._send_resetack()
                 self._state.STATE = Node._STATE_INIT_OK
-
-                self._send_reset()
+                self._send_resetack_reset()
                 self._start_timer()
                 self._state.STATE = Node._STATE_SYNC_OK
 
@@ -490,12 +723,22 @@ class Node(object):
             raise RuntimeError("Invalid state: ", self._state.STATE)
 
         if Node.EXTRA_VERBOSE:
-            print "{:>12.9f} NODE {} finished      {}".format(self._sim.now, self._name, self._state)
+            print("{:>12.9f} NODE {} finished      {}".format(self._sim.now, self._name, self._state))
 
         # Only trigger this on the frist edge from not prior_data_ready to current data_ready
         if not prior_data_ready and self.data_ready:
             self._start_data_queue()
 
+    def _receive_resetack_reset(self, message):
+        """A FragResetAckReset is its RESETACK, then its RESET"""
+        self._state.cnt_resetack_reset_recv += 1
+        self._frame_acks = []
+        try:
+            self._receive_resetack(message)
+            self._receive_reset(message)
+        finally:
+            self._frame_acks = None
+
     def _receive_resetack(self, message):
         self._state.cnt_resetack_recv += 1
         prior_data_ready = self.data_ready
@@ -503,7 +746,7 @@ class Node(object):
         reset_number = message.reset_number
         ack_number = message.ack_number
         if Node.EXTRA_VERBOSE:
-            print "{:>12.9f} NODE {} recv RESETACK {} {}".format(self._sim.now, self._name, (reset_number, ack_number), self._state)
+            print("{:>12.9f} NODE {} recv RESETACK {} {}".format(self._sim.now, self._name, (reset_number, ack_number), self._state))
 
         if self._state.STATE == Node._STATE_REBOOT:
             # Drop
@@ -518,6 +761,7 @@ class Node(object):
         elif self._state.STATE == Node._STATE_SYNC_OK:
             if ack_number == self._state.N_LOCAL:
                 self._cancel_timer()
+                self._sample_rtt()
                 self._reset_timeout()
 
                 if reset_number == self._state.N_REMOTE:
@@ -526,16 +770,15 @@ class Node(object):
                     self._state.N_REMOTE = reset_number
                     self._state.S_LOCAL = 0
                     self._state.S_REMOTE = 0
-                    self._send_resetack()
                     self._state.STATE = Node._STATE_INIT_OK
-
-                    self._send_reset()
+                    self._send_resetack_reset()
                     self._start_timer()
                     self._state.STATE = Node._STATE_SYNC_OK
 
         elif self._state.STATE == Node._STATE_SYNC_INIT:
             if ack_number == self._state.N_LOCAL:
                 self._cancel_timer()
+                self._sample_rtt()
                 self._reset_timeout()
                 self._state.STATE = Node._STATE_OK_INIT
 
@@ -553,9 +796,27 @@ class Node(object):
             raise RuntimeError("Invalid state: ", self._state.STATE)
 
         if Node.EXTRA_VERBOSE:
-            print "{:>12.9f} NODE {} finished      {}".format(self._sim.now, self._name, self._state)
+            print("{:>12.9f} NODE {} finished      {}".format(self._sim.now, self._name, self._state))
 
         # detect the edge transition from not prior_data_ready to data_ready
         if not prior_data_ready and self.data_ready:
             self._start_data_queue()
 
+
+class TimedNode(Node):
+    """
+    A Node that remembers when it started, when it first went to (OK, OK) and when it last
+    did (e.g. after a reboot).  The ready times are infinite until then.
+    """
+
+    def __init__(self, sim, name, channel, rng=None, backoff=None):
+        super(TimedNode, self).__init__(sim, name, channel, rng, backoff)
+        self.start_time = sim.now + self._reboot_after
+        self.ready_time = float("inf")
+        self.last_ready_time = float("inf")
+
+    def _start_data_queue(self):
+        if self.ready_time == float("inf"):
+            self.ready_time = self._sim.now
+        self.last_ready_time = self._sim.now
+        super(TimedNode, self)._start_data_queue()
@@ -0,0 +1,488 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+# Runs a topology of node pairs as partitions, each with its own Simulator in its own process
+
+from __future__ import absolute_import
+import collections
+import hashlib
+import multiprocessing
+import os
+import random
+import sys
+from .simulator import Simulator
+from .event import Event
+from .node import Node
+from .delay import ExponentialDelay
+from .loss import BernoulliLoss
+from .channel import SendTimeChannel
+from .message import Fragment
+from .message import FragReset
+from .message import FragResetAck
+from .message import FragResetAckReset
+
+
+class PairSpec(object):
+    """
+    Two nodes, "<name>/a" and "<name>/b", and the SendTimeChannel each one sends on
+    """
+    def __init__(self, name, loss_rate=0.60, min_delay=0.000001, mean_delay=0.000020, reboot_at=(0.0, 0.0),
+                 reboot_delay=2.0):
+        """
+        :param name: The pair name
+        :param loss_rate: The loss rate of both channels
+        :param min_delay: The minimum channel delay, which must be positive
+        :param mean_delay: The mean exponential part of the channel delay
+        :param reboot_at: The Node.reboot_after() time of each node, 0 for no reboot
+        :param reboot_delay: How long a reboot takes
+        """
+        if min_delay <= 0.0: raise ValueError("min_delay must be positive, got {}".format(min_delay))
+        self.name = name
+        self.loss_rate = loss_rate
+        self.min_delay = min_delay
+        self.mean_delay = mean_delay
+        self.reboot_at = reboot_at
+        self.reboot_delay = reboot_delay
+
+    def __repr__(self):
+        return "{{PairSpec: {} loss {} delay ({}, {}) reboot_at {}}}".format(
+            self.name, self.loss_rate, self.min_delay, self.mean_delay, self.reboot_at)
+
+    @property
+    def node_names(self):
+        return self.name + "/a", self.name + "/b"
+
+
+def stream(seed, name, component, rng_class=random.Random):
+    """
+    The random.Random of one component (e.g. the delay of node "p1/a").  Every node,
+    delay and loss has its own stream, so the draws do not depend on how the events of
+    different components interleave, which differs between partitions.
+
+    :param seed: An int
+    :param rng_class: random.Random or a subclass, e.g. an antithetic one
+    """
+    digest = hashlib.sha256("{!r}/{}/{}".format(seed, name, component).encode("utf-8")).hexdigest()
+    return rng_class(int(digest, 16))
+
+
+def assign_pairs(pairs, partitions, split=False):
+    """
+    Spreads the pairs round-robin over the partitions.
+
+    :param split: If True the two nodes of a pair go to neighbouring partitions, so all
+                  their messages cross partitions
+    :return: dict of node name to partition index
+    """
+    assignment = {}
+    for i, spec in enumerate(pairs):
+        a, b = spec.node_names
+        assignment[a] = i % partitions
+        assignment[b] = (i + 1) % partitions if split else i % partitions
+    return assignment
+
+
+def node_result(node):
+    state = node._state
+    return {"data_ready": node.data_ready,
+            "state": state.STATE,
+            "n_local": state.N_LOCAL,
+            "n_remote": state.N_REMOTE,
+            "reset_sent": state.cnt_reset_sent,
+            "reset_recv": state.cnt_reset_recv,
+            "resetack_sent": state.cnt_resetack_sent,
+            "resetack_recv": state.cnt_resetack_recv,
+            "resetack_reset_sent": state.cnt_resetack_reset_sent,
+            "resetack_reset_recv": state.cnt_resetack_reset_recv,
+            "reboots": state.cnt_reboots}
+
+
+def build(sim, pairs, seed, local, channel_factory):
+    """
+    Builds the nodes named in local.  A node whose peer is not local gets a placeholder
+    peer, which its channel must not deliver to.
+
+    :param channel_factory: function(sim, delay, loss, node name, peer name) returning a Channel
+    :return: dict of node name to Node
+    """
+    nodes = {}
+    peers = {}
+    for spec in pairs:
+        names = spec.node_names
+        for i, name in enumerate(names):
+            if name not in local:
+                continue
+            delay = ExponentialDelay(spec.min_delay, spec.mean_delay, stream(seed, name, "delay"))
+            loss = BernoulliLoss(spec.loss_rate, stream(seed, name, "loss"))
+            channel = channel_factory(sim, delay, loss, name, names[1 - i])
+            node = Node(sim, name, channel, stream(seed, name, "node"))
+            if spec.reboot_at[i] > 0:
+                node.reboot_after(spec.reboot_at[i], spec.reboot_delay)
+            nodes[name] = node
+            peers[name] = names[1 - i]
+
+    for name, node in nodes.items():
+        node.set_peer(nodes.get(peers[name], _RemotePeer(peers[name])))
+    return nodes
+
+
+def run_sequential(pairs, seed, end_time):
+    """
+    The reference: the same topology in one Simulator.
+
+    :return: (dict of node name to node_result(), events executed)
+    """
+    sim = Simulator()
+    names = set(name for spec in pairs for name in spec.node_names)
+    nodes = build(sim, pairs, seed, names, lambda sim, delay, loss, name, peer: SendTimeChannel(sim, delay, loss))
+    sim.run_until(end_time)
+    return dict((name, node_result(node)) for name, node in nodes.items()), sim.event_count
+
+
+class _RemotePeer(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "{{RemotePeer: {}}}".format(self.name)
+
+
+def _pack(message):
+    if message.is_reset:
+        return "reset", message.reset_number
+    if message.is_resetack_reset:
+        return "resetack_reset", message.reset_number, message.ack_number
+    if message.is_resetack:
+        return "resetack", message.reset_number, message.ack_number
+    flags = (Fragment.FLAG_B if message.is_begin else 0) | (Fragment.FLAG_E if message.is_end else 0)
+    return "data", flags, message.fragment_id, message.frag_length
+
+
+def _unpack(packed):
+    if packed[0] == "reset":
+        return FragReset(None, packed[1])
+    if packed[0] == "resetack":
+        return FragResetAck(None, packed[1], packed[2])
+    if packed[0] == "resetack_reset":
+        return FragResetAckReset(None, packed[1], packed[2])
+    return Fragment(None, packed[1], packed[2], packed[3], None)
+
+
+class RemoteChannel(SendTimeChannel):
+    """
+    A SendTimeChannel to a node in another partition.  It decides delay and loss as usual,
+    but posts each surviving message to the outbox instead of scheduling its delivery,
+    and posts a cancel when cleared.  Every delivery is at least min_delay after its send,
+    which is the lookahead of the partitions.
+    """
+
+    def __init__(self, sim, delay_generator, loss_rate, outbox, name, peer_name, partition):
+        """
+        :param outbox: List to append (partition, entry) to
+        :param name: The sending node, which names the link
+        :param peer_name: The receiving node
+        :param partition: The partition of the receiving node
+        """
+        super(RemoteChannel, self).__init__(sim, delay_generator, loss_rate)
+        self._outbox = outbox
+        self._name = name
+        self._peer_name = peer_name
+        self._partition = partition
+
+    def _schedule_delivery(self, now, delivery_time, peer, message):
+        self._outbox.append((self._partition,
+                             ("deliver", self._name, self._peer_name, now, delivery_time, _pack(message))))
+
+    def clear(self):
+        """
+        Cancels the deliveries after now.  The receiving partition has not run that far, as
+        its horizon is at most our next event time.
+        """
+        super(RemoteChannel, self).clear()
+        self._outbox.append((self._partition, ("cancel", self._name, self._sim.now)))
+
+
+class Partition(object):
+    """
+    The nodes of one partition and their Simulator.  Messages from other partitions
+    arrive through advance() as entries of their RemoteChannel outboxes.
+    """
+
+    def __init__(self, pairs, seed, assignment, index):
+        """
+        :param pairs: List of PairSpec of the whole topology
+        :param seed: The seed of the component streams
+        :param assignment: dict of node name to partition index
+        :param index: Our partition index
+        """
+        self._sim = Simulator()
+        self._assignment = assignment
+        self._local = set(name for name, partition in assignment.items() if partition == index)
+        self._outbox = []
+
+        # sending node name -> deque of [delivery time, Event, messages, receiving node name]
+        self._deliveries = {}
+
+        self._nodes = build(self._sim, pairs, seed, self._local, self._channel)
+
+    def __repr__(self):
+        return "{{Partition: nodes {} now {}}}".format(len(self._nodes), self._sim.now)
+
+    @property
+    def next_time(self):
+        """The time of the next event, float("inf") if there is none"""
+        t = self._sim.next_event_time()
+        return float("inf") if t is None else t
+
+    def advance(self, horizon, inbox):
+        """
+        Imports the inbox entries and executes the events before horizon
+
+        :return: (list of (partition, entry) for other partitions, next_time)
+        """
+        for entry in inbox:
+            self._import(entry)
+        self._sim.run_until(horizon)
+
+        outbox = self._outbox[:]
+        del self._outbox[:]
+        return outbox, self.next_time
+
+    def results(self):
+        """(dict of node name to node_result(), events executed)"""
+        return dict((name, node_result(node)) for name, node in self._nodes.items()), self._sim.event_count
+
+    def _channel(self, sim, delay, loss, name, peer_name):
+        if peer_name in self._local:
+            return SendTimeChannel(sim, delay, loss)
+        return RemoteChannel(sim, delay, loss, self._outbox, name, peer_name, self._assignment[peer_name])
+
+    def _import(self, entry):
+        if entry[0] == "cancel":
+            kind, link, time = entry
+            pending = self._deliveries.get(link, ())
+            while len(pending) > 0 and pending[-1][0] > time:
+                pending.pop()[1].set_inactive()
+            return
+
+        kind, link, peer_name, sent, delivery_time, packed = entry
+        pending = self._deliveries.setdefault(link, collections.deque())
+        message = _unpack(packed)
+        if len(pending) > 0 and pending[-1][0] == delivery_time:
+            # SendTimeChannel delivers messages of the same time with one event
+            pending[-1][2].append(message)
+            return
+
+        event = Event(delivery_time - sent, self._deliver, link)
+        pending.append([delivery_time, event, [message], peer_name])
+        # the same arithmetic as the sender's Simulator.schedule(), for identical times
+        self._sim.schedule_at(sent + event.delay, event)
+
+    def _deliver(self, link):
+        delivery_time, event, messages, peer_name = self._deliveries[link].popleft()
+        node = self._nodes[peer_name]
+        for message in messages:
+            node.receive(message)
+
+
+class _LocalWorker(object):
+    """A Partition in this process, with the request/response interface of a worker process"""
+    def __init__(self, *args):
+        self._partition = Partition(*args)
+        self._response = self._partition.next_time
+
+    def send(self, command):
+        if command[0] == "advance":
+            self._response = self._partition.advance(command[1], command[2])
+        else:
+            self._response = self._partition.results()
+
+    def recv(self):
+        return self._response
+
+    def join(self):
+        pass
+
+
+class _ProcessWorker(object):
+    """A Partition in a worker process"""
+    def __init__(self, *args):
+        self._connection, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_ProcessWorker._serve, args=(child,) + args)
+        self._process.start()
+
+    def send(self, command):
+        self._connection.send(command)
+
+    def recv(self):
+        return self._connection.recv()
+
+    def join(self):
+        self._process.join()
+
+    @staticmethod
+    def _serve(connection, *args):
+        # the Simulator prints a line each time it stops
+        sys.stdout = open(os.devnull, "w")
+        partition = Partition(*args)
+        connection.send(partition.next_time)
+        while True:
+            command = connection.recv()
+            if command[0] == "advance":
+                connection.send(partition.advance(command[1], command[2]))
+            else:
+                connection.send(partition.results())
+                break
+
+
+class PartitionedSimulation(object):
+    """
+    Conservative parallel simulation of a topology of node pairs.  Each partition runs
+    its nodes in its own Simulator (in its own process, unless processes is False), and
+    messages between partitions go through RemoteChannels.
+
+    The partitions advance in rounds of window synchronization.  In each round partition
+    j reports its next event time N[j].  Nothing can happen in j before
+        LB[j] = min(N[j], N[k] + lookahead[k][j] for each partition k sending to j)
+    and a message (or cancel) from j is sent at LB[j] or later, so partition i executes
+    its events before
+        H[i] = min(LB[j] for each partition j sending to i)
+    The lookahead is the smallest min_delay of the channels from k to j.  A partition
+    without incoming channels runs to the end in one round.  The partition with the
+    earliest event always makes progress, unless another partition has an event at the
+    very same time.
+
+    Results match run_sequential() for the same seed: every component draws from its
+    own stream, and deliveries are scheduled at the same times.
+    """
+
+    def __init__(self, pairs, seed, assignment, processes=True):
+        """
+        :param pairs: List of PairSpec
+        :param seed: The seed of the component streams
+        :param assignment: dict of node name to partition index, see assign_pairs()
+        :param processes: Run each partition in its own process
+        """
+        self._count = max(assignment.values()) + 1
+        specs = {}
+        for spec in pairs:
+            a, b = spec.node_names
+            specs[a] = specs[b] = spec
+
+        # lookahead[k][j]: the smallest min_delay from partition k to j, None without channels
+        self._lookahead = [[None] * self._count for i in range(self._count)]
+        for spec in pairs:
+            a, b = spec.node_names
+            for k, j in ((assignment[a], assignment[b]), (assignment[b], assignment[a])):
+                if k != j and (self._lookahead[k][j] is None or spec.min_delay < self._lookahead[k][j]):
+                    self._lookahead[k][j] = spec.min_delay
+        self._incoming = [[k for k in range(self._count) if self._lookahead[k][j] is not None]
+                          for j in range(self._count)]
+
+        worker = _ProcessWorker if processes else _LocalWorker
+        self._workers = [worker(pairs, seed, assignment, i) for i in range(self._count)]
+        self._next_times = [w.recv() for w in self._workers]
+        self._inboxes = [[] for i in range(self._count)]
+
+        # stats
+        self.cnt_rounds = 0
+        self.cnt_messages = 0
+
+    def __repr__(self):
+        return "{{PartitionedSimulation: partitions {} rounds {} messages {}}}".format(
+            self._count, self.cnt_rounds, self.cnt_messages)
+
+    def run_until(self, end_time):
+        """Runs all partitions to end_time, like Simulator.run_until()"""
+        while min(self._next_times) < end_time:
+            next_times = self._next_times
+            bounds = [min([next_times[j]] + [next_times[k] + self._lookahead[k][j] for k in self._incoming[j]])
+                      for j in range(self._count)]
+            horizons = [min([end_time] + [bounds[j] for j in self._incoming[i]]) for i in range(self._count)]
+            if all(horizons[i] <= next_times[i] for i in range(self._count)):
+                raise RuntimeError("Partitions have simultaneous events at {}".format(min(next_times)))
+
+            for i, worker in enumerate(self._workers):
+                worker.send(("advance", horizons[i], self._inboxes[i]))
+                self._inboxes[i] = []
+
+            outboxes = []
+            for i, worker in enumerate(self._workers):
+                outbox, self._next_times[i] = worker.recv()
+                outboxes.append(outbox)
+
+            for outbox in outboxes:
+                for partition, entry in outbox:
+                    self._inboxes[partition].append(entry)
+                    if entry[0] == "deliver":
+                        self.cnt_messages += 1
+                        self._next_times[partition] = min(self._next_times[partition], entry[4])
+            self.cnt_rounds += 1
+
+    def results(self):
+        """
+        Ends the workers
+
+        :return: (dict of node name to node_result(), events executed), as run_sequential()
+        """
+        results = {}
+        events = 0
+        for worker in self._workers:
+            worker.send(("results",))
+        for worker in self._workers:
+            nodes, count = worker.recv()
+            results.update(nodes)
+            events += count
+            worker.join()
+        return results, events
@@ -0,0 +1,216 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import absolute_import, print_function
+import timeit
+
+
+class CallbackStats(object):
+    """
+    Counters for all events with the same callback
+    """
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.wall_time = 0.0
+
+        # simulated time between consecutive events of this callback
+        self.last_time = None
+        self.spacing_count = 0
+        self.spacing_total = 0.0
+        self.spacing_min = float("inf")
+
+    def __repr__(self):
+        return "{{CallbackStats: {} count {} wall {:.6f} mean spacing {}}}".format(
+            self.name, self.count, self.wall_time, self.mean_spacing)
+
+    @property
+    def mean_wall_time(self):
+        return self.wall_time / self.count if self.count > 0 else 0.0
+
+    @property
+    def mean_spacing(self):
+        return self.spacing_total / self.spacing_count if self.spacing_count > 0 else None
+
+
+class Profiler(object):
+    """
+    Groups the events a Simulator executes by callback (e.g. Channel._queue_timer or
+    Node._timeout_callback) and measures how often they run, how much wall clock time
+    they take and how far apart they are in simulated time.  It also samples the size
+    of the simulator's event heap.
+
+    Attach it with Simulator.set_profiler().  A Simulator without a profiler (or
+    recorder) only pays for a None check per event.
+
+    Example:
+        profiler = Profiler()
+        sim.set_profiler(profiler)
+        sim.run_count(2000)
+        profiler.print_report()
+    """
+
+    def __init__(self, heap_sample_interval=100, max_heap_samples=1024):
+        """
+        :param heap_sample_interval: Sample the heap size every this many events
+        :param max_heap_samples: When there are this many samples, keep every other one
+                                 and sample half as often
+        """
+        if heap_sample_interval <= 0: raise ValueError("heap_sample_interval must be positive")
+        if max_heap_samples < 2: raise ValueError("max_heap_samples must be at least 2")
+
+        self._timer = timeit.default_timer
+        self._stats = {}
+        self._event_count = 0
+        self._wall_time = 0.0
+
+        self._heap_sample_interval = heap_sample_interval
+        self._max_heap_samples = max_heap_samples
+        self._heap_samples = []
+        self._heap_max = 0
+
+        # the event being timed between before() and after()
+        self._current = None
+        self._start = 0.0
+
+    def before(self, time, event, heap_size):
+        """Called by the Simulator right before it executes event at time"""
+        callback = event.callback
+        key = getattr(callback, "__func__", callback)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = CallbackStats(Profiler._callback_name(callback))
+            self._stats[key] = stats
+
+        stats.count += 1
+        if stats.last_time is not None:
+            spacing = time - stats.last_time
+            stats.spacing_count += 1
+            stats.spacing_total += spacing
+            if spacing < stats.spacing_min:
+                stats.spacing_min = spacing
+        stats.last_time = time
+
+        if heap_size > self._heap_max:
+            self._heap_max = heap_size
+        if self._event_count % self._heap_sample_interval == 0:
+            self._sample_heap(time, heap_size)
+        self._event_count += 1
+
+        self._current = stats
+        self._start = self._timer()
+
+    def after(self):
+        """Called by the Simulator right after it executed the event passed to before()"""
+        elapsed = self._timer() - self._start
+        self._current.wall_time += elapsed
+        self._wall_time += elapsed
+
+    def start_run(self):
+        """
+        Call before each new Simulator when one Profiler collects over many trials, so
+        the simulated time spacing is not measured across trials.
+        """
+        for stats in self._stats.values():
+            stats.last_time = None
+
+    @property
+    def event_count(self):
+        return self._event_count
+
+    @property
+    def wall_time(self):
+        """Total wall clock time spent in callbacks (seconds)"""
+        return self._wall_time
+
+    @property
+    def heap_max(self):
+        """The largest event heap size seen"""
+        return self._heap_max
+
+    @property
+    def heap_samples(self):
+        """List of (simulated time, heap size) samples"""
+        return self._heap_samples
+
+    def report(self):
+        """Returns a list of CallbackStats, the most wall clock time first"""
+        return sorted(self._stats.values(), key=lambda stats: stats.wall_time, reverse=True)
+
+    def print_report(self):
+        print("{:<40} {:>10} {:>7} {:>12} {:>12} {:>14}".format(
+            "callback", "count", "%", "wall (s)", "mean (us)", "spacing (s)"))
+        for stats in self.report():
+            spacing = stats.mean_spacing
+            print("{:<40} {:>10} {:>7.2f} {:>12.6f} {:>12.3f} {:>14}".format(
+                stats.name, stats.count, 100.0 * stats.count / max(self._event_count, 1), stats.wall_time,
+                1e6 * stats.mean_wall_time, "-" if spacing is None else "{:.9f}".format(spacing)))
+
+        rate = self._event_count / self._wall_time if self._wall_time > 0 else 0.0
+        print("{} events, {:.6f} seconds in callbacks ({:.0f} events/sec), heap max {}".format(
+            self._event_count, self._wall_time, rate, self._heap_max))
+
+    def _sample_heap(self, time, heap_size):
+        self._heap_samples.append((time, heap_size))
+        if len(self._heap_samples) >= self._max_heap_samples:
+            self._heap_samples = self._heap_samples[::2]
+            self._heap_sample_interval *= 2
+
+    @staticmethod
+    def _callback_name(callback):
+        owner = getattr(callback, "__self__", None)
+        name = getattr(callback, "__name__", repr(callback))
+        if owner is not None:
+            return "{}.{}".format(type(owner).__name__, name)
+        return name
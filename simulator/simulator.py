@@ -52,8 +52,11 @@
 # intellectual property used by its contributions to this software. You may
 # contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
 
+from __future__ import absolute_import, print_function
 import heapq
+import random
 import sys
+from .compat import legacy_seed
 
 
 class Simulator(object):
@@ -65,14 +68,63 @@ class Simulator(object):
     run until a particular simulated time.
 
     Simulation time is a float that represents seconds, though the scale
-    is really irrelevant.
+    is really irrelevant.  Events at the same time run in the order they were
+    scheduled.
+
+    With ticks=True the clock is an integer count of nanoseconds instead.  Each event
+    delay is rounded to a whole tick once, when it is scheduled, so event times add up
+    exactly and the heap compares integers.  now, stop_time and the times passed to the
+    recorder and profiler are still in seconds; now_ticks is the raw clock.  Delays that
+    round to the same tick run in schedule order, so a trial can differ from the float
+    clock when two events are less than half a nanosecond apart.
     """
     VERBOSE = False
     EXTRA_VERBOSE = False
 
-    def __init__(self):
-        self._time = 0
+    # The resolution of the tick clock
+    TICKS_PER_SECOND = 1000000000
+
+    def __init__(self, ticks=False, quiet=False):
+        """
+        :param ticks: If True, keep time as an integer number of TICKS_PER_SECOND ticks
+        :param quiet: If True, do not print a line when a run stops, e.g. for many short trials
+        """
+        self._ticks = ticks
+        self._quiet = quiet
         self._priority_queue = []
+        self._running = False
+
+        # set by stop() to end run() after the current event
+        self._stop_requested = False
+        self._stop_reason = None
+
+        # optional TraceRecorder and Profiler, called around every executed event
+        self._recorder = None
+        self._profiler = None
+
+        self.reset()
+
+    def reset(self, seed=None):
+        """
+        Returns to time 0 with no events, for reusing the simulator in another trial.  The
+        recorder and profiler stay attached.  Reset the Channels and Nodes afterwards.
+
+        :param seed: If not None, seeds the random module for the components that use it, as
+                     random.seed(seed) on Python 2
+        :return:
+        """
+        if self._running: raise RuntimeError("Cannot reset while running")
+        if seed is not None:
+            random.seed(legacy_seed(seed))
+
+        # _time is in the units of the heap (seconds or ticks), _now is in seconds
+        self._time = 0
+        self._now = 0
+        del self._priority_queue[:]
+
+        # heap entries are (expiry, sequence, event), the sequence breaks ties in schedule order
+        self._sequence = 0
+        self._stop_reason = None
 
         # total number of events executed
         self._event_count = 0
@@ -85,15 +137,118 @@ class Simulator(object):
         self._use_stop_count = False
         self._stop_count_end = 0
 
-        self._running = False
+    @property
+    def ticks(self):
+        """True if the clock counts integer ticks"""
+        return self._ticks
 
     @property
     def now(self):
-        return self._time
+        return self._now
+
+    @property
+    def now_ticks(self):
+        """The current time in ticks (rounded from seconds if not using the tick clock)"""
+        if self._ticks:
+            return self._time
+        return self.to_ticks(self._time)
+
+    @staticmethod
+    def to_ticks(seconds):
+        """Rounds a time or delay in seconds to the nearest tick"""
+        return int(round(seconds * Simulator.TICKS_PER_SECOND))
+
+    def _to_clock(self, seconds):
+        if self._ticks:
+            return Simulator.to_ticks(seconds)
+        return seconds
+
+    def _to_seconds(self, t):
+        if self._ticks:
+            return t / float(Simulator.TICKS_PER_SECOND)
+        return t
+
+    @property
+    def event_count(self):
+        """The number of events executed"""
+        return self._event_count
+
+    @property
+    def stop_time(self):
+        """The time run_until() stops at, or None"""
+        if self._use_stop_time:
+            return self._to_seconds(self._stop_time)
+        return None
+
+    @property
+    def stop_reason(self):
+        """The reason given to stop(), or None"""
+        return self._stop_reason
+
+    def stop(self, reason=None):
+        """
+        Ends the current run() after the event being executed, e.g. when a monitor finds
+        that the trial has failed.  The remaining events stay queued.
+
+        :param reason: Why, kept in stop_reason
+        :return:
+        """
+        self._stop_requested = True
+        self._stop_reason = reason
+
+    def set_recorder(self, recorder):
+        """
+        Records every executed event with recorder.before(time, event) and recorder.after()
+
+        :param recorder: A TraceRecorder, or None to stop recording
+        :return:
+        """
+        self._recorder = recorder
+
+    def set_profiler(self, profiler):
+        """
+        Times every executed event with profiler.before(time, event, heap_size) and profiler.after()
+
+        :param profiler: A Profiler, or None to stop profiling
+        :return:
+        """
+        self._profiler = profiler
+
+    def next_event_time(self, ignore=None):
+        """
+        The time of the next active event, or None if there is none
+
+        :param ignore: If not None, a function(event) that returns True for events to skip
+        :return:
+        """
+        times = [t for t, sequence, event in self._priority_queue if event.active and not (ignore and ignore(event))]
+        if len(times) == 0:
+            return None
+        return self._to_seconds(min(times))
 
     def schedule(self, event):
-        expiry = self._time + event.delay
-        heapq.heappush(self._priority_queue, (expiry, event))
+        if self._ticks:
+            # delays are non-negative, so adding 0.5 and truncating rounds to nearest
+            expiry = self._time + int(event.delay * Simulator.TICKS_PER_SECOND + 0.5)
+        else:
+            expiry = self._time + event.delay
+        self._sequence += 1
+        heapq.heappush(self._priority_queue, (expiry, self._sequence, event))
+
+    def schedule_at(self, expiry, event):
+        """
+        Schedules the event at an absolute time instead of now plus its delay, for events
+        whose time was computed elsewhere (e.g. in another partition's Simulator).
+
+        :param expiry: The time to execute the event, not before now
+        :param event: The Event
+        :return:
+        """
+        expiry = self._to_clock(expiry)
+        if expiry < self._time:
+            raise ValueError("Cannot schedule at {} before now {}".format(self._to_seconds(expiry), self.now))
+        self._sequence += 1
+        heapq.heappush(self._priority_queue, (expiry, self._sequence, event))
 
     def run_until(self, stop_time):
         """
@@ -106,7 +261,7 @@ class Simulator(object):
         if self._running: raise RuntimeError("Cannot call a run function while already running")
 
         self._use_stop_time = True
-        self._stop_time = stop_time
+        self._stop_time = self._to_clock(stop_time)
         self.run()
 
     def run_count(self, stop_count):
@@ -126,35 +281,59 @@ class Simulator(object):
         """
         if self._running: raise RuntimeError("Cannot call a run function while already running")
         self._running = True
+        self._stop_requested = False
 
         try:
-            while len(self._priority_queue) > 0:
-                t, event = heapq.heappop(self._priority_queue)
+            while len(self._priority_queue) > 0 and not self._stop_requested:
+                t, sequence, event = self._priority_queue[0]
                 if Simulator.EXTRA_VERBOSE:
-                    print "{:>12.9f} Stepping simulation time to {:>12.9f}".format(self._time, t)
+                    print("{:>12.9f} Stepping simulation time to {:>12.9f}".format(self.now, self._to_seconds(t)))
 
-                self._time = t
-
-                # check for termination conditions
-                if self._use_stop_time and self._stop_time <= self._time:
+                # check for termination conditions, leaving the event queued for the next run
+                if self._use_stop_time and self._stop_time <= t:
+                    self._time = max(self._time, self._stop_time)
+                    self._now = self._to_seconds(self._time)
                     break
 
+                self._time = t
+                self._now = self._to_seconds(t) if self._ticks else t
+
                 if self._use_stop_count and self._stop_count_end <= self._event_count:
                     break
 
+                heapq.heappop(self._priority_queue)
+
                 if Simulator.EXTRA_VERBOSE:
-                    print "{:>12.9f} Executing event {}".format(t, event)
+                    print("{:>12.9f} Executing event {}".format(self.now, event))
 
                 if event.active:
                     self._event_count += 1
-                    event.callback(event.data)
-        except Exception as e:
+                    if self._recorder is None and self._profiler is None:
+                        event.callback(event.data)
+                    else:
+                        self._execute_observed(self.now, event)
+        except Exception:
+            # show the output of the trial before the traceback
             sys.stdout.flush()
-            print "FOO"
-            print e
             raise
+        finally:
+            self._running = False
 
-        print "{:>12.9f} simulation stopping ({} still in queue, {} events executed)".format(
-            self._time, len(self._priority_queue), self._event_count)
+        if not self._quiet:
+            print("{:>12.9f} simulation stopping ({} still in queue, {} events executed)".format(
+                self.now, len(self._priority_queue), self._event_count))
 
-        self._running = False
+    def _execute_observed(self, t, event):
+        if self._recorder is not None:
+            self._recorder.before(t, event)
+        if self._profiler is not None:
+            self._profiler.before(t, event, len(self._priority_queue))
+
+        try:
+            event.callback(event.data)
+        finally:
+            # keep the record of an event that raises, it is the one worth looking at
+            if self._profiler is not None:
+                self._profiler.after()
+            if self._recorder is not None:
+                self._recorder.after()
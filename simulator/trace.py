@@ -0,0 +1,320 @@
+#
+# Copyright (c) 2016, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+################################################################################
+#
+# PATENT NOTICE
+#
+# This software is distributed under the BSD 2-clause License (see LICENSE
+# file).  This BSD License does not make any patent claims and as such, does
+# not act as a patent grant.  The purpose of this section is for each contributor
+# to define their intentions with respect to intellectual property.
+#
+# Each contributor to this source code is encouraged to state their patent
+# claims and licensing mechanisms for any contributions made. At the end of
+# this section contributors may each make their own statements.  Contributor's
+# claims and grants only apply to the pieces (source code, programs, text,
+# media, etc) that they have contributed directly to this software.
+#
+# There is no guarantee that this section is complete, up to date or accurate. It
+# is up to the contributors to maintain their portion of this section and up to
+# the user of the software to verify any claims herein.
+#
+# Do not remove this header notification.  The contents of this section must be
+# present in all distributions of the software.  You may only modify your own
+# intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+
+from __future__ import absolute_import, print_function
+import collections
+import struct
+from .node import Node
+from .channel import Channel
+from .message import FragReset
+from .message import FragResetAck
+from .message import FragResetAckReset
+
+
+# One fixed-width record per executed event:
+#   time, event type, node, state before, state after, N_LOCAL, N_REMOTE,
+#   message reset number, message ack number
+_RECORD = struct.Struct("<dBBBBIIII")
+_HEADER = struct.Struct("<8sHH")
+_MAGIC = b"BEFTRACE"
+_VERSION = 1
+
+TraceRecord = collections.namedtuple(
+    "TraceRecord",
+    ["time", "event_type", "node", "state_before", "state_after", "n_local", "n_remote", "reset_number", "ack_number"])
+
+
+class TraceRecorder(object):
+    """
+    Records every event the Simulator executes as a fixed-width binary record.
+
+    Records go into a pre-allocated ring buffer of capacity records.  With a path, a full
+    buffer is appended to the file and the buffer starts over, so the file has every
+    record once close() is called.  Without a path the buffer keeps the last capacity
+    records and dump() writes them out, e.g. only when a trial fails.
+
+    Attach it with Simulator.set_recorder().  Events of a Node (timeouts, reboots) are
+    recorded against that node, events of a Channel against the node that receives the
+    head-of-line message (the record shows no change if the channel lost it).  Nodes are
+    identified by their position in the nodes list.
+
+    Example:
+        recorder = TraceRecorder([alice, bob])
+        sim.set_recorder(recorder)
+        sim.run_count(2000)
+        if not alice.data_ready: recorder.dump("failure.trace")
+    """
+
+    EVENT_OTHER = 0
+    EVENT_TIMEOUT = 1
+    EVENT_REBOOT_START = 2
+    EVENT_REBOOT_FINISHED = 3
+    EVENT_DELIVER_RESET = 4
+    EVENT_DELIVER_RESETACK = 5
+    EVENT_DELIVER_DATA = 6
+    EVENT_DELIVER_RESETACK_RESET = 7
+
+    event_strings = {EVENT_OTHER: "OTHER",
+                     EVENT_TIMEOUT: "TIMEOUT",
+                     EVENT_REBOOT_START: "REBOOT_START",
+                     EVENT_REBOOT_FINISHED: "REBOOT_FINISHED",
+                     EVENT_DELIVER_RESET: "DELIVER_RESET",
+                     EVENT_DELIVER_RESETACK: "DELIVER_RESETACK",
+                     EVENT_DELIVER_DATA: "DELIVER_DATA",
+                     EVENT_DELIVER_RESETACK_RESET: "DELIVER_RESETACK_RESET"}
+
+    _node_events = {"_timeout_callback": EVENT_TIMEOUT,
+                    "_reboot_start_callback": EVENT_REBOOT_START,
+                    "_reboot_finished_callback": EVENT_REBOOT_FINISHED}
+
+    NO_NODE = 0xFF
+    NO_STATE = 0xFF
+
+    def __init__(self, nodes, path=None, capacity=4096):
+        """
+        :param nodes: The Nodes to record (at most 255)
+        :param path: If not None, spill the buffer to this file
+        :param capacity: The number of records in the buffer
+        """
+        if len(nodes) >= TraceRecorder.NO_NODE: raise ValueError("Too many nodes")
+        if capacity <= 0: raise ValueError("capacity must be positive")
+
+        self._nodes = list(nodes)
+        self._node_index = dict((node, i) for i, node in enumerate(self._nodes))
+        self._capacity = capacity
+        self._buffer = bytearray(capacity * _RECORD.size)
+        self._position = 0
+        self._wrapped = False
+        self._record_count = 0
+
+        # the record being built between before() and after()
+        self._time = 0.0
+        self._event_type = TraceRecorder.EVENT_OTHER
+        self._node = None
+        self._state_before = TraceRecorder.NO_STATE
+        self._reset_number = 0
+        self._ack_number = 0
+
+        self._file = None
+        if path is not None:
+            self._file = open(path, "wb")
+            self._write_header(self._file)
+
+    def reset(self):
+        """Forgets the buffered records, for reusing the recorder in another trial"""
+        self._position = 0
+        self._wrapped = False
+        self._record_count = 0
+
+    @property
+    def record_count(self):
+        """The total number of records written"""
+        return self._record_count
+
+    def before(self, time, event):
+        """Called by the Simulator right before it executes event at time"""
+        self._time = time
+        self._event_type = TraceRecorder.EVENT_OTHER
+        self._node = None
+        self._reset_number = 0
+        self._ack_number = 0
+
+        owner = getattr(event.callback, "__self__", None)
+        if isinstance(owner, Node):
+            self._node = owner
+            self._event_type = TraceRecorder._node_events.get(event.callback.__name__, TraceRecorder.EVENT_OTHER)
+        elif isinstance(owner, Channel) and owner._head_of_line() is not None:
+            # the message the channel will deliver
+            peer, message = owner._head_of_line()
+            self._node = peer
+            if isinstance(message, FragResetAckReset):
+                self._event_type = TraceRecorder.EVENT_DELIVER_RESETACK_RESET
+                self._reset_number = message.reset_number
+                self._ack_number = message.ack_number
+            elif isinstance(message, FragResetAck):
+                self._event_type = TraceRecorder.EVENT_DELIVER_RESETACK
+                self._reset_number = message.reset_number
+                self._ack_number = message.ack_number
+            elif isinstance(message, FragReset):
+                self._event_type = TraceRecorder.EVENT_DELIVER_RESET
+                self._reset_number = message.reset_number
+            else:
+                self._event_type = TraceRecorder.EVENT_DELIVER_DATA
+
+        if self._node is not None:
+            self._state_before = self._node._state.STATE
+        else:
+            self._state_before = TraceRecorder.NO_STATE
+
+    def after(self):
+        """Called by the Simulator right after it executed the event passed to before()"""
+        node = self._node
+        if node is not None:
+            index = self._node_index.get(node, TraceRecorder.NO_NODE)
+            state = node._state
+            state_after, n_local, n_remote = state.STATE, state.N_LOCAL, state.N_REMOTE
+        else:
+            index, state_after, n_local, n_remote = TraceRecorder.NO_NODE, TraceRecorder.NO_STATE, 0, 0
+
+        _RECORD.pack_into(self._buffer, self._position * _RECORD.size, self._time, self._event_type, index,
+                          self._state_before, state_after, n_local, n_remote, self._reset_number, self._ack_number)
+        self._record_count += 1
+        self._position += 1
+
+        if self._position == self._capacity:
+            self._position = 0
+            if self._file is not None:
+                self._file.write(self._buffer)
+            else:
+                self._wrapped = True
+
+    def dump(self, path):
+        """Writes the records in the buffer, oldest first, to a new trace file"""
+        with open(path, "wb") as f:
+            self._write_header(f)
+            f.write(self._buffered())
+
+    def close(self):
+        """Writes out the buffer and closes the file, if recording to a file"""
+        if self._file is not None:
+            self._file.write(self._buffered())
+            self._file.close()
+            self._file = None
+            self._position = 0
+
+    def _buffered(self):
+        end = self._position * _RECORD.size
+        if self._wrapped:
+            return self._buffer[end:] + self._buffer[:end]
+        return self._buffer[:end]
+
+    def _write_header(self, f):
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(self._nodes)))
+        for node in self._nodes:
+            name = str(node.name).encode("utf-8")
+            f.write(struct.pack("<B", len(name)) + name)
+
+
+class TraceReader(object):
+    """
+    Reads a trace file written by TraceRecorder, without re-running the simulation.
+
+    Example:
+        for record in TraceReader("failure.trace").filter(node="ALICE", start_time=10.0):
+            print(record)
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, version, node_count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC: raise ValueError("Not a trace file: {}".format(path))
+        if version != _VERSION: raise ValueError("Unsupported trace version {}".format(version))
+
+        offset = _HEADER.size
+        self._names = []
+        for i in range(node_count):
+            length, = struct.unpack_from("<B", data, offset)
+            self._names.append(str(data[offset + 1:offset + 1 + length].decode("utf-8")))
+            offset += 1 + length
+
+        self._data = data
+        self._offset = offset
+        self._record_count = (len(data) - offset) // _RECORD.size
+
+    def __len__(self):
+        return self._record_count
+
+    @property
+    def names(self):
+        return self._names
+
+    def __iter__(self):
+        return self.filter()
+
+    def filter(self, node=None, event_types=None, start_time=None, end_time=None):
+        """
+        Yields the matching records in time order.  Node indices are replaced by node names
+        (None for events without a node).
+
+        :param node: Only records of the node with this name
+        :param event_types: Only records with one of these TraceRecorder.EVENT_* types
+        :param start_time: Only records at or after this time
+        :param end_time: Only records before this time
+        """
+        node_index = None
+        if node is not None:
+            stripped = [name.strip() for name in self._names]
+            if node.strip() not in stripped: raise ValueError("Unknown node {}".format(node))
+            node_index = stripped.index(node.strip())
+
+        unpack_from = _RECORD.unpack_from
+        for offset in range(self._offset, self._offset + self._record_count * _RECORD.size, _RECORD.size):
+            fields = unpack_from(self._data, offset)
+            if start_time is not None and fields[0] < start_time: continue
+            if end_time is not None and fields[0] >= end_time: continue
+            if node_index is not None and fields[2] != node_index: continue
+            if event_types is not None and fields[1] not in event_types: continue
+
+            name = self._names[fields[2]] if fields[2] != TraceRecorder.NO_NODE else None
+            yield TraceRecord(fields[0], fields[1], name, *fields[3:])
+
+    def replay(self, **kwargs):
+        """Prints the records selected by filter(**kwargs) in the style of the verbose output"""
+        for record in self.filter(**kwargs):
+            print("{:>12.9f} NODE {} {:<15} {:>10} -> {:<10} n ({}, {}) msg ({}, {})".format(
+                record.time, record.node, TraceRecorder.event_strings[record.event_type],
+                Node._state_strings.get(record.state_before, "-"), Node._state_strings.get(record.state_after, "-"),
+                record.n_local, record.n_remote, record.reset_number, record.ack_number))